@@ -1,11 +1,15 @@
 """This module contains the ProgressCerebro class which extends the backtrader Cerebro class to provide progress tracking, logging and caching
 """
-import csv
+import atexit
 import gc
 import itertools
 import multiprocessing
 import os
+import pickle
+import threading
+import time
 from copy import deepcopy
+from multiprocessing import shared_memory
 
 import backtrader as bt
 import pandas as pd
@@ -17,13 +21,206 @@ from backtrader.utils.py3 import integer_types, map
 from backtrader.writer import WriterFile
 from tqdm import tqdm
 
+from . import feeds
+from .results_store import ResultStore
 from .strategies.BaseStrategy import BaseStrategy
 from .util import undo_backtrader_dt
 
-filelock = multiprocessing.Lock()
 listlock = multiprocessing.Lock()
 
 
+def _init_worker(endpoint: tuple):
+    result_sink.attach(*endpoint)
+
+
+def _run_chunk(task: tuple):
+    name, size, feed_classes, chunk = task
+    # Feed classes generated in the parent after the worker started, see `feeds.indicator_data_class`
+    for base, columns in feed_classes:
+        feeds.indicator_data_class(columns, base=base)
+    block = shared_memory.SharedMemory(name)
+    try:
+        cerebro = pickle.loads(block.buf[:size])
+    finally:
+        block.close()
+    return cerebro.run_chunk(chunk)
+
+
+class WorkerPool:
+    """Pool of optimization workers which can be reused by successive `ProgressCerebro.run` calls
+
+    The feed arrays of a run are copied into shared memory once, keyed by their fingerprint, and kept there while the
+    following runs use the same arrays, until `invalidate` or `shutdown`. Each run is handed to the workers as one
+    pickled cerebro in its own shared memory block, which a worker loads for each chunk of combinations, so the tasks
+    only carry the strategy params. Warm workers keep their imports and their `feeds.indicator_memo` between runs.
+    """
+
+    def __init__(self, processes: int = None):
+        self.processes = processes
+        self._pool = None
+        self._shared = {}
+
+    def share(self, arrays):
+        """Shared memory copy of a `feeds.FeedArrays` or `feeds.IntrabarArrays`, made once per fingerprint"""
+        key = (type(arrays), arrays.fingerprint)
+        if key not in self._shared:
+            self._shared[key] = arrays.share()
+        return self._shared[key]
+
+    def release(self, keep: list):
+        """Free the shared copies other than those of `keep`, which are no longer used by the runs"""
+        keep = {(type(arrays), arrays.fingerprint) for arrays in keep}
+        for key in list(self._shared):
+            if key not in keep:
+                self._shared.pop(key).unlink()
+
+    def imap(self, cerebro: bt.Cerebro, chunks: list):
+        """Run the chunks of optimization combinations of `cerebro` on the workers, see `ProgressCerebro.run_chunk`.
+        Yields the results of each chunk in order"""
+        datanames = [data.p.dataname for data in cerebro.datas]
+        self.release([dataname for dataname in datanames if hasattr(dataname, "share")])
+        feed_classes = list({getattr(type(data), "indicator_spec", None) for data in cerebro.datas} - {None})
+        pool = cerebro.p.pool
+        try:
+            for data in cerebro.datas:
+                if hasattr(data.p.dataname, "share"):
+                    data.p.dataname = self.share(data.p.dataname)
+            cerebro.p.pool = None
+            payload = pickle.dumps(cerebro, protocol=pickle.HIGHEST_PROTOCOL)
+        finally:
+            # The parent keeps its own arrays
+            cerebro.p.pool = pool
+            for data, dataname in zip(cerebro.datas, datanames):
+                data.p.dataname = dataname
+
+        block = shared_memory.SharedMemory(create=True, size=len(payload))
+        try:
+            block.buf[: len(payload)] = payload
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(
+                    self.processes, initializer=_init_worker, initargs=(result_sink.endpoint(),)
+                )
+                # Free the shared memory if the pool is never shut down
+                atexit.register(self.shutdown)
+            tasks = [(block.name, len(payload), feed_classes, chunk) for chunk in chunks]
+            yield from self._pool.imap(_run_chunk, tasks)
+        finally:
+            block.close()
+            block.unlink()
+
+    def invalidate(self):
+        """Free the shared copies of the feed arrays, e.g. when the data of the runs has changed. The indicator memo
+        entries of the old data are evicted from the workers as new data comes in"""
+        for arrays in self._shared.values():
+            arrays.unlink()
+        self._shared.clear()
+
+    def shutdown(self):
+        """Stop the workers and free the shared memory of the pool"""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+            atexit.unregister(self.shutdown)
+        self.invalidate()
+
+
+class ResultSink:
+    """Single writer of the `results_store.ResultStore`s, fed by the runs of this process and of its optimization
+    workers
+
+    `put` sends a row through a pipe to a thread of the parent process, which stores the rows in batches of up to
+    `batch_size` or after `flush_interval` seconds, so the runs never wait on the database. `sync` waits until
+    everything sent so far is stored.
+    """
+
+    def __init__(self, batch_size: int = 500, flush_interval: float = 2.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._reader = self._writer = self._lock = None
+        self._thread = None
+        self._cond = threading.Condition()
+        self._sent = self._synced = 0
+        self._error = None
+
+    def start(self):
+        """Start the writer thread in this process, if not started yet"""
+        if self._thread is None:
+            self._reader, self._writer = multiprocessing.Pipe(duplex=False)
+            self._lock = multiprocessing.Lock()
+            self._thread = threading.Thread(target=self._write_loop, name="ResultSink", daemon=True)
+            self._thread.start()
+
+    def endpoint(self):
+        """Sending end of the pipe, to `attach` to in a worker process"""
+        self.start()
+        return self._writer, self._lock
+
+    def attach(self, writer, lock):
+        """Send the rows of this (worker) process to the sink which gave `endpoint`"""
+        self._writer, self._lock = writer, lock
+
+    def put(self, store: ResultStore, run_key: tuple, keys: dict, metrics: dict):
+        """Queue a row of `keys` and `metrics` for `store`, `run_key` being the strategy, start and end of the run"""
+        if self._writer is None:
+            self.start()
+        with self._lock:
+            self._writer.send((store.path, *run_key, keys, metrics))
+
+    def sync(self):
+        """Wait until the rows put so far by this process and by the workers which returned their results are stored.
+        Raises the error of a failed write"""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._sent += 1
+            token = self._sent
+        with self._lock:
+            self._writer.send(token)
+        with self._cond:
+            self._cond.wait_for(lambda: self._synced >= token)
+            error, self._error = self._error, None
+        if error is not None:
+            raise error
+
+    def _write_loop(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = None if not pending else max(deadline - time.monotonic(), 0)
+            message = self._reader.recv() if self._reader.poll(timeout) else None
+            if isinstance(message, tuple):
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.append(message)
+                if len(pending) < self.batch_size:
+                    continue
+
+            try:
+                self._flush(pending)
+            except Exception as e:
+                # Reported by the next sync, the rows are dropped
+                self._error = e
+            pending = []
+            if isinstance(message, int):
+                with self._cond:
+                    self._synced = message
+                    self._cond.notify_all()
+
+    def _flush(self, rows: list):
+        by_store = {}
+        for path, *row in rows:
+            by_store.setdefault(path, []).append(row)
+
+        for path, rows in by_store.items():
+            print(f"Saving {len(rows)} results to {path}")
+            ResultStore.open(path).put_many(rows)
+
+
+# Writes the results of the runs of this process, or sends them to the parent's sink from an optimization worker
+result_sink = ResultSink()
+
+
 class OptReturn(object):
     def __init__(self, params, **kwargs):
         self.p = self.params = params
@@ -32,6 +229,20 @@ class OptReturn(object):
 
 
 class ProgressCerebro(bt.Cerebro):
+    params = (
+        # Let `TenXSqueeze` take its stateless indicators from `feeds.indicator_memo`
+        ("memo_indicators", False),
+        # `WorkerPool` to run optimizations on, a temporary one is started by each run if None
+        ("pool", None),
+        # Archive the `BaseStrategy.artifacts` of each run saved to the results store next to it
+        ("archive", False),
+        # Directory of the results store, taken from ACTIVE_DEV_PATH when the cerebro is created if None
+        ("results_root", None),
+    )
+
+    # Strategy params which determine the indicators. Optimization combinations sharing them run on the same worker
+    locality_params = ("squeeze_pro_length", "atr_length", "adx_length")
+
     @staticmethod
     def get_id_keys(strategy: BaseStrategy):
         keys = deepcopy(strategy.params._getkwargs())
@@ -43,90 +254,57 @@ class ProgressCerebro(bt.Cerebro):
         keys["frequency"] = str(keys["frequency"])
         return keys
 
-    def get_result_path(self, strategy: BaseStrategy):
-        root = os.path.join(os.getenv("ACTIVE_DEV_PATH", "../"), "10xsqueeze", "results")
-        directory_keys = {
-            "strategy": strategy.strategy_name if hasattr(strategy, "strategy_name") else strategy.__name__,
-            "start": undo_backtrader_dt(self.datas[0]._dataname.reset_index()).open_time.iloc[0],
-            "end": self.datas[0]._dataname.reset_index().open_time.iloc[-1],
-        }
-
-        directory_path = root
-        for key, value in directory_keys.items():
-            directory_path = os.path.join(directory_path, f"{key}_{value}")
-
-        return directory_path
-
-    def get_latest_results_file(self, strategy: BaseStrategy):
-        result_path = self.get_result_path(strategy)
-        # Assumes that the files are named results_1.csv, results_2.csv, etc.
-        existing_files = {k: int(k.split("_")[1].rstrip(".csv")) if "_" in k else 0 for k in os.listdir(result_path)}
-
-        # Filepath is set to the largest number, or results.csv if no files exist
-        file_path = (
-            os.path.join(result_path, max(existing_files, key=existing_files.get))
-            if len(existing_files) > 0
-            else os.path.join(result_path, "results.csv")
-        )
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Holds the data of the parent, which is shared with the workers separately
+        state.pop("_result_range", None)
+        return state
+
+    def __init__(self):
+        super().__init__()
+        # Resolved here rather than in the workers, whose environment is that of the run which started them
+        if self.p.results_root is None:
+            self.p.results_root = self.get_result_root()
 
-        return file_path, existing_files
+    @staticmethod
+    def get_result_root():
+        return os.path.join(os.getenv("ACTIVE_DEV_PATH", "../"), "10xsqueeze", "results")
+
+    @classmethod
+    def get_result_store(cls, root: str = None):
+        return ResultStore.open(os.path.join(root or cls.get_result_root(), "results.sqlite"))
+
+    def get_result_key(self, strategy: BaseStrategy):
+        """Strategy name, start and end of the data of a run, which with its id keys identify it in the results"""
+        dataname = self.datas[0]._dataname
+        if getattr(self, "_result_range", (None,))[0] is not dataname:
+            # The feed data (DataFrame or feeds.FeedArrays) is indexed by the backtrader bar time
+            open_time = dataname.index.to_series()
+            self._result_range = (dataname, undo_backtrader_dt(open_time).iloc[0], open_time.iloc[-1])
+        _, start, end = self._result_range
+        name = strategy.strategy_name if hasattr(strategy, "strategy_name") else strategy.__name__
+        return name, start, end
 
     def pre_strategy(self, strategy: BaseStrategy):
         if strategy.params.use_cache:
-            result_path = self.get_result_path(strategy)
             keys = self.get_id_keys(strategy)
-            os.makedirs(result_path, exist_ok=True)
-            existing_files = {
-                k: int(k.split("_")[1].rstrip(".csv")) if "_" in k else 0 for k in os.listdir(result_path)
-            }
-            for file in existing_files:
-                df = pd.read_csv(os.path.join(result_path, file))
-                df_keys_only = df[[col for col in df.columns if not col[0].isupper()]]
-                this_run_keys = pd.Series(keys)
-                keys_match = df_keys_only.apply(lambda row: this_run_keys.equals(row), axis=1)
-                if keys_match.any():
-                    if strategy.params.cache_logs:
-                        print(f"Skipping {strategy.strategy_name} with {keys} as it already exists")
-
-                    matching_row = df.loc[keys_match].iloc[0]
-                    return matching_row
+            matching_row = self.get_result_store(self.p.results_root).get(*self.get_result_key(strategy), keys)
+            if matching_row is not None:
+                if strategy.params.cache_logs:
+                    print(f"Skipping {strategy.strategy_name} with {keys} as it already exists")
+                return matching_row
 
         return False
 
     def post_strategy(self, strategy: BaseStrategy):
         if strategy.params.use_cache:
-            result_path = self.get_result_path(strategy)
             keys = self.get_id_keys(strategy)
             metrics = strategy.compact_analysis()
-
-            with filelock:
-                os.makedirs(result_path, exist_ok=True)
-
-                file_path, existing_files = self.get_latest_results_file(strategy)
-
-                # Check if a new file needs to be created
-                new_file = len(existing_files) == 0
-
-                # Check if the file already exists
-                if os.path.exists(file_path):
-                    header = pd.read_csv(file_path, nrows=1).columns.tolist()
-                    # Check if the header matches the expected keys and metrics
-                    if header != list(keys.keys()) + list(metrics.keys()):
-                        # Create a new file name if the header doesn't match
-                        file_path = pyutil.unique_file_name(file_path)
-                        new_file = True
-
-                # Open the file in append mode
-                print(f"Saving results to {file_path}")
-                with open(file_path, "a", newline="") as f:
-                    writer = csv.writer(f)
-
-                    # Write the header if it's a new file
-                    if new_file:
-                        writer.writerow(list(keys.keys()) + list(metrics.keys()))
-
-                    # Write the values to the file
-                    writer.writerow(list(keys.values()) + list(metrics.values()))
+            store = self.get_result_store(self.p.results_root)
+            if self.p.archive:
+                # Written by the worker itself, each run has a file of its own
+                store.put_artifacts(*self.get_result_key(strategy), keys, strategy.artifacts())
+            result_sink.put(store, self.get_result_key(strategy), keys, metrics)
 
     def run(self, **kwargs):
         """The core method to perform backtesting. Any ``kwargs`` passed to it
@@ -249,7 +427,17 @@ class ProgressCerebro(bt.Cerebro):
                 if self._dooptimize:
                     for cb in self.optcbs:
                         cb(runstrat)  # callback receives finished strategy
+            result_sink.sync()
         else:
+            # Cache hits are resolved here from the params, only the misses are sent to the pool
+            iterstrats, cached_strats = self.split_cached(list(iterstrats))
+            total_cached = len(cached_strats)
+            progress = tqdm(total=len(iterstrats) + total_cached)
+            progress.update(total_cached)
+            progress.set_postfix(cached=total_cached)
+            if not iterstrats:
+                return cached_strats
+
             if self.p.optdatas and self._dopreload and self._dorunonce:
                 for data in self.datas:
                     data.reset()
@@ -259,25 +447,27 @@ class ProgressCerebro(bt.Cerebro):
                     if self._dopreload:
                         data.preload()
 
-            pool = multiprocessing.Pool(self.p.maxcpus or None)
-            total_cached = 0
-            progress = tqdm(total=len(list(deepcopy(iterstrats))))
-            cached_strats = []
-            for r in pool.imap(self, iterstrats):
-                if isinstance(r[0], pd.Series):
-                    with listlock:
-                        cached_strats.append(r[0])
-                    total_cached += 1
-                    progress.set_postfix(cached=total_cached)
-                else:
-                    for cb in self.optcbs:
-                        cb(r)  # callback receives finished strategy
-                    del r
+            pool = self.p.pool or WorkerPool(self.p.maxcpus or None)
+            chunks = self.locality_chunks(iterstrats, pool.processes or multiprocessing.cpu_count())
+            try:
+                for chunk in pool.imap(self, chunks):
+                    for r in chunk:
+                        if isinstance(r[0], pd.Series):
+                            with listlock:
+                                cached_strats.append(r[0])
+                            total_cached += 1
+                            progress.set_postfix(cached=total_cached)
+                        else:
+                            for cb in self.optcbs:
+                                cb(r)  # callback receives finished strategy
+                        progress.update(1)
+                    del chunk, r
                     gc.collect()
-
-                progress.update(1)
-
-            pool.close()
+            finally:
+                if pool is not self.p.pool:
+                    pool.shutdown()
+                # The workers have sent all their rows by the time their results came back
+                result_sink.sync()
 
             if self.p.optdatas and self._dopreload and self._dorunonce:
                 for data in self.datas:
@@ -291,6 +481,60 @@ class ProgressCerebro(bt.Cerebro):
 
         return self.runstrats
 
+    def split_cached(self, iterstrats: list):
+        """Split the optimization combinations into those to run and the cached results of the others, found from the
+        strategy params without building the strategies. A combination is only skipped if all its strategies are
+        cached.
+
+        Returns the combinations to run and the cached result rows.
+        """
+        store = self.get_result_store(self.p.results_root)
+        torun, cached = [], []
+        for iterstrat in iterstrats:
+            rows = []
+            for stratcls, _, skwargs in iterstrat:
+                params = stratcls.params()
+                for key, val in skwargs.items():
+                    setattr(params, key, val)
+                if not getattr(params, "use_cache", False):
+                    break
+                # `get_id_keys` and `get_result_key` only need the params and the strategy name
+                strategy = OptReturn(params, strategy_name=getattr(stratcls, "strategy_name", stratcls.__name__))
+                row = store.get(*self.get_result_key(strategy), self.get_id_keys(strategy))
+                if row is None:
+                    break
+                rows.append(row)
+            else:
+                cached.extend(rows)
+                continue
+            torun.append(iterstrat)
+        return torun, cached
+
+    def locality_chunks(self, iterstrats: list, workers: int):
+        """Group the optimization combinations by the values of `locality_params` and split the groups into chunks for
+        the pool. A group is only split as far as needed to give every worker about two chunks, so combinations
+        sharing indicators mostly land on the same worker. Chunks are returned largest first.
+        """
+        groups = {}
+        for iterstrat in iterstrats:
+            key = tuple(
+                kwargs.get(name, getattr(stratcls.params, name, None))
+                for stratcls, _, kwargs in iterstrat
+                for name in self.locality_params
+            )
+            groups.setdefault(key, []).append(iterstrat)
+
+        splits = -(-2 * workers // max(len(groups), 1))
+        chunks = []
+        for group in groups.values():
+            size = -(-len(group) // splits)
+            chunks.extend(group[i : i + size] for i in range(0, len(group), size))
+        return sorted(chunks, key=len, reverse=True)
+
+    def run_chunk(self, chunk: list):
+        """Pool task which runs a chunk of optimization combinations in order"""
+        return [self(iterstrat) for iterstrat in chunk]
+
     def runstrategies(self, iterstrat, predata=False):
         """
         Internal method invoked by ``run``` to run a set of strategies
@@ -1,9 +1,17 @@
 from . import BacktraderResult
 from . import backtrader_indicators
 from . import backtrader_indicators as bi
+from . import disk_cache
+from . import feeds
+from . import numpy_indicators
+from . import numpy_indicators as ni
 from . import pandas_indicators
 from . import pandas_indicators as pi
 from . import plotting
+from . import results_store
+from . import simulator
+from . import streaming_indicators
+from . import streaming_indicators as si
 from . import strategies
 from . import strategies as strat
 from . import util
@@ -1,7 +1,68 @@
 """This module contains the 10xsqueeze indicators implemented as backtrader bt.Indicator classes
 """
 
+import array
+
 import backtrader as bt
+import numpy as np
+
+
+def _values(line, start: int, end: int):
+    """Values of a line buffer from `start` to `end` as a float64 array"""
+    return np.array(line.array[start:end], dtype=np.float64)
+
+
+def _set_values(line, start: int, end: int, values):
+    line.array[start:end] = array.array("d", np.asarray(values, dtype=np.float64).tobytes())
+
+
+def _ffill(values: np.ndarray, seed: float):
+    """Fill the NaN values with the last value before them, starting from `seed`"""
+    values = np.r_[seed, values]
+    last = np.maximum.accumulate(np.where(np.isnan(values), 0, np.arange(len(values))))
+    return values[last][1:]
+
+
+def _replay_operations(indicator, start: int):
+    """Recompute from `start` on the line operations the owner of `indicator` created after it
+
+    In runonce mode the operations are evaluated before the run, so they go stale when `indicator` is changed by an event
+    of the run.
+    """
+    siblings = indicator._owner._lineiterators[bt.LineIterator.IndType]
+    position = next(i for i, sibling in enumerate(siblings) if sibling is indicator)
+    for sibling in siblings[position + 1 :]:
+        if isinstance(sibling, bt.LineActions):
+            sibling.once(max(start, sibling._minperiod - 1), sibling.buflen())
+            sibling.oncebinding()
+
+
+def _create(self, cls, datas: tuple, params: dict):
+    # Backtrader makes the nearest `self` in the call stack the owner of a new indicator
+    return cls(*datas, **params)
+
+
+def shared(cls, *datas, **params):
+    """Instance of indicator `cls` on `datas` which is shared by every owner in the strategy asking for the same one
+
+    Instances are registered on the strategy under (class, params, datas), so each series is computed once per feed.
+    Like a direct instantiation, `datas` default to the first data of the caller. The strategy owns the instances, so
+    they are advanced for every bar in runonce mode too, and the callers only take their minperiod into account.
+    """
+    owner = bt.metabase.findowner(None, bt.LineIterator)
+    datas = datas or tuple(owner.datas[: cls._mindatas])
+    params = {**dict(cls.params._getitems()), **params}
+
+    strategy = owner
+    while not isinstance(strategy, bt.Strategy):
+        strategy = strategy._owner
+    registry = strategy.__dict__.setdefault("_shared_indicators", {})
+
+    key = (cls, tuple(params.items()), tuple(id(data) for data in datas))
+    if key not in registry:
+        registry[key] = _create(strategy, cls, datas, params)
+    owner.updateminperiod(registry[key]._minperiod)
+    return registry[key]
 
 
 class RMA(bt.Indicator):
@@ -19,6 +80,23 @@ class RMA(bt.Indicator):
         self.l.rma = bt.ind.ExponentialSmoothing(self.data, period=self.p.period, alpha=1.0 / self.p.period)
 
 
+class SqueezeMomentum(bt.Indicator):
+    """Momentum of the SqueezePro: linear regression of the close relative to the mean of the Donchian midline and the
+    close SMA"""
+
+    lines = ("momentum",)
+    params = (("period", 20),)
+
+    plotinfo = dict(plot=False)
+
+    def __init__(self):
+        highest_high = shared(bt.ind.Highest, self.data.high, period=self.p.period)
+        lowest_low = shared(bt.ind.Lowest, self.data.low, period=self.p.period)
+        sma_close = shared(bt.ind.SMA, self.data.close, period=self.p.period)
+        avg_price = ((highest_high + lowest_low) / 2 + sma_close) / 2
+        self.l.momentum = bt.talib.LINEARREG(self.data.close - avg_price, timeperiod=self.p.period)
+
+
 class SqueezePro(bt.Indicator):
     """SqueezePro by SimplerTrading - https://intercom.help/simpler-trading/en/articles/3186315-about-squeeze-pro
 
@@ -33,8 +111,8 @@ class SqueezePro(bt.Indicator):
         "kc_upper_low",
         "kc_lower_low",
         "kc_upper_mid",
-        "kc_upper_mid",
-        "kc_lower_high",
+        "kc_lower_mid",
+        "kc_upper_high",
         "kc_lower_high",
         "kc_basis",
         "squeeze_status",
@@ -62,13 +140,13 @@ class SqueezePro(bt.Indicator):
     }
 
     def __init__(self):
-        bb = bt.ind.BollingerBands(self.data.close, period=self.p.bb_length, devfactor=self.p.bb_mult)
+        bb = shared(bt.ind.BollingerBands, self.data.close, period=self.p.bb_length, devfactor=self.p.bb_mult)
         self.l.bb_upper = bb.top
         self.l.bb_basis = bb.mid
         self.l.bb_lower = bb.bot
 
-        devkc = bt.ind.AverageTrueRange(period=self.p.atr_length, movav=RMA)
-        self.l.kc_basis = bt.ind.SMA(period=self.p.kc_length)
+        devkc = shared(bt.ind.AverageTrueRange, period=self.p.atr_length, movav=RMA)
+        self.l.kc_basis = shared(bt.ind.SMA, self.data.close, period=self.p.kc_length)
 
         self.l.kc_upper_low = self.l.kc_basis + self.p.kc_mult_low * devkc
         self.l.kc_upper_mid = self.l.kc_basis + self.p.kc_mult_mid * devkc
@@ -95,11 +173,7 @@ class SqueezePro(bt.Indicator):
             ),
         )
 
-        highest_high = bt.ind.Highest(self.data.high, period=self.p.mom_length)
-        lowest_low = bt.ind.Lowest(self.data.low, period=self.p.mom_length)
-        sma_close = bt.ind.SMA(self.data.close, period=self.p.mom_length)
-        avg_price = ((highest_high + lowest_low) / 2 + sma_close) / 2
-        self.l.momentum = bt.talib.LINEARREG(self.data.close - avg_price, timeperiod=self.p.mom_length)
+        self.l.momentum = shared(SqueezeMomentum, period=self.p.mom_length)
 
 
 class TenXBars(bt.Indicator):
@@ -122,7 +196,7 @@ class TenXBars(bt.Indicator):
     plotinfo = dict(plot=False)
 
     def __init__(self):
-        dm = bt.ind.DirectionalMovementIndex(period=self.p.dir_length, movav=RMA)
+        dm = shared(bt.ind.DirectionalMovementIndex, period=self.p.dir_length, movav=RMA)
 
         self.l.adx = dm.adx
         self.l.plus = dm.plusDI
@@ -133,10 +207,93 @@ class TenXBars(bt.Indicator):
         self.l.sideways = self.l.adx < self.p.adx_thresh
 
 
+class FeedLine(bt.Indicator):
+    """Line precomputed on the data feed (see `feeds.indicator_lines`)
+
+    The value of the newest tick is read, so the line follows the bar being built when the feed is replayed. `minperiod`
+    should match the indicator that was precomputed so the owner warms up on the same bar. If `values` is given, it
+    holds the line for every tick of the feed's arrays (see `feeds.ArrayData.memo_lines`) and is read instead of the
+    feed.
+    """
+
+    lines = ("line",)
+    params = (
+        ("name", None),
+        ("minperiod", 1),
+        ("values", None),
+    )
+
+    plotinfo = dict(plot=False)
+
+    def __init__(self):
+        self.addminperiod(self.p.minperiod)
+        self._tick_name = f"tick_{self.p.name}"
+
+    def next(self):
+        if self.p.values is not None:
+            self.l.line[0] = self.p.values[self.data._tick_index()]
+        else:
+            self.l.line[0] = getattr(self.data, self._tick_name)
+
+    def once(self, start, end):
+        # Without replay the newest tick is the bar itself
+        if self.p.values is not None:
+            _set_values(self.l.line, start, end, self.p.values[start:end])
+        else:
+            self.l.line.array[start:end] = getattr(self.data.lines, self.p.name).array[start:end]
+
+
+class PrecomputedSqueezePro(bt.Indicator):
+    """`SqueezePro` squeeze status and momentum read from lines precomputed on the data feed, or from `memo` (a dict of
+    `feeds.indicator_lines` arrays) if given"""
+
+    lines = ("squeeze_status", "momentum")
+    params = (
+        ("length", 20),
+        ("atr_length", 10),
+        ("memo", None),
+    )
+
+    plotinfo = dict(plot=False)
+
+    def __init__(self):
+        memo = self.p.memo or {}
+        status = f"squeeze_status_{self.p.length}_{self.p.atr_length}"
+        momentum = f"momentum_{self.p.length}"
+        self.l.squeeze_status = FeedLine(
+            self.data, name=status, minperiod=max(self.p.length, self.p.atr_length + 1), values=memo.get(status)
+        )
+        self.l.momentum = FeedLine(
+            self.data, name=momentum, minperiod=2 * self.p.length - 1, values=memo.get(momentum)
+        )
+
+
+class PrecomputedTenXBars(bt.Indicator):
+    """`TenXBars` read from lines precomputed on the data feed, or from `memo` if given"""
+
+    lines = ("adx", "plus", "minus", "d_up", "d_down", "sideways")
+    params = (
+        ("dir_length", 14),
+        ("memo", None),
+    )
+
+    plotinfo = dict(plot=False)
+
+    def __init__(self):
+        memo = self.p.memo or {}
+        for line in self.lines.getlinealiases():
+            name = f"{line}_{self.p.dir_length}"
+            setattr(
+                self.l, line, FeedLine(self.data, name=name, minperiod=2 * self.p.dir_length, values=memo.get(name))
+            )
+
+
 class MomentumReversal(bt.Indicator):
     """Indicator which determines if the momentum is good or bad based on the rate of change of the momentum
     
     The indicator is true when the momentum crosses 0 and stays true until the momentum decreases for two consecutive bars.
+
+    In runonce mode the whole line is computed before the run and each `force_off` replays the bars after it.
     """
 
     lines = ("good_momentum", "momentum")
@@ -144,6 +301,7 @@ class MomentumReversal(bt.Indicator):
     params = (
         ("period", 20),
         ("cooldown", 1),
+        ("memo", None),
     )
 
     plotinfo = dict(plot=False)
@@ -151,12 +309,16 @@ class MomentumReversal(bt.Indicator):
     def __init__(self):
         self._force_off = False
         self._bar_ref = -1
+        self._once_end = None
         self.addminperiod(self.params.period)
-        highest_high = bt.ind.Highest(self.data.high, period=self.p.period)
-        lowest_low = bt.ind.Lowest(self.data.low, period=self.p.period)
-        sma_close = bt.ind.SMA(self.data.close, period=self.p.period)
-        avg_price = ((highest_high + lowest_low) / 2 + sma_close) / 2
-        self.l.momentum = bt.talib.LINEARREG(self.data.close - avg_price, timeperiod=self.p.period)
+        momentum = f"momentum_{self.p.period}"
+        if momentum in self.data.getlinealiases() or self.p.memo is not None:
+            # Momentum was precomputed on the feed or memoized
+            values = self.p.memo[momentum] if self.p.memo is not None else None
+            self.l.momentum = FeedLine(self.data, name=momentum, minperiod=2 * self.p.period - 1, values=values)
+            return
+
+        self.l.momentum = shared(SqueezeMomentum, period=self.p.period)
 
     def next(self):
         current_val = abs(self.l.momentum[0])
@@ -182,6 +344,27 @@ class MomentumReversal(bt.Indicator):
         else:
             self.l.good_momentum[0] = self.l.good_momentum[-1]
 
+    def _conditions(self, start: int, end: int):
+        """Zero cross and two bar decrease conditions of `next` for the bars from `start` to `end`"""
+        cooldown = self.p.cooldown
+        pad = cooldown + 2
+        momentum = np.r_[np.full(pad, np.nan), _values(self.l.momentum, 0, end)]
+        i = np.arange(start, end) + pad
+        cross = momentum[i - cooldown] * momentum[i - 1 - cooldown] <= 0
+        current_val, prev_val, prev_prev_val = (np.abs(momentum[i - ago]) for ago in range(3))
+        return cross, (current_val < prev_val) & (prev_val < prev_prev_val)
+
+    def _fill(self, start: int, end: int):
+        """Evaluate `next` from `start` to `end` when no force off is pending"""
+        cross, decreasing = self._conditions(start, end)
+        good_momentum = np.where(cross, 1.0, np.where(decreasing, 0.0, np.nan))
+        seed = self.l.good_momentum.array[start - 1] if start > 0 else np.nan
+        _set_values(self.l.good_momentum, start, end, _ffill(good_momentum, seed))
+
+    def once(self, start, end):
+        self._once_end = end
+        self._fill(start, end)
+
     def force_off(self):
         # Force indicator back to 0
         self._owner.log("Forcing good momentum to 0")
@@ -189,19 +372,61 @@ class MomentumReversal(bt.Indicator):
         self._bar_ref = len(self)
         self.l.good_momentum[0] = 0
 
+        if self._once_end is not None:
+            # The bars ahead were computed without the force off. They stay 0 until the momentum crosses 0 again
+            start, end = len(self), self._once_end
+            resets = np.flatnonzero(self._conditions(start, end)[0])
+            reset = start + resets[0] if len(resets) > 0 else end
+            _set_values(self.l.good_momentum, start, reset, np.zeros(reset - start))
+            if reset < end:
+                self._force_off = False
+                self.l.good_momentum.array[reset] = 1
+                self._fill(reset + 1, end)
+
 
 class Position(bt.Indicator):
-    """Indicator to track the current position size and price"""
+    """Indicator to track the current position size and price
+
+    In runonce mode the indicators are computed before the run, but the position is only known as the run progresses.
+    The owner then calls `update` whenever its position changes and `replay_operations` once the run is over, so the
+    line operations built on this indicator are brought up to date in one pass.
+    """
 
     lines = ("size", "price")
 
-    def next(self):
+    def __init__(self):
+        self._once_end = None
+        self._updated_from = None
+
+    def _current(self):
         if self._owner.position:
-            self.l.size[0] = self._owner.position.size
-            self.l.price[0] = self._owner.position.price
-        else:
-            self.l.size[0] = bt.NAN
-            self.l.price[0] = bt.NAN
+            return self._owner.position.size, self._owner.position.price
+        return bt.NAN, bt.NAN
+
+    def next(self):
+        self.l.size[0], self.l.price[0] = self._current()
+
+    def once(self, start, end):
+        # Flat until `update` carries the positions taken during the run
+        self._once_end = end
+        for line in self.lines:
+            _set_values(line, start, end, np.full(end - start, np.nan))
+
+    def update(self):
+        """Carry the current position over the remaining bars. Only needed in runonce mode"""
+        if self._once_end is None:
+            return
+
+        start = len(self) - 1
+        for line, value in zip(self.lines, self._current()):
+            _set_values(line, start, self._once_end, np.full(self._once_end - start, value))
+        if self._updated_from is None:
+            self._updated_from = start
+
+    def replay_operations(self):
+        """Recompute the owner's line operations on this indicator from the first `update` on"""
+        if self._updated_from is not None:
+            _replay_operations(self, self._updated_from)
 
 
 class PStackedEMA(bt.Indicator):
@@ -219,12 +444,12 @@ class PStackedEMA(bt.Indicator):
     )
 
     def __init__(self):
-        ema1 = bt.ind.ExponentialMovingAverage(period=self.p.ema1_length)
-        ema2 = bt.ind.ExponentialMovingAverage(period=self.p.ema2_length)
-        ema3 = bt.ind.ExponentialMovingAverage(period=self.p.ema3_length)
-        ema4 = bt.ind.ExponentialMovingAverage(period=self.p.ema4_length)
-        ema5 = bt.ind.ExponentialMovingAverage(period=self.p.ema5_length)
-        ema6 = bt.ind.ExponentialMovingAverage(period=self.p.ema6_length)
+        ema1 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema1_length)
+        ema2 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema2_length)
+        ema3 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema3_length)
+        ema4 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema4_length)
+        ema5 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema5_length)
+        ema6 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema6_length)
         self.l.signal = bt.And(ema1 > ema2, ema2 > ema3, ema3 > ema4, ema4 > ema5, ema5 > ema6)
 
 
@@ -243,12 +468,12 @@ class NStackedEMA(bt.Indicator):
     )
 
     def __init__(self):
-        ema1 = bt.ind.ExponentialMovingAverage(period=self.p.ema1_length)
-        ema2 = bt.ind.ExponentialMovingAverage(period=self.p.ema2_length)
-        ema3 = bt.ind.ExponentialMovingAverage(period=self.p.ema3_length)
-        ema4 = bt.ind.ExponentialMovingAverage(period=self.p.ema4_length)
-        ema5 = bt.ind.ExponentialMovingAverage(period=self.p.ema5_length)
-        ema6 = bt.ind.ExponentialMovingAverage(period=self.p.ema6_length)
+        ema1 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema1_length)
+        ema2 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema2_length)
+        ema3 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema3_length)
+        ema4 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema4_length)
+        ema5 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema5_length)
+        ema6 = shared(bt.ind.ExponentialMovingAverage, period=self.p.ema6_length)
         self.l.signal = bt.And(ema1 < ema2, ema2 < ema3, ema3 < ema4, ema4 < ema5, ema5 < ema6)
 
 
@@ -264,8 +489,8 @@ class WithinKC(bt.Indicator):
     )
 
     def __init__(self):
-        devkc = bt.ind.AverageTrueRange(period=self.p.atr_length, movav=RMA)
-        self.l.kc_basis = bt.ind.SMA(period=self.p.kc_length)
+        devkc = shared(bt.ind.AverageTrueRange, period=self.p.atr_length, movav=RMA)
+        self.l.kc_basis = shared(bt.ind.SMA, self.data.close, period=self.p.kc_length)
         self.l.kc_lower = self.l.kc_basis - self.p.kc_mult * devkc
         self.l.kc_upper = self.l.kc_basis + self.p.kc_mult * devkc
 
@@ -285,8 +510,8 @@ class Big3(bt.Indicator):
     lines = ("signal", "squeeze_status", "bullish_trend", "bearish_trend", "in_kc", "lkc_u", "lkc_l", "mkc_u", "mkc_l")
 
     def __init__(self):
-        sp = SqueezePro()
-        dm = bt.ind.DirectionalMovementIndex(period=14, movav=RMA)
+        sp = shared(SqueezePro)
+        dm = shared(bt.ind.DirectionalMovementIndex, period=14, movav=RMA)
         p_stack_ema = PStackedEMA()
         n_stack_ema = NStackedEMA()
         self.l.squeeze_status = sp.l.squeeze_status
@@ -298,6 +523,16 @@ class Big3(bt.Indicator):
         self.l.bearish_trend = bt.And(dm.l.adx > 20, dm.l.plusDI < dm.l.minusDI, n_stack_ema)
         self.l.in_kc = bt.And(self.data.close >= sp.l.kc_lower_high, self.data.close <= sp.l.kc_upper_high)
 
+    def once(self, start, end):
+        bullish, bearish, status = (
+            _values(line, start, end) for line in [self.l.bullish_trend, self.l.bearish_trend, self.l.squeeze_status]
+        )
+        # Same precedence as `next`, where a NaN trend is truthy
+        bullish = bullish != 0
+        bearish = (bearish != 0) & ~bullish
+        strength = np.select([status == 3, status == 2], [2.0, 1.0], default=0.0)
+        _set_values(self.l.signal, start, end, np.where(bullish, strength, 0.0) - np.where(bearish, strength, 0.0))
+
     def next(self):
         if self.l.bullish_trend[0]:
             if self.l.squeeze_status[0] == 3:
@@ -0,0 +1,279 @@
+"""This module contains a content-addressed disk cache for computed indicator and signal frames
+
+Results are keyed by a hash of the input data and parameters and stored as .npy files which are memory-mapped when
+read back. The cache is bounded in size and evicts the least recently used entries first.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+
+class DiskCache:
+    """Size-bounded LRU cache of pandas/numpy results on disk
+
+    Each entry is a directory named by its key holding one .npy file per array and a `spec.json` describing how to
+    rebuild the original (possibly nested) result. The cache is disabled while `path` is None.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = 2 * 1024**3):
+        self.path = path
+        self.max_bytes = max_bytes
+        # Size of the cache as last seen by this process. Entries written by other processes are only picked up by the
+        # next eviction scan, so the limit can be overshot by what other processes wrote in the meantime.
+        self._size = None
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    @staticmethod
+    def _update_hash(h, value):
+        if isinstance(value, pd.DataFrame):
+            h.update(repr(list(value.columns)).encode())
+            DiskCache._update_hash(h, value.index)
+            for col in value.columns:
+                DiskCache._update_hash(h, value[col].values)
+        elif isinstance(value, (pd.Series, pd.Index)):
+            h.update(repr(value.name).encode())
+            if isinstance(value, pd.Series):
+                DiskCache._update_hash(h, value.index)
+            DiskCache._update_hash(h, value.values)
+        elif isinstance(value, np.ndarray):
+            value = value.astype(str) if value.dtype == object else value
+            h.update(f"{value.dtype}{value.shape}".encode())
+            h.update(np.ascontiguousarray(value).reshape(-1).view(np.uint8))
+        elif isinstance(value, dict):
+            for k, v in value.items():
+                h.update(repr(k).encode())
+                DiskCache._update_hash(h, v)
+        elif isinstance(value, (list, tuple)):
+            h.update(type(value).__name__.encode())
+            for v in value:
+                DiskCache._update_hash(h, v)
+        else:
+            h.update(repr(value).encode())
+
+    @staticmethod
+    def _update_code_hash(h, func, seen: set):
+        """Hash the bytecode, constants and defaults of `func` and of the functions, classes and constants of its
+        package it refers to, directly or through a module of the package"""
+        func = inspect.unwrap(func)
+        if func in seen:
+            return
+        seen.add(func)
+
+        package = func.__module__.split(".")[0]
+        h.update(f"{func.__module__}.{func.__qualname__}".encode())
+        DiskCache._update_hash(h, (func.__defaults__, func.__kwdefaults__))
+
+        codes = [func.__code__]
+        while codes:
+            code = codes.pop()
+            h.update(code.co_code)
+            for const in code.co_consts:
+                if inspect.iscode(const):
+                    # Nested functions, lambdas and comprehensions
+                    codes.append(const)
+                elif isinstance(const, frozenset):
+                    # The order of a set changes with the hash seed of the process
+                    h.update(repr(sorted(map(repr, const))).encode())
+                else:
+                    h.update(repr(const).encode())
+
+            namespaces = [func.__globals__]
+            for name in code.co_names:
+                value = func.__globals__.get(name)
+                if inspect.ismodule(value) and value.__name__.split(".")[0] == package:
+                    namespaces.append(vars(value))
+
+            for name in code.co_names:
+                for namespace in namespaces:
+                    value = namespace.get(name)
+                    if getattr(value, "__module__", None) is None:
+                        if isinstance(value, (dict, list, tuple, int, float, str)):
+                            # Module level constant
+                            h.update(name.encode())
+                            DiskCache._update_hash(h, value)
+                    elif value.__module__.split(".")[0] != package:
+                        continue
+                    elif inspect.isfunction(value):
+                        DiskCache._update_code_hash(h, value, seen)
+                    elif inspect.isclass(value):
+                        h.update(name.encode())
+                        DiskCache._update_hash(
+                            h, {k: v for k, v in vars(value).items() if isinstance(v, (int, float, str))}
+                        )
+
+    def key(self, func, arguments: dict, version=None):
+        """Hash of the function (including the code of the helpers it calls) and its bound arguments"""
+        h = hashlib.blake2b(digest_size=16)
+        self._update_code_hash(h, func, set())
+        h.update(repr(version).encode())
+        for name, value in arguments.items():
+            h.update(name.encode())
+            self._update_hash(h, value)
+        return h.hexdigest()
+
+    @staticmethod
+    def _encode(value, arrays: dict):
+        """Flatten `value` into `arrays` and return a json description of its structure"""
+
+        def add(array):
+            name = f"a{len(arrays)}"
+            array = np.asarray(array)
+            # Object arrays can't be memory-mapped, strings are stored as fixed width unicode instead
+            arrays[name] = array.astype(str) if array.dtype == object else array
+            return {"array": name, "object": bool(array.dtype == object)}
+
+        def add_index(index):
+            tz = str(index.tz) if isinstance(index, pd.DatetimeIndex) and index.tz is not None else None
+            values = index.tz_convert(None).values if tz is not None else index.values
+            return {**add(values), "name": index.name, "tz": tz}
+
+        if isinstance(value, pd.DataFrame):
+            return {
+                "frame": [[col, DiskCache._encode(value[col].values, arrays)] for col in value.columns],
+                "index": add_index(value.index),
+            }
+        elif isinstance(value, pd.Series):
+            return {"series": add(value.values), "index": add_index(value.index), "name": value.name}
+        elif isinstance(value, tuple):
+            return {"tuple": [DiskCache._encode(v, arrays) for v in value]}
+        elif isinstance(value, dict):
+            return {"dict": [[k, DiskCache._encode(v, arrays)] for k, v in value.items()]}
+        else:
+            return add(value)
+
+    @staticmethod
+    def _decode(spec: dict, arrays: dict):
+        def get(spec):
+            array = arrays[spec["array"]]
+            return array.astype(object) if spec["object"] else array
+
+        def get_index(spec):
+            index = pd.Index(get(spec), name=spec["name"], copy=False)
+            return index.tz_localize("UTC").tz_convert(spec["tz"]) if spec["tz"] is not None else index
+
+        if "frame" in spec:
+            return pd.DataFrame(
+                {col: DiskCache._decode(s, arrays) for col, s in spec["frame"]}, index=get_index(spec["index"])
+            )
+        elif "series" in spec:
+            return pd.Series(get(spec["series"]), index=get_index(spec["index"]), name=spec["name"], copy=False)
+        elif "tuple" in spec:
+            return tuple(DiskCache._decode(s, arrays) for s in spec["tuple"])
+        elif "dict" in spec:
+            return {k: DiskCache._decode(s, arrays) for k, s in spec["dict"]}
+        else:
+            return get(spec)
+
+    def get(self, key: str):
+        """Return the cached result for `key` with its arrays memory-mapped (read-only), or None on a miss"""
+        entry = os.path.join(self.path, key)
+        try:
+            with open(os.path.join(entry, "spec.json")) as f:
+                spec = json.load(f)
+            arrays = {
+                name[:-4]: np.load(os.path.join(entry, name), mmap_mode="r").view(np.ndarray)
+                for name in os.listdir(entry)
+                if name.endswith(".npy")
+            }
+            # Mark the entry as recently used
+            os.utime(entry)
+            return self._decode(spec, arrays)
+        except (KeyError, OSError):
+            # Missing, or partly removed by a concurrent eviction
+            return None
+
+    def put(self, key: str, value):
+        """Store `value` under `key` and evict the least recently used entries beyond `max_bytes`"""
+        arrays = {}
+        spec = self._encode(value, arrays)
+
+        # Write to a temporary directory first so concurrent readers never see a partial entry
+        os.makedirs(self.path, exist_ok=True)
+        tmp = os.path.join(self.path, f".tmp_{uuid.uuid4().hex}")
+        os.makedirs(tmp)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), array, allow_pickle=False)
+        with open(os.path.join(tmp, "spec.json"), "w") as f:
+            json.dump(spec, f)
+
+        try:
+            os.rename(tmp, os.path.join(self.path, key))
+        except OSError:
+            # Another process stored the same key first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        if self._size is None:
+            self.evict()
+        else:
+            self._size += sum(array.nbytes for array in arrays.values())
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries until the cache fits in `max_bytes`"""
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.is_dir() and not entry.name.startswith("."):
+                try:
+                    size = sum(f.stat().st_size for f in os.scandir(entry.path))
+                    entries.append((entry.stat().st_mtime, size, entry.path))
+                except FileNotFoundError:
+                    # Evicted by another process
+                    continue
+
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if self._size <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            self._size -= size
+
+    def clear(self):
+        if self.enabled:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._size = None
+
+
+# Shared cache for the indicator functions, enabled by setting TENXSQUEEZE_INDICATOR_CACHE to a directory
+indicator_cache = DiskCache(os.getenv("TENXSQUEEZE_INDICATOR_CACHE"))
+
+
+def memoize(cache: DiskCache, version=None):
+    """Decorator which caches the results of a function in `cache`, keyed by the content of its arguments
+
+    The key covers the code of the function and of the helpers of the package it calls, but not the libraries it calls.
+    Change `version` to invalidate the cached results when their behaviour changes.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not cache.enabled:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = cache.key(func, bound.arguments, version)
+
+            ret = cache.get(key)
+            if ret is None:
+                ret = func(*args, **kwargs)
+                cache.put(key, ret)
+            return ret
+
+        return wrapper
+
+    return decorator
@@ -11,7 +11,7 @@ from pyutil.cache import cached
 import cryptomart as cm
 import tenxsqueeze as txs
 
-from .ProgressCerebro import ProgressCerebro
+from .ProgressCerebro import ProgressCerebro, WorkerPool
 
 load_dotenv()
 
@@ -75,9 +75,55 @@ class Driver:
 
         indicator_timedelta = mapping[indicator_interval]
 
+        self.replay_timedelta = indicator_timedelta
         self.replay_compression = int(indicator_timedelta / granular_timedelta)
         self.frequency = self.granular_compression * granular_timedelta
 
+        # gran_data prepared for backtrader, see get_feed_arrays
+        self._feed_arrays = None
+        self._feed_source = None
+        self._intrabar_arrays = None
+        self._intrabar_source = None
+        self._simulator = None
+        # Optimization workers kept across runs, see start_pool
+        self._pool = None
+
+    def get_feed_arrays(self):
+        """`gran_data` with backtrader bar times as a `feeds.FeedArrays`, built once and reused by every run"""
+        if self._feed_source is not self.gran_data:
+            dataname = txs.util.fix_dt_for_backtrader(self.gran_data).set_index("open_time")
+            self._feed_arrays = txs.feeds.FeedArrays.from_frame(dataname)
+            self._feed_source = self.gran_data
+            if self._pool is not None:
+                self._pool.invalidate()
+        return self._feed_arrays
+
+    def get_intrabar_arrays(self):
+        """`get_feed_arrays` replayed into the indicator interval as a `feeds.IntrabarArrays`, built once and reused by
+        every run"""
+        feed_arrays = self.get_feed_arrays()
+        if self._intrabar_source is not feed_arrays:
+            self._intrabar_arrays = txs.feeds.IntrabarArrays.from_ticks(feed_arrays, self.replay_timedelta)
+            self._intrabar_source = feed_arrays
+        return self._intrabar_arrays
+
+    def start_pool(self, processes: int = None):
+        """Keep a `ProgressCerebro.WorkerPool` of `processes` workers (`os.cpu_count()` if None) for the optimizations
+        of later `run` calls
+
+        The workers stay warm between runs and the data is shipped to them once. The data is invalidated when
+        `gran_data` changes. Call `shutdown_pool` once done.
+        """
+        if self._pool is None:
+            self._pool = WorkerPool(processes)
+        return self._pool
+
+    def shutdown_pool(self):
+        """Stop the workers started by `start_pool` and free the data shared with them"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
     def run(
         self,
         logging=False,
@@ -94,6 +140,10 @@ class Driver:
         tp_atr_multiplier: float = 2.3,
         max_trade_duration: int = 9,
         use_good_momentum: bool = True,
+        precompute_indicators: bool = False,
+        intrabar_replay: bool = False,
+        memo_indicators: bool = False,
+        archive: bool = False,
         run: bool = True,
     ):
         """Run the tenxsqueeze backtest
@@ -102,9 +152,9 @@ class Driver:
             logging: Save action/trade logs to `log_file`. Defaults to False.
             progress_bar: If True, shows a progress bar while the backtest is running. Defaults to False.
             log_file: File to save logs to if `logging` is True. Defaults to "log.txt".
-            use_cache: If True, saves backtest metrics to a csv file. Defaults to True.
+            use_cache: If True, saves backtest metrics to the results store. Defaults to True.
             cache_logs: If True, skips backtest runs for which the parameters already exist as keys
-                in the results csv file. Defaults to False.
+                in the results store. Defaults to False.
             squeeze_pro_length: Window length for the SqueezePro indicator. Defaults to 20.
             atr_length: Window length for the ATR of the SqueezePro. Defaults to 10.
             adx_length: Window length for the ADX of the 10X Bars. Defaults to 14.
@@ -114,21 +164,61 @@ class Driver:
             tp_atr_multiplier: Number of ATR's to use as the takeprofit target. Defaults to 2.3.
             max_trade_duration: Max number of bars to hold position before force closing. Defaults to 9.
             use_good_momentum: If True, momentum must reset before a trade can be made. Defaults to True.
+            precompute_indicators: If True, the stateless indicators are computed up front for every replayed tick and
+                carried on the data feed instead of being evaluated bar by bar. Defaults to False.
+            intrabar_replay: If True, the replayed bars are served from arrays built once per Driver instead of being
+                rebuilt from the granular feed by `cerebro.replaydata` on every run. The strategy sees the same bars
+                and orders are still matched against the granular ticks. Defaults to False.
+            memo_indicators: If True, the stateless indicators of each set of lengths are computed once per process and
+                reused by every later run with the same data and lengths, including the other combinations handled by
+                the same sweep worker. Ignored when `precompute_indicators` is True. Defaults to False.
+            archive: If True, the entries, exits, trades, equity curve and returns of each run are archived next to
+                the results store, see `load_artifacts`. Trades are recorded even without `logging`. Requires
+                `use_cache`. Defaults to False.
             run: If False, returns the configured strategy instance without running it. Defaults to True.
 
         Returns:
             The backtest results as a pandas DataFrame if `run` is True, otherwise the configured strategy instance.
         """
-        cerebro = ProgressCerebro()
+        if archive and not use_cache:
+            raise ValueError("archive requires use_cache, the artifacts are stored with the results of the runs")
 
-        granular = bt.feeds.PandasData(
-            dataname=txs.util.fix_dt_for_backtrader(self.gran_data).set_index("open_time"),
-            name=f"{self.exchange}_{self.symbol}_{self.granular_label})",
-            timeframe=self.granular_timeframe,
-            compression=self.granular_compression,
-        )
+        cerebro = ProgressCerebro(memo_indicators=memo_indicators, pool=self._pool, archive=archive)
 
-        cerebro.replaydata(granular, timeframe=self.granular_timeframe, compression=self.replay_compression)
+        dataname = self.get_feed_arrays()
+        feed_cls = txs.feeds.ArrayData
+        if precompute_indicators:
+            lines = txs.feeds.indicator_lines(
+                dataname.to_frame(),
+                self.replay_timedelta,
+                squeeze_pro_length=squeeze_pro_length,
+                atr_length=atr_length,
+                adx_length=adx_length,
+            )
+        if intrabar_replay:
+            dataname = self.get_intrabar_arrays()
+            feed_cls = txs.feeds.IntrabarData
+        if precompute_indicators:
+            dataname = dataname.join(lines)
+            feed_cls = txs.feeds.indicator_data_class(lines.columns, base=feed_cls)
+
+        if intrabar_replay:
+            # The feed delivers the replayed bars itself
+            granular = feed_cls(
+                dataname=dataname,
+                name=f"{self.exchange}_{self.symbol}_{self.granular_label})",
+                timeframe=self.granular_timeframe,
+                compression=self.replay_compression,
+            )
+            cerebro.adddata(granular)
+        else:
+            granular = feed_cls(
+                dataname=dataname,
+                name=f"{self.exchange}_{self.symbol}_{self.granular_label})",
+                timeframe=self.granular_timeframe,
+                compression=self.granular_compression,
+            )
+            cerebro.replaydata(granular, timeframe=self.granular_timeframe, compression=self.replay_compression)
 
         strategy_params = dict(
             logging=logging,
@@ -149,7 +239,7 @@ class Driver:
         )
 
         if any(isinstance(x, list) for x in strategy_params.values()):
-            # Multi-run, use multiple cores to run in parallel
+            # Multi-run, use multiple cores to run in parallel (the workers of start_pool if started)
             cerebro.optstrategy(
                 txs.TenXSqueeze,
                 **strategy_params,
@@ -182,5 +272,60 @@ class Driver:
             else (ret[0] if len(ret) > 0 else ret)
         )
 
-    def load_results(self, path=None):
-        return pd.read_csv(path)
+    def simulate(
+        self,
+        progress_bar=False,
+        squeeze_pro_length: int = 20,
+        atr_length: int = 10,
+        adx_length: int = 14,
+        tp_trail_percent: float = 0.4,
+        sl_trail_percent: float = 0.7,
+        percent_is_atr: bool = True,
+        tp_atr_multiplier: float = 2.3,
+        max_trade_duration: int = 9,
+        use_good_momentum: bool = True,
+    ):
+        """Run the tenxsqueeze backtest on the array simulator instead of backtrader
+
+        Takes the strategy parameters of `run`, any of which may be a list to sweep over. The simulator reproduces the
+        broker and analyzers `run` sets up and is reused by later calls, so the indicator lines of a sweep are computed
+        once.
+
+        Returns:
+            A `simulator.SimulationResult` for a single run, or a DataFrame with the parameters and the
+            `compact_analysis` metrics of every combination.
+        """
+        params = dict(
+            squeeze_pro_length=squeeze_pro_length,
+            atr_length=atr_length,
+            adx_length=adx_length,
+            tp_trail_percent=tp_trail_percent,
+            sl_trail_percent=sl_trail_percent,
+            percent_is_atr=percent_is_atr,
+            tp_atr_multiplier=tp_atr_multiplier,
+            max_trade_duration=max_trade_duration,
+            use_good_momentum=use_good_momentum,
+        )
+
+        intrabar = self.get_intrabar_arrays()
+        if self._simulator is None or self._simulator.intrabar is not intrabar:
+            self._simulator = txs.simulator.TenXSqueezeSimulator(intrabar)
+
+        if any(isinstance(x, list) for x in params.values()):
+            return self._simulator.sweep(progress_bar=progress_bar, **params)
+        return self._simulator.run(**params)
+
+    def load_results(self, path=None, columns=None, **filters):
+        """Load backtest results from the results store, see `results_store.ResultStore.load` for `columns` and
+        `filters`. `path` is the store to read, the one `run` writes to by default, or a results csv file of the
+        previous versions."""
+        if path is not None and path.endswith(".csv"):
+            return pd.read_csv(path, usecols=columns)
+        store = txs.results_store.ResultStore.open(path) if path else ProgressCerebro.get_result_store()
+        return store.load(columns, **filters)
+
+    def load_artifacts(self, row: pd.Series, path=None):
+        """Artifacts archived by `run(archive=True)` for a row of `load_results`, or None if the run was not
+        archived. Plot them with `plotting.plot_archived_run`."""
+        store = txs.results_store.ResultStore.open(path) if path else ProgressCerebro.get_result_store()
+        return store.get_artifacts(row["strategy"], row["start"], row["end"], row["params_hash"])
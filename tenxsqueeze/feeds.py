@@ -0,0 +1,569 @@
+"""This module contains array-backed backtrader data feeds and the indicator lines they can carry for replayed bars
+
+`ArrayData` serves bars from the contiguous column arrays of a `FeedArrays` by integer cursor, which is much cheaper
+than the row-by-row pandas indexing of `bt.feeds.PandasData`. The arrays are prepared once and may be memory-mapped.
+`IntrabarData` likewise serves the bars `cerebro.replaydata` would build from a tick feed, from an `IntrabarArrays`
+computed once instead of on every run.
+
+When a feed is replayed into a larger timeframe, backtrader evaluates every indicator on each tick against the bar being
+built, i.e. on the completed bars followed by the partial bar seen so far. `indicator_lines` computes those values for
+every tick in one vectorized pass, so a strategy can read them from the feed (see `backtrader_indicators.FeedLine`)
+instead of running the indicators bar by bar. The values mirror `backtrader_indicators`, including the SMA seeding of
+the backtrader moving averages, rather than `pandas_indicators`.
+"""
+
+import collections
+import hashlib
+import json
+import os
+import sys
+from multiprocessing import shared_memory
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+
+from .numpy_indicators import _linreg_weights
+
+
+class FeedArrays:
+    """Contiguous column arrays of a bar feed, as served by `ArrayData`
+
+    `index` holds the bar times, `datetime` their backtrader date numbers and `columns` one float64 array per line.
+    The arrays can be saved to a directory of .npy files and memory-mapped back with `load`, or copied into shared
+    memory with `share` to hand them to worker processes.
+    """
+
+    def __init__(self, index: pd.DatetimeIndex, columns: dict, datetime: np.ndarray = None):
+        self.index = index
+        self.columns = {col: np.ascontiguousarray(values, dtype=np.float64) for col, values in columns.items()}
+        if datetime is None:
+            datetime = np.array([bt.date2num(dt) for dt in index.to_pydatetime()], dtype=np.float64)
+        self.datetime = datetime
+        self._fingerprint = None
+        self._shared = None
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame):
+        """Arrays of the numeric columns of `frame`, which is indexed by the bar time like for `bt.feeds.PandasData`"""
+        return cls(frame.index, {col: frame[col].values for col in frame.select_dtypes("number").columns})
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def fingerprint(self):
+        """Hash of the bar times and columns, which identifies the feed across processes. It is computed once and
+        pickled along with the arrays"""
+        if self._fingerprint is None:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(self.datetime.view(np.uint8))
+            for col, values in self.columns.items():
+                h.update(col.encode())
+                h.update(values.view(np.uint8))
+            self._fingerprint = h.hexdigest()
+        return self._fingerprint
+
+    def join(self, frame: pd.DataFrame):
+        """Arrays with the columns of `frame` added. The existing arrays are shared rather than copied"""
+        columns = {**self.columns, **{col: frame[col].values for col in frame.columns}}
+        return FeedArrays(self.index, columns, datetime=self.datetime)
+
+    def to_frame(self):
+        return pd.DataFrame(self.columns, index=self.index, copy=False)
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        index = self.index.tz_convert(None) if self.index.tz is not None else self.index
+        # Saved in the resolution of the index, which `load` reads back from the dtype
+        np.save(os.path.join(path, "index.npy"), index.values)
+        np.save(os.path.join(path, "datetime.npy"), self.datetime)
+        for i, values in enumerate(self.columns.values()):
+            np.save(os.path.join(path, f"c{i}.npy"), values)
+        with open(os.path.join(path, "spec.json"), "w") as f:
+            tz = str(self.index.tz) if self.index.tz is not None else None
+            json.dump({"name": self.index.name, "tz": tz, "columns": list(self.columns)}, f)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str = "r"):
+        """Load arrays saved with `save`, memory-mapped unless `mmap_mode` is None"""
+        with open(os.path.join(path, "spec.json")) as f:
+            spec = json.load(f)
+        load = lambda name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+        index = pd.DatetimeIndex(load("index"), name=spec["name"])
+        if spec["tz"] is not None:
+            index = index.tz_localize("UTC").tz_convert(spec["tz"])
+        columns = {col: load(f"c{i}") for i, col in enumerate(spec["columns"])}
+        return cls(index, columns, datetime=load("datetime"))
+
+    def share(self):
+        """Copy of the arrays in one `multiprocessing.shared_memory` block
+
+        The copy pickles as the name and layout of the block rather than the arrays, so unpickling it in another process
+        attaches the arrays read-only without copying them. The block is freed by calling `unlink` on the copy.
+        """
+        index = self.index.tz_convert(None) if self.index.tz is not None else self.index
+        arrays = [index.values, self.datetime, *self.columns.values()]
+        offsets = np.r_[0, np.cumsum([values.nbytes for values in arrays])].tolist()
+        shm = shared_memory.SharedMemory(create=True, size=max(offsets[-1], 1))
+        for values, offset in zip(arrays, offsets):
+            np.ndarray(values.shape, values.dtype, buffer=shm.buf, offset=offset)[:] = values
+        spec = {
+            "name": self.index.name,
+            "tz": str(self.index.tz) if self.index.tz is not None else None,
+            "columns": list(self.columns),
+            "dtypes": [values.dtype.str for values in arrays],
+            "offsets": offsets[:-1],
+            "length": len(self),
+        }
+        shared = self._attach(shm, spec)
+        shared._fingerprint = self._fingerprint
+        return shared
+
+    def unlink(self):
+        """Free the shared memory block of a copy returned by `share`. Processes which attached it keep their mapping"""
+        self._shared[0].unlink()
+
+    @classmethod
+    def _attach(cls, shm: shared_memory.SharedMemory, spec: dict):
+        index, datetime, *columns = [
+            np.ndarray(spec["length"], dtype, buffer=shm.buf, offset=offset)
+            for dtype, offset in zip(spec["dtypes"], spec["offsets"])
+        ]
+        for values in [index, datetime, *columns]:
+            values.flags.writeable = False
+        index = pd.DatetimeIndex(index, name=spec["name"])
+        if spec["tz"] is not None:
+            index = index.tz_localize("UTC").tz_convert(spec["tz"])
+        arrays = cls(index, dict(zip(spec["columns"], columns)), datetime=datetime)
+        arrays._shared = (shm, spec)
+        return arrays
+
+    def __getstate__(self):
+        if getattr(self, "_shared", None) is None:
+            return self.__dict__
+        shm, spec = self._shared
+        return {"shm": shm.name, "spec": spec, "fingerprint": self._fingerprint}
+
+    def __setstate__(self, state):
+        if "shm" not in state:
+            self.__dict__.update(state)
+            return
+        # Pool workers share the resource tracker of the process which created the block, so attaching it here does not
+        # unlink it when the worker exits
+        shm = shared_memory.SharedMemory(state["shm"])
+        self.__dict__.update(self._attach(shm, state["spec"]).__dict__)
+        self._fingerprint = state["fingerprint"]
+
+
+class ArrayData(bt.feed.DataBase):
+    """Data feed serving the bars of a `FeedArrays` (passed as `dataname`) by integer cursor
+
+    Lines without a matching column are left empty, like the columns mapped to -1 in `bt.feeds.PandasData`.
+    """
+
+    def _bars(self):
+        """The `FeedArrays` whose rows are loaded as bars"""
+        return self.p.dataname
+
+    def start(self):
+        super().start()
+        bars = self._bars()
+        self._idx = -1
+        self._datetime = bars.datetime
+        self._columns = [
+            (getattr(self.lines, alias), bars.columns[alias])
+            for alias in self.getlinealiases()
+            if alias != "datetime" and alias in bars.columns
+        ]
+
+    def _tick_index(self):
+        """Row of the tick being delivered in the arrays of `dataname`"""
+        return self._idx
+
+    def memo_lines(self, squeeze_pro_length=20, atr_length=10, adx_length=14):
+        """`indicator_lines` of the feed for the bars it is delivered as, from `indicator_memo`
+
+        The lines hold one value per tick of `dataname`, read at `_tick_index` (see `backtrader_indicators.FeedLine`).
+        """
+        unit = {bt.TimeFrame.Seconds: "s", bt.TimeFrame.Minutes: "min", bt.TimeFrame.Days: "D"}[self._timeframe]
+        return indicator_memo.lines(
+            self.p.dataname,
+            pd.Timedelta(self._compression, unit),
+            squeeze_pro_length=squeeze_pro_length,
+            atr_length=atr_length,
+            adx_length=adx_length,
+        )
+
+    def _load(self):
+        self._idx += 1
+
+        if self._idx >= len(self._datetime):
+            return False
+
+        for line, values in self._columns:
+            line[0] = values[self._idx]
+        self.lines.datetime[0] = self._datetime[self._idx]
+
+        return True
+
+
+def replay_bars(feed: pd.DataFrame, compression: pd.Timedelta):
+    """Bars built by `cerebro.replaydata` as of every tick of `feed`
+
+    `feed` is indexed by the bar close time (see `util.fix_dt_for_backtrader`) so a tick closing exactly on a boundary
+    completes the bar, like backtrader's `rightedge` replay.
+
+    Returns the position of the bar each tick belongs to, the completed bars and the partial bars as of each tick. The
+    bars are dicts of `open`, `high`, `low` and `close` arrays, plus `volume` when `feed` has it.
+    """
+    index = feed.index.tz_convert(None) if feed.index.tz is not None else feed.index
+    timestamps = index.values.astype("datetime64[ns]").view(np.int64)
+    bucket = (timestamps - 1) // pd.Timedelta(compression).value
+    bar = np.cumsum(np.r_[False, bucket[1:] != bucket[:-1]])
+
+    grouped = pd.DataFrame({"high": feed.high.values, "low": feed.low.values}).groupby(bar)
+    partial = {
+        "open": feed.open.values[np.flatnonzero(np.r_[True, np.diff(bar) != 0])][bar],
+        "high": grouped.high.cummax().values,
+        "low": grouped.low.cummin().values,
+        "close": feed.close.values,
+    }
+    if "volume" in feed.columns:
+        partial["volume"] = pd.Series(feed.volume.values).groupby(bar).cumsum().values
+
+    # A bar is complete as of its last tick
+    last = np.flatnonzero(np.r_[np.diff(bar) != 0, True])
+    completed = {col: values[last] for col, values in partial.items()}
+
+    return bar, completed, partial
+
+
+class IntrabarArrays:
+    """The bars `cerebro.replaydata` builds from a tick feed as of every tick, as served by `IntrabarData`
+
+    `ticks` holds the tick feed, `partial` the bar as of each tick and `bars` the completed `compression` sized bars.
+    `first` flags the ticks which open a bar. The columns of `ticks` other than the ohlcv are carried as of the tick in
+    `partial` and as of the last tick of the bar in `bars`.
+    """
+
+    def __init__(self, ticks: FeedArrays, partial: FeedArrays, first: np.ndarray, compression: pd.Timedelta):
+        self.ticks = ticks
+        self.partial = partial
+        self.first = first
+        self.compression = compression
+        # A bar is complete as of its last tick
+        last = np.flatnonzero(np.r_[first[1:], True])
+        self.bars = FeedArrays(
+            partial.index[last],
+            {col: values[last] for col, values in partial.columns.items()},
+            datetime=partial.datetime[last],
+        )
+
+    @classmethod
+    def from_ticks(cls, ticks: FeedArrays, compression: pd.Timedelta):
+        """Replay `ticks` (indexed by the bar close time, see `replay_bars`) into `compression` sized bars"""
+        bar, _, partial = replay_bars(ticks.to_frame(), compression)
+        partial = FeedArrays(ticks.index, {**ticks.columns, **partial}, datetime=ticks.datetime)
+        return cls(ticks, partial, np.r_[True, np.diff(bar) != 0], compression)
+
+    @property
+    def index(self):
+        return self.ticks.index
+
+    @property
+    def fingerprint(self):
+        return self.ticks.fingerprint
+
+    def __len__(self):
+        return len(self.ticks)
+
+    def join(self, frame: pd.DataFrame):
+        """Arrays with the tick columns of `frame` added. The existing arrays are shared rather than copied"""
+        return IntrabarArrays(self.ticks.join(frame), self.partial.join(frame), self.first, self.compression)
+
+    def share(self):
+        """Copy of the tick, partial and bar arrays in shared memory, see `FeedArrays.share`"""
+        shared = IntrabarArrays.__new__(IntrabarArrays)
+        shared.__dict__.update(self.__dict__)
+        shared.ticks, shared.partial, shared.bars = self.ticks.share(), self.partial.share(), self.bars.share()
+        return shared
+
+    def unlink(self):
+        for arrays in [self.ticks, self.partial, self.bars]:
+            arrays.unlink()
+
+    def to_frame(self):
+        return self.ticks.to_frame()
+
+
+class IntrabarData(ArrayData):
+    """Data feed replaying the ticks of an `IntrabarArrays` (passed as `dataname`) into its larger bars
+
+    Each call to `next` delivers one tick: the bar the tick belongs to is updated in place with the bar as of the tick,
+    the same sequence `cerebro.replaydata` produces, and the `tick_` values the broker matches orders against are those
+    of the tick itself, so stop and trailing orders still trigger on the tick path. As the bars are not built on the
+    fly, the feed is not flagged as replaying and the completed bars can be preloaded. The strategy still runs on every
+    tick, so the feed turns runonce off like `bt.ind.HeikinAshi` does.
+    """
+
+    def _bars(self):
+        return self.p.dataname.bars
+
+    def start(self):
+        super().start()
+        intrabar = self.p.dataname
+        self._tick = -1
+        self._first = intrabar.first
+        self._partial = [
+            (getattr(self.lines, alias), intrabar.partial.columns[alias])
+            for alias in self.getlinealiases()
+            if alias != "datetime" and alias in intrabar.partial.columns
+        ] + [(self.lines.datetime, intrabar.partial.datetime)]
+        # Lines without a matching column are NaN, like their tick values on a replayed feed
+        self._ticks = [
+            (f"tick_{alias}", intrabar.ticks.columns.get(alias))
+            for alias in self.getlinealiases()
+            if alias != "datetime"
+        ]
+
+        env = getattr(self, "_env", None)
+        if env is not None:
+            env._disable_runonce()
+
+    def next(self, datamaster=None, ticks=True):
+        self._tick += 1
+        if self._tick >= len(self._first):
+            return False
+
+        if self._first[self._tick]:
+            if len(self) < self.buflen():
+                # The completed bar was preloaded
+                self.lines.advance()
+            else:
+                self.lines.forward()
+
+        self._deliver()
+        return True
+
+    def rewind(self, size=1):
+        # Cerebro rewinds a data whose tick is ahead of the others, the tick is delivered again by the next `next`
+        for _ in range(size):
+            if self._first[self._tick]:
+                self.lines.rewind()
+            self._tick -= 1
+
+        if self._tick >= 0:
+            self._deliver()
+
+    def _tick_index(self):
+        return self._tick
+
+    def _deliver(self):
+        for line, values in self._partial:
+            line[0] = values[self._tick]
+        self._tick_fill(force=True)
+
+    def _tick_fill(self, force=False):
+        for name, values in self._ticks:
+            setattr(self, name, float(values[self._tick]) if values is not None else float("nan"))
+        self.tick_last = getattr(self, f"tick_{self._getlinealias(0)}")
+
+
+def _prev(x: np.ndarray, bar: np.ndarray):
+    """Value of the completed bar before each tick's bar"""
+    return np.r_[np.nan, x][bar]
+
+
+def _windows(x: np.ndarray, x_tick: np.ndarray, bar: np.ndarray, period: int):
+    """(ticks, period) windows of the `period - 1` completed bars before each tick's bar followed by the tick value"""
+    padded = np.r_[np.full(period - 1, np.nan), x]
+    return np.concatenate([padded[bar[:, None] + np.arange(period - 1)], x_tick[:, None]], axis=1)
+
+
+def _window(func, x: np.ndarray, x_tick: np.ndarray, bar: np.ndarray, period: int):
+    """Apply `func` over the trailing window of every completed bar and of every tick"""
+    return func(_windows(x, x, np.arange(len(x)), period)), func(_windows(x, x_tick, bar, period))
+
+
+def _mean(windows: np.ndarray):
+    return windows.mean(axis=1)
+
+
+def _rma(x: np.ndarray, x_tick: np.ndarray, bar: np.ndarray, period: int):
+    """`backtrader_indicators.RMA` of every completed bar and of every tick
+
+    The average is seeded with the SMA of the first `period` values, then each tick takes one smoothing step from the
+    completed bar before it.
+    """
+    alpha = 1 / period
+    seed_at = np.argmax(~np.isnan(x)) + period - 1
+
+    src = np.full(len(x), np.nan)
+    if seed_at < len(x):
+        src[seed_at] = x[seed_at - period + 1 : seed_at + 1].mean()
+        src[seed_at + 1 :] = x[seed_at + 1 :]
+    rma = pd.Series(src).ewm(alpha=alpha, adjust=False).mean().values
+
+    rma_tick = np.where(
+        bar == seed_at,
+        _mean(_windows(x, x_tick, bar, period)),
+        _prev(rma, bar) * (1 - alpha) + x_tick * alpha,
+    )
+    return rma, rma_tick
+
+
+def _true_range(completed: dict, partial: dict, bar: np.ndarray):
+    prev_close = np.r_[np.nan, completed["close"][:-1]]
+    tr = np.maximum(completed["high"], prev_close) - np.minimum(completed["low"], prev_close)
+    prev_close = _prev(completed["close"], bar)
+    tr_tick = np.maximum(partial["high"], prev_close) - np.minimum(partial["low"], prev_close)
+    return tr, tr_tick
+
+
+def _squeeze_status(completed: dict, partial: dict, bar: np.ndarray, length: int, atr: tuple, bb_mult=2):
+    """Squeeze status of `backtrader_indicators.SqueezePro` with the band lengths set to `length`"""
+    basis = _window(_mean, completed["close"], partial["close"], bar, length)
+    mean_squared = _window(_mean, completed["close"] ** 2, partial["close"] ** 2, bar, length)
+
+    status = []
+    for i in range(2):
+        bb_dev = bb_mult * np.sqrt(mean_squared[i] - basis[i] ** 2)
+        bb_upper, bb_lower = basis[i] + bb_dev, basis[i] - bb_dev
+        # Keltner channels for the high, mid and low squeeze
+        conditions = [
+            (bb_lower >= basis[i] - mult * atr[i]) | (bb_upper <= basis[i] + mult * atr[i]) for mult in [1, 1.5, 2]
+        ]
+        status.append(np.select(conditions, [3.0, 2.0, 1.0], default=0.0))
+    return status
+
+
+def _momentum(completed: dict, partial: dict, bar: np.ndarray, length: int):
+    """Momentum of `backtrader_indicators.SqueezePro` with `mom_length` set to `length`"""
+    sma_close = _window(_mean, completed["close"], partial["close"], bar, length)
+    highest_high = _window(lambda w: w.max(axis=1), completed["high"], partial["high"], bar, length)
+    lowest_low = _window(lambda w: w.min(axis=1), completed["low"], partial["low"], bar, length)
+    delta = [
+        bars["close"] - ((highest_high[i] + lowest_low[i]) / 2 + sma_close[i]) / 2
+        for i, bars in enumerate([completed, partial])
+    ]
+    weights = _linreg_weights(length)
+    return _window(lambda w: w @ weights, *delta, bar, length)
+
+
+def _directional_movement(completed: dict, partial: dict, bar: np.ndarray, tr: tuple, period: int):
+    """ADX, +DI and -DI of `bt.ind.DirectionalMovementIndex` with `backtrader_indicators.RMA` smoothing"""
+    prev_high = np.r_[np.nan, completed["high"][:-1]], _prev(completed["high"], bar)
+    prev_low = np.r_[np.nan, completed["low"][:-1]], _prev(completed["low"], bar)
+
+    plus_dm, minus_dm = [], []
+    for i, bars in enumerate([completed, partial]):
+        up = bars["high"] - prev_high[i]
+        down = prev_low[i] - bars["low"]
+        # Undefined (rather than 0) on the first bar, so the averages are seeded from the second bar like backtrader
+        plus_dm.append(np.where(np.isnan(up), np.nan, np.where((up > down) & (up > 0), up, 0.0)))
+        minus_dm.append(np.where(np.isnan(down), np.nan, np.where((down > up) & (down > 0), down, 0.0)))
+
+    atr = _rma(*tr, bar, period)
+    plus = [100 * rma / atr[i] for i, rma in enumerate(_rma(*plus_dm, bar, period))]
+    minus = [100 * rma / atr[i] for i, rma in enumerate(_rma(*minus_dm, bar, period))]
+    dx = [np.abs(plus[i] - minus[i]) / (plus[i] + minus[i]) for i in range(2)]
+    adx = [100 * rma for rma in _rma(*dx, bar, period)]
+
+    return adx, plus, minus
+
+
+def indicator_lines(
+    feed: pd.DataFrame,
+    compression: pd.Timedelta,
+    squeeze_pro_length=20,
+    atr_length=10,
+    adx_length=14,
+    adx_thresh=20,
+):
+    """Lines of the stateless `TenXSqueeze` indicators as backtrader sees them at every tick when `feed` is replayed
+    into `compression` sized bars
+
+    Each length may be a list to precompute every value of a parameter sweep. The columns are named after the line and
+    the lengths they depend on: `squeeze_status_{squeeze_pro_length}_{atr_length}`, `momentum_{squeeze_pro_length}`,
+    `atr_{atr_length}` and `adx`, `plus`, `minus`, `d_up`, `d_down`, `sideways` suffixed with `_{adx_length}`.
+    """
+    as_list = lambda x: sorted(set(x)) if isinstance(x, list) else [x]
+    bar, completed, partial = replay_bars(feed, compression)
+
+    lines = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tr = _true_range(completed, partial, bar)
+
+        atr = {length: _rma(*tr, bar, length) for length in as_list(atr_length)}
+        for length in as_list(atr_length):
+            lines[f"atr_{length}"] = atr[length][1]
+
+        for length in as_list(squeeze_pro_length):
+            for a_length in as_list(atr_length):
+                status = _squeeze_status(completed, partial, bar, length, atr[a_length])
+                lines[f"squeeze_status_{length}_{a_length}"] = status[1]
+            lines[f"momentum_{length}"] = _momentum(completed, partial, bar, length)[1]
+
+        for length in as_list(adx_length):
+            adx, plus, minus = (line[1] for line in _directional_movement(completed, partial, bar, tr, length))
+            lines[f"adx_{length}"] = adx
+            lines[f"plus_{length}"] = plus
+            lines[f"minus_{length}"] = minus
+            lines[f"d_up_{length}"] = ((plus > minus) & (adx > adx_thresh)).astype(np.float64)
+            lines[f"d_down_{length}"] = ((minus > plus) & (adx > adx_thresh)).astype(np.float64)
+            lines[f"sideways_{length}"] = (adx < adx_thresh).astype(np.float64)
+
+    return pd.DataFrame(lines, index=feed.index)
+
+
+class IndicatorMemo:
+    """Memo of `indicator_lines` for the life of the process, keyed by the feed's fingerprint, the replay compression
+    and the lengths
+
+    The worker processes of an optimization run are reused across combinations, so each worker computes the lines of a
+    set of lengths once and the later combinations sharing those lengths only rerun the order logic. Beyond
+    `max_entries` sets of lines, the least recently used are dropped.
+    """
+
+    def __init__(self, max_entries: int = 16):
+        self.max_entries = max_entries
+        self._entries = collections.OrderedDict()
+
+    def lines(self, feed, compression: pd.Timedelta, squeeze_pro_length=20, atr_length=10, adx_length=14):
+        """Lines of `feed` (a `FeedArrays` or `IntrabarArrays`) as a dict of arrays with the columns of
+        `indicator_lines`"""
+        key = (feed.fingerprint, pd.Timedelta(compression), squeeze_pro_length, atr_length, adx_length)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        frame = indicator_lines(feed.to_frame(), compression, squeeze_pro_length, atr_length, adx_length)
+        self._entries[key] = {col: frame[col].values for col in frame.columns}
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+
+# Shared by the feeds of this process, see `ArrayData.memo_lines`
+indicator_memo = IndicatorMemo()
+
+
+def indicator_data_class(columns: list, base: type = ArrayData):
+    """`base` subclass (`ArrayData` or `IntrabarData`) with an extra line for each of `columns`
+
+    The class is registered in this module under a name derived from the base and the columns, the same way backtrader
+    registers its generated line classes, so cerebro can still be pickled for optimization runs. Processes started
+    before the class was generated recreate it from its `indicator_spec` (see `ProgressCerebro.WorkerPool`).
+    """
+    columns = tuple(columns)
+    name = f"Indicator{base.__name__}_{hashlib.md5(repr(columns).encode()).hexdigest()[:12]}"
+    module = sys.modules[__name__]
+    if not hasattr(module, name):
+        cls = type(name, (base,), {"lines": columns, "indicator_spec": (base, columns)})
+        cls.__module__ = __name__
+        setattr(module, name, cls)
+    return getattr(module, name)
@@ -0,0 +1,362 @@
+"""This module contains the 10xsqueeze indicators implemented as a fused numpy engine
+
+The functions in this module work on raw ndarrays and compute every shared intermediate (moving averages, true range,
+EMAs) once. The outputs match the functions in `pandas_indicators`. Arrays are indexed (time, ...) so a 2-D panel of
+(time x tickers) is computed column-wise in a single pass.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _rolling(x: np.ndarray, length: int, func):
+    """Apply `func` over a trailing window of `length` bars along the first axis. The first `length - 1` are NaN"""
+    out = np.full(x.shape, np.nan)
+    if len(x) >= length:
+        out[length - 1 :] = func(sliding_window_view(x, length, axis=0), axis=-1)
+    return out
+
+
+def _linreg_weights(length: int):
+    """Weights which give the end point of a least squares line fitted over a window of `length` bars"""
+    x = np.arange(length)
+    x_mean = x.mean()
+    return 1 / length + (x - x_mean) * (length - 1 - x_mean) / ((x - x_mean) ** 2).sum()
+
+
+def _linreg(x: np.ndarray, length: int):
+    """Linear Regression end point - equivalent to talib.LINEARREG"""
+    weights = _linreg_weights(length)
+    return _rolling(x, length, lambda window, axis: window @ weights)
+
+
+def _ewm(x: np.ndarray, alpha: float):
+    """Exponentially weighted mean seeded with the first valid value, equivalent to pandas ewm(adjust=False)"""
+    return pd.DataFrame(x.reshape(len(x), -1)).ewm(alpha=alpha, adjust=False).mean().to_numpy().reshape(x.shape)
+
+
+def _rma(x: np.ndarray, length: int):
+    """Running Moving Average"""
+    return _ewm(x, 1 / length)
+
+
+def _ema(x: np.ndarray, length: int, sma: np.ndarray = None):
+    """Exponential Moving Average seeded with the SMA of the first `length` bars, equivalent to talib.EMA"""
+    sma = _rolling(x, length, np.mean) if sma is None else sma
+    src = np.full(x.shape, np.nan)
+    if len(x) >= length:
+        src[length - 1] = sma[length - 1]
+        src[length:] = x[length:]
+    return _ewm(src, 2 / (length + 1))
+
+
+def _bfill(x: np.ndarray):
+    return pd.DataFrame(x.reshape(len(x), -1)).bfill().to_numpy().reshape(x.shape)
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray):
+    """True Range as computed by `pandas_indicators.true_range` and by talib.TRANGE (undefined on the first bar)"""
+    prev_close = np.roll(close, 1, axis=0)
+    prev_close[0] = np.nan
+    tr = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    return tr, np.where(np.isnan(prev_close), np.nan, tr)
+
+
+def _directional_moves(high: np.ndarray, low: np.ndarray):
+    """Positive and negative directional movement of each bar"""
+    up = np.diff(high, axis=0, prepend=np.nan)
+    down = -np.diff(low, axis=0, prepend=np.nan)
+    return np.where((up > down) & (up > 0), up, 0), np.where((down > up) & (down > 0), down, 0)
+
+
+def _directional_index(tr: np.ndarray, plus_dm: np.ndarray, minus_dm: np.ndarray, dir_length: int):
+    """ADX, +DI and -DI. The three input smoothings share one batched recurrence"""
+    trur, plus_rma, minus_rma = np.moveaxis(_rma(np.stack([tr, plus_dm, minus_dm], axis=-1), dir_length), -1, 0)
+    plus = _bfill(100 * plus_rma / trur)
+    minus = _bfill(100 * minus_rma / trur)
+    di_sum = plus + minus
+    adx = 100 * _rma(np.abs(plus - minus) / np.where(di_sum == 0, 1, di_sum), dir_length)
+    return adx, plus, minus
+
+
+def _squeeze_status(bb_lower: np.ndarray, bb_upper: np.ndarray, kc_lower: dict, kc_upper: dict):
+    """Squeeze status codes matching `backtrader_indicators.SqueezePro.squeeze_status_map`"""
+    return np.select(
+        [
+            (bb_lower >= kc_lower["high"]) | (bb_upper <= kc_upper["high"]),
+            (bb_lower >= kc_lower["mid"]) | (bb_upper <= kc_upper["mid"]),
+            (bb_lower >= kc_lower["low"]) | (bb_upper <= kc_upper["low"]),
+            (bb_lower < kc_lower["low"]) | (bb_upper > kc_upper["low"]),
+        ],
+        [3, 2, 1, 0],
+        # squeeze_pro_indicator falls back to high_squeeze when no condition holds (during the warmup period)
+        default=3,
+    ).astype(np.int8)
+
+
+def big3(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    bb_length=20,
+    kc_length=20,
+    mom_length=20,
+    atr_length=10,
+    bb_mult=2,
+    kc_mult={"high": 1, "mid": 1.5, "low": 2},
+    dir_length=14,
+    adx_thresh=20,
+    ema_lengths=[5, 8, 21, 34, 55, 89],
+):
+    """Big3 by SimplerTrading - https://intercom.help/simpler-trading/en/articles/6384452-about-big-3-signals
+
+    Fused equivalent of `pandas_indicators.big3` which computes SqueezePro, DMI and the stacked EMAs in one call.
+    Moving averages that share a length, the true range and the EMAs are computed once and reused by every component.
+
+    Returns a dict of ndarrays with the SqueezePro bands (`bb_*`, `kc_*`), `squeeze_status` (codes matching
+    `backtrader_indicators.SqueezePro.squeeze_status_map`), `momentum`, `adx`, `plus`, `minus`, `p_stack`, `n_stack`,
+    `bullish_trend`, `bearish_trend`, `in_kc` and `signal`.
+    """
+    high, low, close = (np.asarray(x, dtype=np.float64) for x in (high, low, close))
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Moving averages shared between the bollinger bands, keltner channels and momentum
+        sma = {length: _rolling(close, length, np.mean) for length in {bb_length, kc_length, mom_length}}
+
+        # True range is shared between the keltner channels and DMI. talib.TRANGE leaves the first bar undefined
+        tr, tr_keltner = _true_range(high, low, close)
+
+        # SqueezePro
+        bb_basis = sma[bb_length]
+        bb_dev = bb_mult * _rolling(close, bb_length, np.std)
+        bb_upper = bb_basis + bb_dev
+        bb_lower = bb_basis - bb_dev
+
+        devkc = _rma(tr_keltner, atr_length)
+        kc_basis = sma[kc_length]
+        kc_upper = {k: kc_basis + mult * devkc for k, mult in kc_mult.items()}
+        kc_lower = {k: kc_basis - mult * devkc for k, mult in kc_mult.items()}
+
+        squeeze_status = _squeeze_status(bb_lower, bb_upper, kc_lower, kc_upper)
+
+        highest_high = _rolling(high, mom_length, np.max)
+        lowest_low = _rolling(low, mom_length, np.min)
+        avg_price = ((highest_high + lowest_low) / 2 + sma[mom_length]) / 2
+        momentum = _linreg(close - avg_price, mom_length)
+
+        # Directional Movement Index
+        adx, plus, minus = _directional_index(tr, *_directional_moves(high, low), dir_length)
+
+        # Stacked EMAs
+        emas = [_ema(close, length, sma.get(length)) for length in ema_lengths]
+        p_stack = np.all([emas[i] > emas[i + 1] for i in range(len(emas) - 1)], axis=0)
+        n_stack = np.all([emas[i] < emas[i + 1] for i in range(len(emas) - 1)], axis=0)
+
+        # Big3
+        bullish_trend = (adx > adx_thresh) & (plus > minus) & p_stack
+        bearish_trend = (adx > adx_thresh) & (plus < minus) & n_stack
+        in_kc = (close >= kc_lower["high"]) & (close <= kc_upper["high"])
+
+    strength = np.select([squeeze_status == 3, squeeze_status == 2], [2.0, 1.0], default=0.0)
+    signal = np.select([bullish_trend & in_kc, bearish_trend & in_kc], [strength, -strength], default=0.0)
+
+    return {
+        "bb_upper": bb_upper,
+        "bb_basis": bb_basis,
+        "bb_lower": bb_lower,
+        "kc_basis": kc_basis,
+        **{f"kc_upper_{k}": v for k, v in kc_upper.items()},
+        **{f"kc_lower_{k}": v for k, v in kc_lower.items()},
+        "squeeze_status": squeeze_status,
+        "momentum": momentum,
+        "adx": adx,
+        "plus": plus,
+        "minus": minus,
+        "p_stack": p_stack,
+        "n_stack": n_stack,
+        "bullish_trend": bullish_trend,
+        "bearish_trend": bearish_trend,
+        "in_kc": in_kc,
+        "signal": signal,
+    }
+
+
+def big3_panel(high: np.ndarray, low: np.ndarray, close: np.ndarray, **kwargs):
+    """Big3 over a (time x tickers) panel aligned on one time index
+
+    NaN rows in a column are treated as missing bars for that ticker. Each column is compacted so its bars are
+    contiguous before the single vectorized call to `big3`, then the outputs are scattered back onto the shared index.
+    The result for every column therefore matches `big3` run on that ticker alone. At missing bars the float outputs
+    are NaN, the boolean outputs are False and `squeeze_status` is -1.
+
+    Accepts the same keyword arguments as `big3`.
+    """
+    high, low, close = (np.asarray(x, dtype=np.float64) for x in (high, low, close))
+    missing = np.isnan(high) | np.isnan(low) | np.isnan(close)
+
+    # Stable sort moves the missing bars of each column to the end while keeping the order of the others
+    order = np.argsort(missing, axis=0, kind="stable")
+    compact = big3(
+        *(np.take_along_axis(np.where(missing, np.nan, x), order, axis=0) for x in (high, low, close)), **kwargs
+    )
+
+    ret = {}
+    for name, values in compact.items():
+        out = np.empty_like(values)
+        np.put_along_axis(out, order, values, axis=0)
+        out[missing] = {"f": np.nan, "b": False}.get(values.dtype.kind, -1)
+        ret[name] = out
+
+    return ret
+
+
+def _blocks(x: np.ndarray, block: int):
+    """Rows of the previous and the current block of `block` bars, one per block -> (n_blocks, 2 * block). The bars
+    before the start and after the end are 0"""
+    n_blocks = -(-len(x) // block)
+    padded = np.zeros((n_blocks + 1) * block)
+    padded[block : block + len(x)] = x
+    return sliding_window_view(padded, 2 * block)[::block]
+
+
+def _window_sums(rows: np.ndarray, lengths: np.ndarray, n: int):
+    """Trailing window sums for each of `lengths` (at most the block size) of `n` bars split into `rows` by `_blocks`
+    -> (len(lengths), n)
+
+    The prefix sums restart on every row, so their rounding error stays that of a sum of two blocks however long the
+    series is.
+    """
+    block = rows.shape[1] // 2
+    prefix = np.zeros((len(rows), 2 * block + 1))
+    np.cumsum(rows, axis=1, out=prefix[:, 1:])
+    # Bar j of a row ends its windows at prefix sum block + 1 + j and starts them `length` sums before
+    sums = np.stack(
+        [(prefix[:, block + 1 :] - prefix[:, block + 1 - length : -length]).reshape(-1)[:n] for length in lengths]
+    )
+    for row, length in zip(sums, lengths):
+        row[: length - 1] = np.nan
+    return sums
+
+
+def _window_extrema(x: np.ndarray, lengths: np.ndarray, func):
+    """Trailing window max/min for each of `lengths` -> (len(lengths), time)
+
+    Uses a sparse table of power of two windows which is built once and shared by every length. Each window is then
+    covered by two overlapping power of two windows.
+    """
+    table = [x]
+    while 2 ** len(table) <= lengths.max():
+        prev, span = table[-1], 2 ** (len(table) - 1)
+        table.append(np.concatenate([np.full(span, np.nan), func(prev[span:], prev[:-span])]))
+
+    out = np.full((len(lengths), len(x)), np.nan)
+    for i, length in enumerate(lengths):
+        level = int(np.log2(length))
+        span = 2**level
+        out[i, length - 1 :] = func(table[level][length - 1 :], table[level][span - 1 : len(x) - length + span])
+    return out
+
+
+def _linreg_grid(x: np.ndarray, length: int, block: int):
+    """`_linreg` from the window sums of `x` and of `x` times its position in the window, see `_window_sums`"""
+    n, lengths = len(x), np.array([length])
+    rows = _blocks(np.nan_to_num(x), block)
+    sum_y = _window_sums(rows, lengths, n)[0]
+    # Position of the bars in their row, minus that of the first bar of the window
+    start = np.arange(n) % block + block + 1 - length
+    sum_xy = _window_sums(rows * np.arange(2 * block), lengths, n)[0] - start * sum_y
+
+    sum_x = length * (length - 1) / 2
+    slope = (length * sum_xy - sum_x * sum_y) / (length * (length - 1) * length * (length + 1) / 12)
+    out = (sum_y - slope * sum_x) / length + slope * (length - 1)
+    # The window must not reach the leading NaNs of `x`
+    valid = ~np.isnan(x)
+    first = valid.argmax() if valid.any() else n
+    out[np.arange(n) < first + length - 1] = np.nan
+    return out
+
+
+def squeeze_pro_grid(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    lengths: list,
+    atr_lengths: list,
+    bb_mult=2,
+    kc_mult={"high": 1, "mid": 1.5, "low": 2},
+):
+    """SqueezePro for a grid of parameters, stacked as (param x time) arrays
+
+    Row i is configured like `TenXSqueeze` with `squeeze_pro_length=lengths[i]` and `atr_length=atr_lengths[i]`. The
+    rolling means, deviations and regressions of every length come from prefix sums restarting every `max(lengths)`
+    bars, the rolling max/min from one sparse table and each distinct ATR length is smoothed only once.
+
+    The outputs are still built row by row. On 200k bars a grid of 20 lengths takes about 10x the time of one length,
+    about half of it spent building the bands and squeeze status of every row.
+
+    Returns a dict with the same SqueezePro keys as `big3`.
+    """
+    high, low, close = (np.asarray(x, dtype=np.float64) for x in (high, low, close))
+    lengths, length_idx = np.unique(np.asarray(lengths), return_inverse=True)
+    atr_lengths, atr_idx = np.unique(np.asarray(atr_lengths), return_inverse=True)
+    n, block = len(close), int(lengths.max())
+    end = np.arange(n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Prices are taken relative to the first close of each block, sums of the squared prices would lose the
+        # precision of the deviations to cancellation
+        rows = _blocks(close, block)
+        anchor = rows[:, block : block + 1]
+        centered = rows - anchor
+        mean = _window_sums(centered, lengths, n) / lengths[:, None]
+        variance = _window_sums(centered * centered, lengths, n) / lengths[:, None] - mean * mean
+        sma = anchor[end // block, 0] + mean
+        std = np.sqrt(np.maximum(variance, 0))
+
+        _, tr_keltner = _true_range(high, low, close)
+        devkc = np.stack([_rma(tr_keltner, length) for length in atr_lengths])[atr_idx]
+        kc_basis = sma[length_idx]
+        bb_upper = kc_basis + bb_mult * std[length_idx]
+        bb_lower = kc_basis - bb_mult * std[length_idx]
+        kc_upper = {k: kc_basis + mult * devkc for k, mult in kc_mult.items()}
+        kc_lower = {k: kc_basis - mult * devkc for k, mult in kc_mult.items()}
+
+        avg_price = (
+            (_window_extrema(high, lengths, np.maximum) + _window_extrema(low, lengths, np.minimum)) / 2 + sma
+        ) / 2
+        momentum = np.stack(
+            [_linreg_grid(close - avg, length, block) for avg, length in zip(avg_price, lengths)]
+        )[length_idx]
+
+    return {
+        "bb_upper": bb_upper,
+        "bb_basis": kc_basis,
+        "bb_lower": bb_lower,
+        "kc_basis": kc_basis,
+        **{f"kc_upper_{k}": v for k, v in kc_upper.items()},
+        **{f"kc_lower_{k}": v for k, v in kc_lower.items()},
+        "squeeze_status": _squeeze_status(bb_lower, bb_upper, kc_lower, kc_upper),
+        "momentum": momentum,
+    }
+
+
+def directional_movement_grid(high: np.ndarray, low: np.ndarray, close: np.ndarray, dir_lengths: list):
+    """Directional Movement Index for a grid of lengths, stacked as (param x time) arrays
+
+    The true range and directional movements are computed once and shared by every length.
+
+    Returns a dict with `adx`, `plus` and `minus`.
+    """
+    high, low, close = (np.asarray(x, dtype=np.float64) for x in (high, low, close))
+    dir_lengths, dir_idx = np.unique(np.asarray(dir_lengths), return_inverse=True)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tr, _ = _true_range(high, low, close)
+        plus_dm, minus_dm = _directional_moves(high, low)
+        adx, plus, minus = (
+            np.stack(lines)[dir_idx]
+            for lines in zip(*(_directional_index(tr, plus_dm, minus_dm, length) for length in dir_lengths))
+        )
+
+    return {"adx": adx, "plus": plus, "minus": minus}
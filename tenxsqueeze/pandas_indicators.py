@@ -1,10 +1,14 @@
 """This module contains the 10xsqueeze indicators implemented as pandas functions
 """
 
+import inspect
+
 import numpy as np
 import pandas as pd
 import talib as ta
 
+from .disk_cache import indicator_cache, memoize
+
 
 def true_range(feed: pd.DataFrame):
     """True Range - The largest price difference seen in the last period"""
@@ -20,20 +24,30 @@ def rma(feed: pd.Series, length=20):
     return feed.ewm(alpha=1 / length, adjust=False).mean()
 
 
-def squeeze_pro_indicator(
-    feed: pd.DataFrame,
-    bb_length=20,
-    kc_length=20,
-    mom_length=20,
-    atr_length=10,
-    bb_mult=2,
-    kc_mult={"high": 1, "mid": 1.5, "low": 2},
-):
-    """SqueezePro by SimplerTrading - https://intercom.help/simpler-trading/en/articles/3186315-about-squeeze-pro
+class Big3Flags:
+    """Bits of the packed boolean flags returned by `big3_flags`"""
 
-    This indicator is a combination of Bollinger Bands and Keltner Channels to determine the squeeze status of the asset.
-    The tighter the bollinger bands, the higher the squeeze status.
-    """
+    P_STACK = 1
+    N_STACK = 2
+    BULLISH_TREND = 4
+    BEARISH_TREND = 8
+    IN_KC = 16
+
+
+# Codes match backtrader_indicators.SqueezePro.squeeze_status_map
+squeeze_status_codes = {"no_squeeze": 0, "low_squeeze": 1, "mid_squeeze": 2, "high_squeeze": 3}
+
+
+def _compact_bands(*bands):
+    """Downcast float64 bands (Series or dicts of Series) to float32"""
+    return tuple(
+        {k: v.astype(np.float32) for k, v in band.items()} if isinstance(band, dict) else band.astype(np.float32)
+        for band in bands
+    )
+
+
+def _squeeze_pro(feed, bb_length, kc_length, mom_length, atr_length, bb_mult, kc_mult):
+    """SqueezePro with the squeeze status as int8 codes"""
     bb_upper, bb_basis, bb_lower = ta.BBANDS(
         feed.close, timeperiod=bb_length, nbdevup=bb_mult, nbdevdn=bb_mult, matype=0
     )
@@ -54,13 +68,21 @@ def squeeze_pro_indicator(
     }
 
     squeeze_status = {
-        "no_squeeze": (bb_lower < kc_lower["low"]) | (bb_upper > kc_upper["low"]),
-        "low_squeeze": (bb_lower >= kc_lower["low"]) | (bb_upper <= kc_upper["low"]),
-        "mid_squeeze": (bb_lower >= kc_lower["mid"]) | (bb_upper <= kc_upper["mid"]),
         "high_squeeze": (bb_lower >= kc_lower["high"]) | (bb_upper <= kc_upper["high"]),
+        "mid_squeeze": (bb_lower >= kc_lower["mid"]) | (bb_upper <= kc_upper["mid"]),
+        "low_squeeze": (bb_lower >= kc_lower["low"]) | (bb_upper <= kc_upper["low"]),
+        "no_squeeze": (bb_lower < kc_lower["low"]) | (bb_upper > kc_upper["low"]),
     }
 
-    squeeze_status = pd.DataFrame(squeeze_status).loc[:, ::-1].idxmax(axis=1)
+    # The first matching status wins, falling back to high_squeeze when none match (during the warmup period)
+    squeeze_status = pd.Series(
+        np.select(
+            list(squeeze_status.values()),
+            [squeeze_status_codes[k] for k in squeeze_status],
+            default=squeeze_status_codes["high_squeeze"],
+        ).astype(np.int8),
+        index=feed.index,
+    )
 
     # momentum
     highest_high = feed.high.rolling(mom_length).max()
@@ -74,8 +96,52 @@ def squeeze_pro_indicator(
     return kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, squeeze_status, mom
 
 
-def directional_movement(feed, dir_length=14):
-    """Directional Movement Index (DMI) - Measures the strength of the trend of the asset"""
+@memoize(indicator_cache)
+def squeeze_pro_indicator(
+    feed: pd.DataFrame,
+    bb_length=20,
+    kc_length=20,
+    mom_length=20,
+    atr_length=10,
+    bb_mult=2,
+    kc_mult={"high": 1, "mid": 1.5, "low": 2},
+    compact=False,
+):
+    """SqueezePro by SimplerTrading - https://intercom.help/simpler-trading/en/articles/3186315-about-squeeze-pro
+
+    This indicator is a combination of Bollinger Bands and Keltner Channels to determine the squeeze status of the asset.
+    The tighter the bollinger bands, the higher the squeeze status.
+
+    If `compact` is True, the squeeze status is returned as int8 codes (see `squeeze_status_codes`) and the bands and
+    momentum as float32.
+    """
+    kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, squeeze_status, mom = _squeeze_pro(
+        feed, bb_length, kc_length, mom_length, atr_length, bb_mult, kc_mult
+    )
+
+    if compact:
+        kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, mom = _compact_bands(
+            kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, mom
+        )
+    else:
+        squeeze_status = squeeze_status.map({v: k for k, v in squeeze_status_codes.items()})
+
+    return kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, squeeze_status, mom
+
+
+# Default lengths and multipliers of `squeeze_pro_indicator`, which `big3` uses
+squeeze_pro_defaults = {
+    name: param.default
+    for name, param in inspect.signature(squeeze_pro_indicator).parameters.items()
+    if name not in ("feed", "compact")
+}
+
+
+def directional_movement(feed, dir_length=14, compact=False):
+    """Directional Movement Index (DMI) - Measures the strength of the trend of the asset
+
+    If `compact` is True, the lines are returned as float32.
+    """
     up = feed.high.diff()
     down = -feed.low.diff()
     plus_dm = pd.Series(np.where((up > down) & (up > 0), up, 0), index=up.index)
@@ -86,6 +152,9 @@ def directional_movement(feed, dir_length=14):
     sum = plus + minus
     adx = 100 * rma(pd.Series(plus - minus).abs() / (np.where(sum == 0, 1, sum)), dir_length)
 
+    if compact:
+        return _compact_bands(adx, plus, minus)
+
     return adx, plus, minus
 
 
@@ -105,16 +174,9 @@ def n_stacked_ema(feed, lengths=[5, 8, 21, 34, 55, 89]):
     return pd.Series(n_stacked, index=feed.index)
 
 
-def big3(feed):
-    """Big3 by SimplerTrading - https://intercom.help/simpler-trading/en/articles/6384452-about-big-3-signals
-
-    This indicator is a combination of SqueezePro, Directional Movement Index and Stacked EMAs to determine the signal of the asset.
-    If the asset is in a bullish trend and the squeeze status is high, it is considered a strong buy signal.
-    If the asset is in a bullish trend and the squeeze status is medium, it is considered a weak buy signal.
-    If the asset is in a bearish trend and the squeeze status is high, it is considered a strong sell signal.
-    If the asset is in a bearish trend and the squeeze status is medium, it is considered a weak sell signal.
-    """
-    kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, squeeze_status, mom = squeeze_pro_indicator(feed)
+def _big3(feed):
+    """Big3 signal as int8 and the packed Big3Flags as uint8"""
+    kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, squeeze_status, mom = _squeeze_pro(feed, **squeeze_pro_defaults)
     adx, plus_di, minus_di = directional_movement(feed)
     p_stack = p_stacked_ema(feed)
     n_stack = n_stacked_ema(feed)
@@ -123,16 +185,49 @@ def big3(feed):
     bearish_trend = (adx > 20) & (plus_di < minus_di) & n_stack
     in_kc = (feed.close >= kc_lower["high"]) & (feed.close <= kc_upper["high"])
 
-    signal = pd.Series(np.zeros(len(feed)), index=feed.index)
+    signal = pd.Series(np.zeros(len(feed), dtype=np.int8), index=feed.index)
 
     # Bullish signals
     bullish_conditions = bullish_trend & in_kc
-    signal.loc[bullish_conditions & (squeeze_status == "high_squeeze")] = 2
-    signal.loc[bullish_conditions & (squeeze_status == "mid_squeeze")] = 1
+    signal.loc[bullish_conditions & (squeeze_status == squeeze_status_codes["high_squeeze"])] = 2
+    signal.loc[bullish_conditions & (squeeze_status == squeeze_status_codes["mid_squeeze"])] = 1
 
     # Bearish signals
     bearish_conditions = bearish_trend & in_kc
-    signal.loc[bearish_conditions & (squeeze_status == "high_squeeze")] = -2
-    signal.loc[bearish_conditions & (squeeze_status == "mid_squeeze")] = -1
+    signal.loc[bearish_conditions & (squeeze_status == squeeze_status_codes["high_squeeze"])] = -2
+    signal.loc[bearish_conditions & (squeeze_status == squeeze_status_codes["mid_squeeze"])] = -1
+
+    flags = (
+        p_stack * Big3Flags.P_STACK
+        | n_stack * Big3Flags.N_STACK
+        | bullish_trend * Big3Flags.BULLISH_TREND
+        | bearish_trend * Big3Flags.BEARISH_TREND
+        | in_kc * Big3Flags.IN_KC
+    ).astype(np.uint8)
+
+    return signal, flags
 
-    return signal
+
+@memoize(indicator_cache)
+def big3(feed, compact=False):
+    """Big3 by SimplerTrading - https://intercom.help/simpler-trading/en/articles/6384452-about-big-3-signals
+
+    This indicator is a combination of SqueezePro, Directional Movement Index and Stacked EMAs to determine the signal of the asset.
+    If the asset is in a bullish trend and the squeeze status is high, it is considered a strong buy signal.
+    If the asset is in a bullish trend and the squeeze status is medium, it is considered a weak buy signal.
+    If the asset is in a bearish trend and the squeeze status is high, it is considered a strong sell signal.
+    If the asset is in a bearish trend and the squeeze status is medium, it is considered a weak sell signal.
+
+    If `compact` is True, the signal is returned as int8 instead of float64.
+    """
+    signal, _ = _big3(feed)
+    return signal if compact else signal.astype(np.float64)
+
+
+def big3_flags(feed):
+    """Trend, stacked EMA and keltner channel flags of the Big3 indicator packed into one uint8 per bar
+
+    Test a flag with e.g. `big3_flags(feed) & Big3Flags.BULLISH_TREND`.
+    """
+    _, flags = _big3(feed)
+    return flags
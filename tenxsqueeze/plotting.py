@@ -649,3 +649,30 @@ def plot_bt_run_wrapper(
         width=width,
         height=height,
     )
+
+
+def plot_archived_run(
+    artifacts: dict,
+    n: int = 0,
+    freq: datetime.timedelta = datetime.timedelta(minutes=5),
+    width: int = None,
+    height: int = None,
+):
+    """`plot_bt_run` of a run archived by `ProgressCerebro(archive=True)`, see `ResultStore.get_artifacts`. The
+    indicators are not archived and are left out"""
+    dt = undo_backtrader_dt(pd.Series(pd.to_datetime([bt.num2date(x) for x in artifacts["datetime"]])))
+    plot_bt_run(
+        dt,
+        artifacts["open"],
+        artifacts["high"],
+        artifacts["low"],
+        artifacts["close"],
+        entries=artifacts["entries"],
+        exits=artifacts["exits"],
+        trades=artifacts["trades"],
+        cum_pnl=artifacts.get("value"),
+        n=n,
+        freq=freq,
+        width=width,
+        height=height,
+    )
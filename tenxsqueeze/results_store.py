@@ -0,0 +1,287 @@
+"""This module contains an SQLite store of the backtest results, replacing the results_N.csv files
+
+Every run is one row keyed by the strategy, the start and end of its data and a hash of its parameters (see
+`ProgressCerebro.get_id_keys`). The parameters and metrics of the runs are columns of a single table, new ones are
+added as they appear, so a change of the metrics never splits the results. `load` selects columns and filters on them
+in SQLite, so only the requested part of a sweep is read into pandas.
+
+The detailed outputs of a run (see `BaseStrategy.artifacts`) can be archived next to the database as one compressed
+.npz file per run, keyed the same way.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from .disk_cache import DiskCache
+
+# Columns identifying a run, the other columns are its parameters and metrics
+KEY_COLUMNS = ("strategy", "start", "end", "params_hash")
+
+
+def _quote(name: str):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _to_sql(value):
+    """`value` as a type sqlite3 can store"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, "item"):
+        # numpy scalar
+        return value.item()
+    return str(value)
+
+
+def _type_name(value):
+    """Name of the type `value` is stored as, recorded so that bools can be read back as bools"""
+    return "bool" if isinstance(value, (bool, np.bool_)) else type(_to_sql(value)).__name__
+
+
+def format_value(value):
+    """`value` as `csv.writer` writes it, which is what the parameters are hashed by"""
+    return "" if value is None else str(value)
+
+
+def parse_value(value: str):
+    """`value` read back from a results csv file, typed the way `pd.read_csv` would"""
+    if value == "":
+        return None
+    if value in ("True", "False"):
+        return value == "True"
+    for cast in (int, float):
+        try:
+            return cast(value)
+        except ValueError:
+            pass
+    return value
+
+
+def hash_params(keys: dict):
+    """Canonical hash of the id keys of a run. Columns starting with an uppercase letter are metrics and not part of
+    the key"""
+    items = sorted((k, format_value(v)) for k, v in keys.items() if not k[0].isupper())
+    return hashlib.blake2b(json.dumps(items).encode(), digest_size=16).hexdigest()
+
+
+class ResultStore:
+    """Results of the backtests in an SQLite database at `path`
+
+    Each process and thread uses its own connection. The database is in WAL mode, so the optimization workers can look
+    up cached runs while the results of the others are written.
+    """
+
+    # Stores opened by this process, see `open`
+    _opened = {}
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._columns = None
+        self._types = None
+
+    @classmethod
+    def open(cls, path: str):
+        """Store at `path`, shared by the callers of this process"""
+        path = os.path.abspath(path)
+        if path not in cls._opened:
+            cls._opened[path] = cls(path)
+        return cls._opened[path]
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    @property
+    def connection(self):
+        # Connections don't survive a fork, a forked worker opens its own
+        if getattr(self._local, "pid", None) != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=60)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (strategy TEXT, start TEXT, \"end\" TEXT, params_hash TEXT, "
+                "row_columns TEXT, PRIMARY KEY (strategy, start, \"end\", params_hash))"
+            )
+            # Type of the first value stored in each column, SQLite keeps bools as integers
+            conn.execute("CREATE TABLE IF NOT EXISTS column_types (name TEXT PRIMARY KEY, type TEXT)")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            self._columns = None
+            self._types = None
+        return self._local.conn
+
+    @property
+    def columns(self):
+        """Parameter and metric columns of the results table"""
+        if self._columns is None:
+            info = self.connection.execute("PRAGMA table_info(results)").fetchall()
+            self._columns = [row[1] for row in info if row[1] not in KEY_COLUMNS and row[1] != "row_columns"]
+        return self._columns
+
+    @property
+    def types(self):
+        """Type names of the parameter and metric columns, see `_type_name`"""
+        if self._types is None:
+            self._types = dict(self.connection.execute("SELECT name, type FROM column_types").fetchall())
+        return self._types
+
+    def _bool_columns(self, columns: list):
+        if any(col not in self.types for col in columns):
+            # Another process added columns
+            self._types = None
+        return [col for col in columns if self.types.get(col) == "bool"]
+
+    def get(self, strategy: str, start, end, keys: dict):
+        """Stored row of the run with id `keys` as a pandas Series of its parameters and metrics, or None if it was not
+        run"""
+        found = self.connection.execute(
+            'SELECT * FROM results WHERE strategy = ? AND start = ? AND "end" = ? AND params_hash = ?',
+            (str(strategy), str(start), str(end), hash_params(keys)),
+        ).fetchone()
+        if found is None:
+            return None
+        if len(found) != len(KEY_COLUMNS) + 1 + len(self.columns):
+            # Another process added columns
+            self._columns = None
+        values = dict(zip(list(KEY_COLUMNS) + ["row_columns"] + self.columns, found))
+        row = {col: values[col] for col in json.loads(values["row_columns"])}
+        for col in self._bool_columns(list(row)):
+            if row[col] is not None:
+                row[col] = np.bool_(row[col])
+        return pd.Series(row)
+
+    def put_many(self, rows: list):
+        """Store `rows` of (strategy, start, end, keys, metrics). A run which is already stored is left as it is"""
+        conn = self.connection
+        # Types are only remembered once the transaction which stores them has committed
+        new_types = {}
+        with conn:
+            known = set(self.columns)
+            for *_, keys, metrics in rows:
+                for col in list(keys) + list(metrics):
+                    if col not in known:
+                        conn.execute(f"ALTER TABLE results ADD COLUMN {_quote(col)}")
+                        known.add(col)
+                        self._columns = None
+
+            for *_, keys, metrics in rows:
+                for col, value in {**keys, **metrics}.items():
+                    if value is not None and col not in self.types and col not in new_types:
+                        conn.execute("INSERT OR IGNORE INTO column_types VALUES (?, ?)", (col, _type_name(value)))
+                        new_types[col] = _type_name(value)
+
+            for strategy, start, end, keys, metrics in rows:
+                values = {**keys, **metrics}
+                columns = list(KEY_COLUMNS) + ["row_columns"] + list(values)
+                conn.execute(
+                    f"INSERT OR IGNORE INTO results ({', '.join(map(_quote, columns))}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    [str(strategy), str(start), str(end), hash_params(keys), json.dumps(list(values))]
+                    + [_to_sql(v) for v in values.values()],
+                )
+        self.types.update(new_types)
+
+    def load(self, columns: list = None, strategy: str = None, start=None, end=None, **filters):
+        """Results as a DataFrame, with only `columns` (all if None) besides the run keys
+
+        `strategy`, `start` and `end` select the runs of a strategy and data range. Each of `filters` maps a parameter
+        or metric to a value, a list of values or a (low, high) tuple of inclusive bounds, either of which may be None.
+        """
+        conditions, params = [], []
+        for col, value in {"strategy": strategy, "start": start, "end": end}.items():
+            if value is not None:
+                conditions.append(f"{_quote(col)} = ?")
+                params.append(str(value))
+        for col, value in filters.items():
+            if isinstance(value, tuple):
+                low, high = value
+                if low is not None:
+                    conditions.append(f"{_quote(col)} >= ?")
+                    params.append(_to_sql(low))
+                if high is not None:
+                    conditions.append(f"{_quote(col)} <= ?")
+                    params.append(_to_sql(high))
+            elif isinstance(value, (list, set)):
+                conditions.append(f"{_quote(col)} IN ({', '.join('?' * len(value))})")
+                params.extend(_to_sql(v) for v in value)
+            else:
+                conditions.append(f"{_quote(col)} = ?")
+                params.append(_to_sql(value))
+
+        selected = list(KEY_COLUMNS) + (self.columns if columns is None else list(columns))
+        query = f"SELECT {', '.join(map(_quote, selected))} FROM results"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        frame = pd.read_sql_query(query, self.connection, params=params)
+        for col in self._bool_columns(selected[len(KEY_COLUMNS) :]):
+            frame[col] = frame[col].astype(bool if frame[col].notna().all() else "boolean")
+        return frame
+
+    def index(self, *columns: str):
+        """Index `columns` so that `load` can filter on them without scanning the table"""
+        name = "idx_" + hashlib.blake2b(json.dumps(columns).encode(), digest_size=8).hexdigest()
+        with self.connection as conn:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON results ({', '.join(map(_quote, columns))})")
+
+    def import_csv(self, root: str):
+        """Import the results_N.csv files under `root`, laid out as strategy_<name>/start_<start>/end_<end>/ by the
+        previous versions of `ProgressCerebro`. Returns the number of rows read"""
+        count = 0
+        for directory, _, files in os.walk(root):
+            parts = os.path.relpath(directory, root).split(os.sep)
+            if len(parts) != 3 or not all(p.startswith(f"{k}_") for p, k in zip(parts, KEY_COLUMNS)):
+                continue
+            strategy, start, end = (p.split("_", 1)[1] for p in parts)
+            rows = []
+            for name in files:
+                if not name.endswith(".csv"):
+                    continue
+                with open(os.path.join(directory, name), newline="") as f:
+                    reader = csv.reader(f)
+                    header = next(reader, None)
+                    for values in reader:
+                        row = {k: parse_value(v) for k, v in zip(header, values)}
+                        keys = {k: v for k, v in row.items() if not k[0].isupper()}
+                        metrics = {k: v for k, v in row.items() if k[0].isupper()}
+                        rows.append((strategy, start, end, keys, metrics))
+            self.put_many(rows)
+            count += len(rows)
+        return count
+
+    def artifact_path(self, strategy: str, start, end, params_hash: str):
+        """Archive file of the artifacts of a run, in a directory of the runs of the strategy and data range"""
+        run = hashlib.blake2b(f"{strategy}|{start}|{end}".encode(), digest_size=8).hexdigest()
+        return os.path.join(os.path.dirname(self.path), "artifacts", run, f"{params_hash}.npz")
+
+    def put_artifacts(self, strategy: str, start, end, keys: dict, artifacts: dict):
+        """Archive the `artifacts` of the run with id `keys` as a compressed .npz of their arrays"""
+        arrays = {}
+        spec = DiskCache._encode(artifacts, arrays)
+        path = self.artifact_path(strategy, start, end, hash_params(keys))
+
+        # Write to a temporary file first so readers never see a partial archive
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = os.path.join(os.path.dirname(path), f".tmp_{uuid.uuid4().hex}.npz")
+        np.savez_compressed(tmp, spec=np.frombuffer(json.dumps(spec).encode(), dtype=np.uint8), **arrays)
+        os.replace(tmp, path)
+
+    def get_artifacts(self, strategy: str, start, end, params_hash: str):
+        """Artifacts of a run as archived by `put_artifacts`, or None if they were not. The arguments are the key
+        columns of a row returned by `load`"""
+        try:
+            with np.load(self.artifact_path(strategy, start, end, params_hash), allow_pickle=False) as npz:
+                arrays = {name: npz[name] for name in npz.files}
+        except FileNotFoundError:
+            return None
+        spec = json.loads(arrays.pop("spec").tobytes())
+        return DiskCache._decode(spec, arrays)
@@ -0,0 +1,625 @@
+"""This module contains an array-based simulator of the `TenXSqueeze` strategy for parameter sweeps
+
+`Driver.run` evaluates every combination of a sweep through backtrader's event machinery: the indicators, the broker,
+the notifications and the analyzers all run on every replayed tick. `TenXSqueezeSimulator` reproduces the same backtest
+from the arrays of a `feeds.IntrabarArrays`. The stateless indicators come from `feeds.indicator_lines` and are shared by
+every combination with the same lengths. The good momentum line is computed up front and a force off only masks it up
+to the next zero cross. Ticks are stepped one by one only while an order is working or a position is open, stretches
+without a position jump straight to the next entry signal.
+
+Only what `Driver.run` sets up is modelled: one unit per trade, market entries and closes, `StopTrail` stop losses and
+take profits, a percentage commission and no slippage. The metrics are those of `BacktraderResult.compact_analysis`.
+Backtrader stays the reference implementation, `Driver.run(intrabar_replay=True)` with the same parameters gives the
+same entries, exits and metrics.
+"""
+
+import bisect
+import collections
+import itertools
+import sys
+
+import backtrader as bt
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from . import feeds
+
+COMPLETED, CANCELED, MARGIN, REJECTED = "Completed", "Canceled", "Margin", "Rejected"
+
+
+class _Order:
+    """Order of the simulated broker, a market order if `trail` is None and a `StopTrail` order otherwise
+
+    `price` is the close the order was created on, or the stop price of a trailing order. `trail` is an amount if
+    `trail_amount` is set and a percent of the price otherwise. `status` stays None while the order is working.
+    """
+
+    __slots__ = (
+        "size",
+        "price",
+        "tick",
+        "trail",
+        "trail_amount",
+        "parent",
+        "active",
+        "status",
+        "executed",
+        "bracket",
+        "leader",
+        "group",
+    )
+
+    def __init__(self, size: int, close: float, tick: int, trail=None, trail_amount=True, parent=None, oco=None):
+        self.size = size
+        self.price = close
+        self.tick = tick
+        self.trail = trail
+        self.trail_amount = trail_amount
+        self.parent = parent
+        self.active = parent is None
+        self.status = None
+        self.executed = None
+
+        # A parent holds the orders of its bracket until the bracket is cancelled
+        self.bracket = [self] if parent is None else None
+        if parent is not None:
+            parent.bracket.append(self)
+
+        # The leader of a one cancels others group holds the group until one of its orders is done
+        self.group = None
+        self.leader = self if oco is None else oco.leader
+        if self.leader.group is None:
+            self.leader.group = []
+        self.leader.group.append(self)
+
+        if trail is not None:
+            self.price = float("inf") if size > 0 else float("-inf")
+            self.trail_adjust(close)
+
+    def trail_adjust(self, price: float):
+        if self.trail_amount and self.trail:
+            amount = self.trail
+        elif not self.trail_amount and self.trail:
+            amount = price * self.trail
+        else:
+            amount = 0.0
+
+        # Stop buys are above the price and stop sells below, the stop only moves towards the price
+        if self.size > 0:
+            price += amount
+            if price < self.price:
+                self.price = price
+        else:
+            price -= amount
+            if price > self.price:
+                self.price = price
+
+
+class _Broker:
+    """The parts of `bt.brokers.BackBroker` used by the strategy, stepped one tick at a time
+
+    Orders submitted on a tick are checked against the cash and accepted on the next tick. Market orders fill at the open
+    of the first tick after they were created and stops trigger on the open, high and low of a tick. Cash, commission and
+    value follow the stock-like percentage commission of `setcommission` with short cash.
+    """
+
+    def __init__(self, cash: float, commission: float):
+        self.cash = cash
+        self.commission = commission
+        self.size = 0
+        self.price = 0.0
+        self.submitted = []
+        self.pending = collections.deque()
+        self.activate = []
+        self.notifications = []
+        # Bar, direction and commission of the open trade, the number of trades opened and (pnl, pnlcomm, long, barlen)
+        # of each closed trade
+        self.trade = None
+        self.opened = 0
+        self.trades = []
+
+    def value(self, close: float):
+        if self.size > 0:
+            # Backtrader takes the unrealized pnl out of a long position and adds it back, which can round differently
+            # from the position value alone
+            unrealized = self.size * (close - self.price)
+            return self.cash + ((self.size * close - unrealized) + unrealized)
+        return self.cash + self.size * close
+
+    def next(self, tick: int, bar_len: int, o: float, h: float, l: float, c: float):
+        """Process the orders on a tick and return the value after it"""
+        for order in self.activate:
+            order.active = True
+        self.activate = []
+
+        if self.submitted:
+            self.check_submitted()
+
+        pending = self.pending
+        if pending:
+            pending.append(None)
+            while True:
+                order = pending.popleft()
+                if order is None:
+                    break
+                if not order.active:
+                    pending.append(order)
+                    continue
+
+                if order.trail is None:
+                    # Market orders can only execute after the tick they were created on
+                    if tick > order.tick:
+                        self.execute(order, o, bar_len)
+                elif order.size > 0:
+                    if o >= order.price:
+                        self.execute(order, o, bar_len)
+                    elif h >= order.price:
+                        self.execute(order, order.price, bar_len)
+                else:
+                    if o <= order.price:
+                        self.execute(order, o, bar_len)
+                    elif l <= order.price:
+                        self.execute(order, order.price, bar_len)
+
+                if order.status is None:
+                    if order.trail is not None:
+                        order.trail_adjust(c)
+                    pending.append(order)
+                elif order.status is COMPLETED:
+                    self.bracketize(order)
+
+        return self.value(c)
+
+    def check_submitted(self):
+        # Pseudo-execute the orders at their price to check the cash
+        cash, size = self.cash, self.size
+        for order in self.submitted:
+            if order.parent is not None and order.parent.bracket is None:
+                # The parent was not accepted
+                self.notify(order, REJECTED)
+                continue
+
+            price = order.price
+            if size:
+                cash += -order.size * price
+            else:
+                cash -= order.size * price
+            cash -= abs(order.size) * self.commission * price
+            size += order.size
+
+            if cash >= 0.0:
+                self.pending.append(order)
+            else:
+                self.notify(order, MARGIN)
+                self.oco_check(order)
+                self.bracket_cancel(order)
+        self.submitted = []
+
+    def execute(self, order: _Order, price: float, bar_len: int):
+        size = order.size
+        commission = abs(size) * self.commission * price
+        if self.size:
+            # Close the position
+            pnl = -size * (price - self.price)
+            self.cash += -size * self.price + pnl
+            self.cash -= commission
+
+            baropen, long, open_commission = self.trade
+            self.trades.append((pnl, pnl - (open_commission + commission), long, bar_len - baropen))
+            self.trade = None
+            self.size, self.price = 0, 0.0
+        else:
+            cash = self.cash - size * price
+            cash -= commission
+            if cash < 0.0:
+                # Not enough cash to open the position
+                self.notify(order, MARGIN)
+                self.oco_check(order)
+                self.bracket_cancel(order)
+                return
+
+            self.cash = cash
+            self.size, self.price = size, price
+            self.trade = (bar_len, size > 0, commission)
+            self.opened += 1
+
+        order.executed = price
+        self.notify(order, COMPLETED)
+        self.oco_check(order)
+
+    def notify(self, order: _Order, status: str):
+        order.status = status
+        self.notifications.append((order, status))
+
+    def cancel(self, order: _Order, bracket=False):
+        if order is None or order not in self.pending:
+            return False
+
+        self.pending.remove(order)
+        self.notify(order, CANCELED)
+        self.oco_check(order)
+        if not bracket:
+            self.bracket_cancel(order)
+        return True
+
+    def oco_check(self, order: _Order):
+        group, order.leader.group = order.leader.group, None
+        if group:
+            for i in range(len(self.pending) - 1, -1, -1):
+                other = self.pending[i]
+                if other is not None and other in group:
+                    del self.pending[i]
+                    self.notify(other, CANCELED)
+
+    def bracket_cancel(self, order: _Order):
+        parent = order.parent or order
+        bracket, parent.bracket = parent.bracket, None
+        for other in bracket or []:
+            self.cancel(other, bracket=True)
+
+    def bracketize(self, order: _Order):
+        """Activate the children of an executed parent, or cancel the rest of the bracket of an executed child"""
+        if order.parent is None:
+            if order.bracket:
+                self.activate.extend(order.bracket[1:])
+                order.bracket = order.bracket[1:]
+        else:
+            self.bracket_cancel(order)
+
+
+class _DrawDown:
+    """`bt.analyzers.DrawDown` fed with the value of one or more consecutive ticks"""
+
+    def __init__(self):
+        self.max_value = float("-inf")
+        self.len = 0
+        self.drawdown = 0.0
+        self.moneydown = 0.0
+        self.max_len = 0.0
+        self.max_drawdown = 0.0
+        self.max_moneydown = 0.0
+
+    def update(self, value: float, ticks: int = 1):
+        if ticks <= 0:
+            return
+
+        self.max_value = max(self.max_value, value)
+        self.moneydown = self.max_value - value
+        self.drawdown = 100.0 * self.moneydown / self.max_value
+        self.max_moneydown = max(self.max_moneydown, self.moneydown)
+        self.max_drawdown = max(self.max_drawdown, self.drawdown)
+        # The drawdown is the same for the other ticks
+        self.len = self.len + ticks if self.drawdown else 0
+        self.max_len = max(self.max_len, self.len)
+
+
+def _trade_analysis(opened: int, trades: list):
+    """The `bt.analyzers.TradeAnalyzer` statistics reported by `compact_analysis`, empty if no trade was closed"""
+    if not trades:
+        return {}
+
+    total_pnl = net_pnl = 0.0
+    won_total = lost_total = long_total = short_total = long_won = long_lost = short_won = short_lost = 0
+    won_max = lost_max = None
+    len_total, len_max, len_min = 0, None, None
+    won_streak = lost_streak = won_longest = lost_longest = 0
+    for pnl, pnlcomm, long, barlen in trades:
+        won = int(pnlcomm >= 0.0)
+        lost = int(not won)
+        short = not long
+
+        won_streak = won_streak * won + won
+        won_longest = max(won_longest, won_streak)
+        lost_streak = lost_streak * lost + lost
+        lost_longest = max(lost_longest, lost_streak)
+
+        total_pnl += pnl
+        net_pnl += pnlcomm
+        won_total += won
+        lost_total += lost
+        won_max = max(won_max or 0.0, pnlcomm * won)
+        lost_max = min(lost_max or 0.0, pnlcomm * lost)
+
+        long_total += long
+        short_total += short
+        long_won += won * long
+        long_lost += lost * long
+        short_won += won * short
+        short_lost += lost * short
+
+        len_total += barlen
+        len_max = max(len_max or 0, barlen)
+        len_min = min(len_min or sys.maxsize, barlen)
+
+    closed = len(trades)
+    return {
+        "Total Trades": opened,
+        "Trades Won": won_total,
+        "Trades Lost": lost_total,
+        "Win Percentage": won_total / opened * 100,
+        "Loss Percentage": lost_total / opened * 100,
+        "Average PnL": net_pnl / closed,
+        "Gross PnL": total_pnl,
+        "Net PnL": net_pnl,
+        "Largest Winning Trade": won_max,
+        "Largest Losing Trade": lost_max,
+        "Long Trades": long_total,
+        "Short Trades": short_total,
+        "Long Trades Won": long_won,
+        "Long Trades Lost": long_lost,
+        "Short Trades Won": short_won,
+        "Short Trades Lost": short_lost,
+        "Total Trades Duration": len_total,
+        "Average Trade Duration": len_total / closed,
+        "Max Trade Duration": len_max,
+        "Min Trade Duration": len_min,
+        "Longest Winning Streak": won_longest,
+        "Longest Losing Streak": lost_longest,
+    }
+
+
+class _Signals:
+    """Lines of `TenXSqueeze` for one set of indicator lengths, as lists for the tick loop
+
+    `long` and `short` are the entry conditions other than the good momentum and `good_momentum` is the line of
+    `MomentumReversal` without force offs. A force off on a tick of bar b keeps the line at 0 up to `reset[b]`, the
+    first tick of the next bar where the momentum crossed 0. `signals` and `good_signals` are the ticks from the first
+    bar the strategy runs on where it would enter, without and with the good momentum condition.
+    """
+
+    def __init__(self, lines: dict, bar: np.ndarray, first: np.ndarray, squeeze_pro_length, atr_length, adx_length):
+        n, n_bars = len(bar), bar[-1] + 1 if len(bar) else 0
+        last = np.flatnonzero(np.r_[first[1:], True])
+        momentum = lines[f"momentum_{squeeze_pro_length}"]
+
+        with np.errstate(invalid="ignore"):
+            # Momentum of the two previous bars
+            prev = np.r_[np.nan, momentum[last][:-1]]
+            prev_prev = np.r_[np.nan, prev[:-1]]
+            squeeze_off = lines[f"squeeze_status_{squeeze_pro_length}_{atr_length}"] == 0
+            long = squeeze_off & (lines[f"d_up_{adx_length}"] != 0) & (momentum > 0) & (momentum > prev[bar])
+            short = (
+                ~long & squeeze_off & (lines[f"d_down_{adx_length}"] != 0) & (momentum < 0) & (momentum < prev[bar])
+            )
+
+            cross = prev * prev_prev <= 0
+            decreasing = (np.abs(momentum) < np.abs(prev[bar])) & (np.abs(prev) < np.abs(prev_prev))[bar]
+
+        # The value at the end of each bar carries over to the next bar unless the momentum crossed 0 or decreased
+        closing = pd.Series(np.where(cross, 1.0, np.where(decreasing[last], 0.0, np.nan))).ffill().values
+        good_momentum = np.where(cross[bar], 1.0, np.where(decreasing, 0.0, np.r_[np.nan, closing[:-1]][bar]))
+
+        crosses = np.flatnonzero(cross)
+        following = np.searchsorted(crosses, np.arange(n_bars), side="right")
+        self.reset = np.r_[np.flatnonzero(first), n][np.r_[crosses, n_bars][following]].tolist()
+
+        # Minimum period of the strategy in the precomputed indicators
+        self.start = max(2 * squeeze_pro_length - 1, atr_length + 1, 2 * adx_length)
+        enter = (long | short) & (bar + 1 >= self.start)
+        self.signals = np.flatnonzero(enter).tolist()
+        self.good_signals = np.flatnonzero(enter & (good_momentum == 1)).tolist()
+
+        self.long = long.tolist()
+        self.short = short.tolist()
+        self.good_momentum = good_momentum.tolist()
+        self.atr = lines[f"atr_{atr_length}"].tolist()
+
+
+class SimulationResult:
+    """Outcome of a simulated `TenXSqueeze` backtest
+
+    `entries` and `exits` are recorded like `BaseStrategy` does and `compact_analysis` returns the same metrics as
+    `BacktraderResult.compact_analysis`.
+    """
+
+    def __init__(self, params: dict, entries: list, exits: list, stats: dict):
+        self.params = params
+        self.entries = entries
+        self.exits = exits
+        self.stats = stats
+
+    def compact_analysis(self):
+        return self.stats
+
+
+class TenXSqueezeSimulator:
+    """Simulates the `TenXSqueeze` strategy on the ticks of an `IntrabarArrays` with the broker of `Driver.run`"""
+
+    params = dict(
+        squeeze_pro_length=20,
+        atr_length=10,
+        adx_length=14,
+        tp_trail_percent=0.4,
+        sl_trail_percent=0.7,
+        percent_is_atr=True,
+        tp_atr_multiplier=2.3,
+        max_trade_duration=9,
+        use_good_momentum=True,
+    )
+
+    def __init__(self, intrabar: feeds.IntrabarArrays, cash: float = 100000.0, commission: float = 0.0006):
+        self.intrabar = intrabar
+        self.cash = cash
+        self.commission = commission
+
+        ticks = intrabar.ticks.columns
+        self._open, self._high, self._low, self._close = (
+            np.asarray(ticks[col], dtype=np.float64).tolist() for col in ["open", "high", "low", "close"]
+        )
+        self._bar = np.cumsum(intrabar.first) - 1
+        self._bar_len = (self._bar + 1).tolist()
+        self._lines = {}
+        self._signals = (None, None)
+
+    def prepare(self, squeeze_pro_length=20, atr_length=10, adx_length=14):
+        """Compute the indicator lines for every length, each length may be a list"""
+        lines = feeds.indicator_lines(
+            self.intrabar.to_frame(),
+            self.intrabar.compression,
+            squeeze_pro_length=squeeze_pro_length,
+            atr_length=atr_length,
+            adx_length=adx_length,
+        )
+        self._lines.update({col: lines[col].values for col in lines.columns})
+
+    def signals(self, squeeze_pro_length: int, atr_length: int, adx_length: int):
+        key = (squeeze_pro_length, atr_length, adx_length)
+        if self._signals[0] != key:
+            if not all(
+                col in self._lines
+                for col in [
+                    f"squeeze_status_{squeeze_pro_length}_{atr_length}",
+                    f"momentum_{squeeze_pro_length}",
+                    f"atr_{atr_length}",
+                    f"d_up_{adx_length}",
+                ]
+            ):
+                self.prepare(*key)
+            self._signals = (key, _Signals(self._lines, self._bar, self.intrabar.first, *key))
+        return self._signals[1]
+
+    def run(self, **params):
+        """Simulate one backtest. Parameters default to those of `TenXSqueeze`
+
+        Returns:
+            A `SimulationResult`
+        """
+        params = {**self.params, **params}
+        signals = self.signals(params["squeeze_pro_length"], params["atr_length"], params["adx_length"])
+        tp_trail_percent, sl_trail_percent = params["tp_trail_percent"], params["sl_trail_percent"]
+        percent_is_atr, tp_atr_multiplier = params["percent_is_atr"], params["tp_atr_multiplier"]
+        max_trade_duration, use_good_momentum = params["max_trade_duration"], params["use_good_momentum"]
+
+        tick_open, tick_high, tick_low, tick_close, bar_len = (
+            self._open,
+            self._high,
+            self._low,
+            self._close,
+            self._bar_len,
+        )
+        atr, good_momentum, enter_long, enter_short = (
+            signals.atr,
+            signals.good_momentum,
+            signals.long,
+            signals.short,
+        )
+        candidates = signals.good_signals if use_good_momentum else signals.signals
+
+        broker = _Broker(self.cash, self.commission)
+        drawdown = _DrawDown()
+        entry = tp = sl = None
+        entry_bar = 0
+        # Ticks before this one have the good momentum forced off
+        forced_until = 0
+        entries, exits = [], []
+
+        n = len(tick_close)
+        value = broker.value(0.0)
+        t = 0
+        while t < n:
+            if not broker.size and entry is None and tp is None and not broker.pending and not broker.submitted:
+                # Nothing changes until the strategy enters again
+                i = bisect.bisect_left(candidates, max(t, forced_until) if use_good_momentum else t)
+                until = candidates[i] if i < len(candidates) else n
+                value = broker.value(0.0)
+                drawdown.update(value, until - t)
+                t = until
+                if t == n:
+                    break
+
+            b, close = bar_len[t], tick_close[t]
+            value = broker.next(t, b, tick_open[t], tick_high[t], tick_low[t], close)
+            drawdown.update(value)
+
+            for order, status in broker.notifications:
+                if status is COMPLETED:
+                    if order is entry:
+                        entries.append((order.size, t, order.executed, b))
+                        entry_bar = b
+                        entry = None
+                    elif order is tp or order is sl:
+                        # Reset the good momentum when a trade is closed
+                        forced_until = signals.reset[b - 1]
+                        exits.append((-order.size, t, order.executed, "tp" if order is tp else "sl"))
+                        if order is tp:
+                            tp = None
+                        else:
+                            sl = None
+                elif order is entry:
+                    entry = None
+                elif order is tp:
+                    tp = None
+                elif order is sl:
+                    sl = None
+            broker.notifications = []
+
+            # The strategy acts once its minimum period is over and while no entry or take profit order is pending
+            ready = b >= signals.start and entry is None and tp is None
+            if ready and not broker.size:
+                if not use_good_momentum or (t >= forced_until and good_momentum[t] == 1):
+                    direction = 1 if enter_long[t] else -1 if enter_short[t] else 0
+                    if direction:
+                        trail = sl_trail_percent * atr[t] if percent_is_atr else sl_trail_percent
+                        entry = _Order(direction, close, t)
+                        sl = _Order(-direction, close, t, trail, percent_is_atr, parent=entry)
+                        broker.submitted += [entry, sl]
+            elif ready:
+                size, price, target = broker.size, broker.price, tp_atr_multiplier * atr[t]
+                if (close >= price + target and size > 0) or (close <= price - target and size < 0):
+                    trail = tp_trail_percent * atr[t] if percent_is_atr else tp_trail_percent
+                    tp = _Order(-size, close, t, trail, percent_is_atr, oco=sl)
+                    broker.submitted.append(tp)
+
+                if b - entry_bar >= max_trade_duration and tp is None:
+                    broker.cancel(sl)
+                    sl = _Order(-size, close, t)
+                    broker.submitted.append(sl)
+            t += 1
+
+        datetime = self.intrabar.partial.datetime
+        entries = [
+            {
+                "direction": "long" if size > 0 else "short",
+                "time": bt.num2date(datetime[t]),
+                "filled_price": price,
+                "bar_len": b,
+            }
+            for size, t, price, b in entries
+        ]
+        exits = [
+            {
+                "direction": "long" if size > 0 else "short",
+                "time": bt.num2date(datetime[t]),
+                "filled_price": price,
+                "type": kind,
+            }
+            for size, t, price, kind in exits
+        ]
+        stats = {
+            "End Value": value,
+            **_trade_analysis(broker.opened, broker.trades),
+            "Length": drawdown.len,
+            "Drawdown": drawdown.drawdown * 100,
+            "Moneydown": drawdown.moneydown,
+            "Max Length": drawdown.max_len,
+            "Max Drawdown": drawdown.max_drawdown * 100,
+            "Max Moneydown": drawdown.max_moneydown,
+        }
+        return SimulationResult(params, entries, exits, stats)
+
+    def sweep(self, progress_bar=False, **params):
+        """Simulate every combination of the parameters given as lists, in the order `cerebro.optstrategy` runs them
+
+        Returns:
+            A DataFrame with the parameters and the `compact_analysis` metrics of each combination
+        """
+        params = {k: v if isinstance(v, list) else [v] for k, v in {**self.params, **params}.items()}
+        self.prepare(params["squeeze_pro_length"], params["atr_length"], params["adx_length"])
+
+        rows = []
+        combinations = list(itertools.product(*params.values()))
+        for values in tqdm(combinations, disable=not progress_bar):
+            combination = dict(zip(params, values))
+            rows.append({**combination, **self.run(**combination).compact_analysis()})
+        return pd.DataFrame(rows)
@@ -7,31 +7,144 @@ import numpy as np
 import pandas as pd
 from tqdm import tqdm
 
-from ..pandas_indicators import big3
+from .. import numpy_indicators as ni
+from ..disk_cache import indicator_cache, memoize
+
+
+def resample_ohlcv(feed: pd.DataFrame, freqs: list, session_anchor: str = "9h30min"):
+    """Aggregate ohlcv candlesticks into several larger timeframes in one pass
+
+    Buckets are `freq` wide and aligned to `session_anchor` past midnight (in the wall time of the index), so hourly bars
+    start on the half hour like the market open. Bucket boundaries come from the int64 timestamps and each column is
+    reduced with `reduceat`. When a timeframe is a multiple of a smaller one, it is aggregated from the smaller result.
+    Empty buckets are dropped and the labels keep the resolution of the index, like `DataFrame.resample`.
+
+    Returns a dict mapping each freq to its aggregated feed.
+    """
+    anchor = pd.Timedelta(session_anchor).value
+    index = feed.index.tz_localize(None) if feed.index.tz is not None else feed.index
+    timestamps = index.values.astype("datetime64[ns]").view(np.int64)
+    columns = [col for col in ["open", "high", "low", "close", "volume"] if col in feed.columns]
+    reducers = {"high": np.fmax, "low": np.fmin, "volume": np.add}
+
+    ret = {}
+    source_freq, source_times, source = 1, timestamps, {col: feed[col].values for col in columns}
+    for freq in sorted(freqs, key=lambda f: pd.Timedelta(f).value):
+        freq_ns = pd.Timedelta(freq).value
+        if freq_ns % source_freq != 0:
+            source_freq, source_times, source = 1, timestamps, {col: feed[col].values for col in columns}
+
+        bucket = (source_times - anchor) // freq_ns
+        starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+        ends = np.r_[starts[1:], len(bucket)] - 1
+
+        values = {}
+        for col in columns:
+            if col == "open":
+                values[col] = source[col][starts]
+            elif col == "close":
+                values[col] = source[col][ends]
+            else:
+                values[col] = reducers[col].reduceat(source[col], starts)
+
+        times = bucket[starts] * freq_ns + anchor
+        labels = pd.DatetimeIndex(times.astype("datetime64[ns]"), name=feed.index.name).as_unit(index.unit)
+        ret[freq] = pd.DataFrame(values, index=labels.tz_localize(feed.index.tz) if feed.index.tz else labels)
+
+        source_freq, source_times, source = freq_ns, times, values
+
+    return ret
 
 
 def agg_ohlcv(feed: pd.DataFrame, freq: str):
     """Aggregate ohlcv candlesticks into a larger timeframe"""
-    if freq == "60min":
-        # shift the feed +30m and then -30m to align candlesticks with the hour
-        return (
-            feed.shift(freq="30min")
-            .groupby(pd.Grouper(freq=freq))
-            .agg({"open": "first", "high": "max", "low": "min", "close": "last"})
-            .dropna()
-            .shift(freq="-30min")
-        )
-    else:
-        return (
-            feed.groupby(pd.Grouper(freq=freq))
-            .agg({"open": "first", "high": "max", "low": "min", "close": "last"})
-            .dropna()
-        )
-
-
-def add_signal(feed: pd.DataFrame):  #
-    """Compute big3 signal for a ohlcv feed"""
-    return feed.assign(big3=big3(feed))
+    return resample_ohlcv(feed, [freq])[freq]
+
+
+@memoize(indicator_cache)
+def add_signal(feed: pd.DataFrame, compact: bool = False):  #
+    """Compute big3 signal for a ohlcv feed. If `compact` is True, the signal is stored as int8"""
+    signal = ni.big3(feed.high.values, feed.low.values, feed.close.values)["signal"]
+    return feed.assign(big3=signal.astype(np.int8) if compact else signal)
+
+
+def add_signal_panel(feeds: dict, compact: bool = False):
+    """Compute big3 signal for a dict of ohlcv feeds in one vectorized pass over the aligned (time x ticker) panel.
+    If `compact` is True, the signal is stored as int8"""
+    panel = pd.concat({ticker: feed[["high", "low", "close"]] for ticker, feed in feeds.items()}, axis=1)
+    high, low, close = (panel.xs(col, axis=1, level=1) for col in ["high", "low", "close"])
+    signal = pd.DataFrame(
+        ni.big3_panel(high.values, low.values, close.values)["signal"], index=panel.index, columns=high.columns
+    )
+    return {
+        ticker: feed.assign(big3=signal[ticker].reindex(feed.index).astype(np.int8 if compact else np.float64))
+        for ticker, feed in feeds.items()
+    }
+
+
+def get_signal_feeds(data_5m: pd.DataFrame, compact: bool = False):
+    """Aggregate a 5m feed into the 5m, 15m, 30m and 60m timeframes and compute the big3 signal on each"""
+    aggregated = resample_ohlcv(data_5m, ["15min", "30min", "60min"])
+    return [add_signal(feed, compact=compact) for feed in [data_5m, *aggregated.values()]]
+
+
+def get_signal_feeds_panel(tickers: dict, compact: bool = False):
+    """Same as `get_signal_feeds` for every ticker, with the signal of each timeframe computed as one panel"""
+    aggregated = {ticker: resample_ohlcv(data_5m, ["15min", "30min", "60min"]) for ticker, data_5m in tickers.items()}
+    timeframes = [add_signal_panel(tickers, compact=compact)] + [
+        add_signal_panel({ticker: aggregated[ticker][freq] for ticker in tickers}, compact=compact)
+        for freq in ["15min", "30min", "60min"]
+    ]
+    return {ticker: [feeds[ticker] for feeds in timeframes] for ticker in tickers}
+
+
+def get_runs(mask: np.ndarray):
+    """Start positions and lengths of the runs of True in a boolean array"""
+    edges = np.diff(np.r_[0, np.asarray(mask, dtype=np.int8), 0])
+    starts = np.flatnonzero(edges == 1)
+    return starts, np.flatnonzero(edges == -1) - starts
+
+
+def consecutive_events(pos_mask: np.ndarray, neg_mask: np.ndarray, n_range: list):
+    """Positions of the groups of n consecutive bars where a mask is set, for every n in `n_range`.
+    A group is the first n bars of a run of at least n bars which is preceded by an unset bar. The runs of each mask are
+    found once and shared by every n.
+
+    Returns a dict mapping each n to (start, end, direction) int arrays, positive groups first. `end` is inclusive and
+    `direction` is 1 for groups of `pos_mask` and -1 for groups of `neg_mask`.
+    """
+    runs = [(get_runs(mask), direction) for mask, direction in [(pos_mask, 1), (neg_mask, -1)]]
+
+    ret = {}
+    for n in n_range:
+        starts = [starts[(lengths >= n) & (starts > 0)] for (starts, lengths), _ in runs]
+        start = np.concatenate(starts)
+        direction = np.concatenate([np.full(len(s), d) for s, (_, d) in zip(starts, runs)])
+        ret[n] = (start, start + n - 1, direction)
+    return ret
+
+
+def partial_events(pos_mask: np.ndarray, neg_mask: np.ndarray, nq_range: list):
+    """Positions of the groups of q bars where a mask is set on exactly n bars, for every (n, q) in `nq_range`.
+    A group must end on a set bar and be preceded by an unset bar. The window counts come from one cumulative sum of
+    each mask.
+
+    Returns a dict mapping each (n, q) to (start, end, direction) int arrays like `consecutive_events`.
+    """
+    masks = [np.asarray(mask, dtype=bool) for mask in (pos_mask, neg_mask)]
+    counts = [np.r_[0, np.cumsum(mask)] for mask in masks]
+
+    ret = {}
+    for n, q in nq_range:
+        end = np.arange(q, len(masks[0]))
+        ends = [
+            end[~mask[end - q] & mask[end] & (count[end + 1] - count[end - q + 1] == n)]
+            for mask, count in zip(masks, counts)
+        ]
+        end = np.concatenate(ends)
+        direction = np.concatenate([np.full(len(e), d) for e, d in zip(ends, [1, -1])])
+        ret[(n, q)] = (end - q + 1, end, direction)
+    return ret
 
 
 def get_tail(feed: pd.DataFrame, group: pd.DataFrame, t: int):
@@ -52,6 +165,36 @@ def price_movement(feed: pd.DataFrame, profit_dir: int):
     }
 
 
+def get_outcomes(feed: pd.DataFrame, T_range: list):
+    """Precompute the price over the next T bars of every bar for each T in `T_range`.
+    Row i of each table holds the open of bar i+1 and the max high, min low and last close of bars i+1 to i+T, which is
+    what `price_movement` reduces from `get_tail`. Rows with fewer than T bars after them are NaN.
+
+    Returns a dict mapping each T to a dict of `open`, `high`, `low` and `close` arrays.
+    """
+    open_next = np.r_[feed.open.values[1:], np.nan]
+    ret = {}
+    for T in T_range:
+        # Shift the trailing windows ending at bar i+T back onto bar i
+        ret[T] = {
+            "open": open_next,
+            "high": feed.high.rolling(T).max().shift(-T).values,
+            "low": feed.low.rolling(T).min().shift(-T).values,
+            "close": feed.close.shift(-T).values,
+        }
+    return ret
+
+
+def price_movements(outcome: dict, end: np.ndarray, profit_dir: np.ndarray):
+    """Vectorized `price_movement` for the groups ending at the positions in `end`, from one table of `get_outcomes`"""
+    p_open, p_close, p_max, p_min = (outcome[col][end] for col in ["open", "close", "high", "low"])
+    return {
+        "min": 100 * np.where(profit_dir == 1, (p_min - p_open) / p_open, (p_open - p_max) / p_open),
+        "max": 100 * np.where(profit_dir == 1, (p_max - p_open) / p_open, (p_open - p_min) / p_open),
+        "final": 100 * (p_close - p_open) / p_open * profit_dir,
+    }
+
+
 def launch_mp_job(tickers: dict, function, **kwargs):
     num_processes = multiprocessing.cpu_count()
     pool = multiprocessing.Pool(num_processes)
@@ -65,3 +208,15 @@ def launch_mp_job(tickers: dict, function, **kwargs):
     ret = [item for sublist in results for item in sublist]
 
     return ret
+
+
+def launch_panel_job(tickers: dict, function, **kwargs):
+    """Single process alternative to `launch_mp_job`. Signals for all tickers are computed up front as panels and the
+    per-ticker analysis receives the precomputed feeds instead of the raw 5m data"""
+    signal_feeds = get_signal_feeds_panel(tickers)
+
+    results = [function(item, **kwargs) for item in tqdm(signal_feeds.items(), total=len(signal_feeds))]
+
+    ret = [item for sublist in results for item in sublist]
+
+    return ret
@@ -6,70 +6,85 @@ The analysis determines how long the signal needs to be present before favourabl
 import numpy as np
 import pandas as pd
 
-from .common import add_signal, agg_ohlcv, get_tail, price_movement
+from .common import (
+    consecutive_events,
+    get_outcomes,
+    get_signal_feeds,
+    price_movements,
+)
 
 
-def get_consecutive_groups(feeds: list, n_consecutive: int = 2):
+def get_timeframe_map(feeds: list):
+    """Maps each bar of the base (first) feed to the position of the bar enclosing it in every feed.
+    Returns an int array of shape (len(base), len(feeds)) which is -1 where a feed has no bar yet.
+    """
+    base = feeds[0].index
+    return np.stack([feed.index.searchsorted(base, side="right") - 1 for feed in feeds], axis=1)
+
+
+def get_merged_signal(feeds: list, timeframe_map: np.ndarray = None):
+    """Gets the big3 signal of every feed aligned onto the bars of the base (first) feed, one column per feed.
+    The timeframe map can be precomputed with `get_timeframe_map` and reused for subsets of the feeds.
+    """
+    timeframe_map = get_timeframe_map(feeds) if timeframe_map is None else timeframe_map
+    # The appended NaN is picked up by the -1 positions before the first bar of a feed
+    signals = [np.append(feed.big3.values, np.nan)[positions] for feed, positions in zip(feeds, timeframe_map.T)]
+    return pd.DataFrame(np.stack(signals, axis=1), index=feeds[0].index, columns=["big3"] * len(feeds))
+
+
+def get_consecutive_groups(feeds: list, n_consecutive: int = 2, merged_sig: pd.DataFrame = None):
     """Gets a list of groups, where each group is a consecutive firing of the signal across all timeframes for n_consecutive bars.
     Note: strong (+-2) and weak (+-1) signals are treated as the same.
     If the signal is repeated after the group, only the first instance will be captured.
     """
-    merged_sig = pd.concat(feeds, axis=1).ffill().big3
-    pos_groups = [
-        merged_sig.loc[group.index[1:]]
-        for group in (merged_sig > 0).all(axis=1).rolling(n_consecutive + 1)
-        if group.iloc[1:].sum() == n_consecutive and group.iloc[0] == 0
-    ]
-    neg_groups = [
-        merged_sig.loc[group.index[1:]]
-        for group in (merged_sig < 0).all(axis=1).rolling(n_consecutive + 1)
-        if group.iloc[1:].sum() == n_consecutive and group.iloc[0] == 0
-    ]
-    return pos_groups + neg_groups
-
-
-def get_partial_groups(feeds: list, n_consecutive: int = 2, thresh: float = 0.5):
+    merged_sig = get_merged_signal(feeds) if merged_sig is None else merged_sig
+    start, end, _ = consecutive_events(*get_agreement(merged_sig), [n_consecutive])[n_consecutive]
+    return [merged_sig.iloc[s : e + 1] for s, e in zip(start, end)]
+
+
+def get_partial_groups(feeds: list, n_consecutive: int = 2, thresh: float = 0.5, merged_sig: pd.DataFrame = None):
     """Gets a list of groups, where each group is a consecutive firing of the signal across all timeframes for n_consecutive bars.
     Note: strong (+-2) and weak (+-1) signals are treated as the same.
     If the signal is repeated after the group, only the first instance will be captured.
     """
-    merged_sig = pd.concat(feeds, axis=1).ffill().big3
-    pos_groups = [
-        merged_sig.loc[group.index[1:]]
-        for group in ((merged_sig > 0).sum(axis=1) / len(feeds) > thresh).rolling(n_consecutive + 1)
-        if group.iloc[1:].sum() == n_consecutive and group.iloc[0] == 0
-    ]
-    neg_groups = [
-        merged_sig.loc[group.index[1:]]
-        for group in ((merged_sig < 0).sum(axis=1) / len(feeds) > thresh).rolling(n_consecutive + 1)
-        if group.iloc[1:].sum() == n_consecutive and group.iloc[0] == 0
-    ]
-    return pos_groups + neg_groups
+    merged_sig = get_merged_signal(feeds) if merged_sig is None else merged_sig
+    start, end, _ = consecutive_events(*get_agreement(merged_sig, thresh), [n_consecutive])[n_consecutive]
+    return [merged_sig.iloc[s : e + 1] for s, e in zip(start, end)]
+
+
+def get_agreement(merged_sig: pd.DataFrame, thresh: float = None):
+    """Gets the masks of bars where the signal is positive and negative across all timeframes of the merged signal, or
+    across more than `thresh` of them"""
+    sig = merged_sig.values
+    if thresh is None:
+        return (sig > 0).all(axis=1), (sig < 0).all(axis=1)
+    return (sig > 0).sum(axis=1) / sig.shape[1] > thresh, (sig < 0).sum(axis=1) / sig.shape[1] > thresh
 
 
 def analyze_ticker_consecutive(dict_item, N_range, T_range):
     """For each timeframe, get all groups of N consecutive signals. For each group, get the price movement over the next T bars."""
     try:
-        ticker, data_5m = dict_item
-        data_15m = add_signal(agg_ohlcv(data_5m, "15min"))
-        data_30m = add_signal(agg_ohlcv(data_5m, "30min"))
-        data_60m = add_signal(agg_ohlcv(data_5m, "60min"))
-        data_5m = add_signal(data_5m)
+        ticker, data = dict_item
+        # Feeds may already have been computed by launch_panel_job
+        data_5m, data_15m, data_30m, data_60m = data if isinstance(data, list) else get_signal_feeds(data)
 
         results = []
 
         DATAS = [data_5m, data_15m, data_30m, data_60m]
+        # Aligned once and sliced for every number of timeframes
+        merged_all = get_merged_signal(DATAS)
+        outcomes = get_outcomes(data_5m, T_range)
 
         for n_timeframes in [2, 3, 4]:
-            feeds = DATAS[:n_timeframes]
-            feed_5m = feeds[0]
+            merged_sig = merged_all.iloc[:, :n_timeframes]
+            events = consecutive_events(*get_agreement(merged_sig), N_range)
             for N in N_range:
-                signal_groups = get_consecutive_groups(feeds, N)
-                for group in signal_groups:
-                    price_dir = np.sign(group.iloc[0, 0])
+                start, end, _ = events[N]
+                price_dir = np.sign(merged_sig.values[start, 0])
+                movements = {T: price_movements(outcomes[T], end, price_dir) for T in T_range}
+                for i in range(len(start)):
                     for T in T_range:
-                        tail = get_tail(feed_5m, group, T)
-                        if len(tail) < T:
+                        if end[i] + T >= len(data_5m):
                             continue
                         results.append(
                             {
@@ -77,10 +92,10 @@ def analyze_ticker_consecutive(dict_item, N_range, T_range):
                                 "n_tf": n_timeframes,
                                 "N": N,
                                 "T": T,
-                                **price_movement(tail, price_dir),
-                                "start": group.index[0],
-                                "end": tail.index[-1],
-                                "dir": price_dir,
+                                **{k: v[i] for k, v in movements[T].items()},
+                                "start": data_5m.index[start[i]],
+                                "end": data_5m.index[end[i] + T],
+                                "dir": price_dir[i],
                             }
                         )
         return results
@@ -94,27 +109,30 @@ def analyze_ticker_consecutive(dict_item, N_range, T_range):
 def analyze_ticker_partial(dict_item, N_range, thresh_range, T_range):
     """For each timeframe, get all groups of N consecutive signals. For each group, get the price movement over the next T bars."""
     try:
-        ticker, data_5m = dict_item
-        data_15m = add_signal(agg_ohlcv(data_5m, "15min"))
-        data_30m = add_signal(agg_ohlcv(data_5m, "30min"))
-        data_60m = add_signal(agg_ohlcv(data_5m, "60min"))
-        data_5m = add_signal(data_5m)
+        ticker, data = dict_item
+        # Feeds may already have been computed by launch_panel_job
+        data_5m, data_15m, data_30m, data_60m = data if isinstance(data, list) else get_signal_feeds(data)
 
         results = []
 
         DATAS = [data_5m, data_15m, data_30m, data_60m]
+        # Aligned once and sliced for every number of timeframes
+        merged_all = get_merged_signal(DATAS)
+        outcomes = get_outcomes(data_5m, T_range)
 
         for n_timeframes in [2, 3, 4]:
-            feeds = DATAS[:n_timeframes]
-            feed_5m = feeds[0]
+            merged_sig = merged_all.iloc[:, :n_timeframes]
+            events = {
+                thresh: consecutive_events(*get_agreement(merged_sig, thresh), N_range) for thresh in thresh_range
+            }
             for N in N_range:
                 for thresh in thresh_range:
-                    signal_groups = get_partial_groups(feeds, N, thresh)
-                    for group in signal_groups:
-                        price_dir = np.sign(group.iloc[0, 0])
+                    start, end, _ = events[thresh][N]
+                    price_dir = np.sign(merged_sig.values[start, 0])
+                    movements = {T: price_movements(outcomes[T], end, price_dir) for T in T_range}
+                    for i in range(len(start)):
                         for T in T_range:
-                            tail = get_tail(feed_5m, group, T)
-                            if len(tail) < T:
+                            if end[i] + T >= len(data_5m):
                                 continue
                             results.append(
                                 {
@@ -123,10 +141,10 @@ def analyze_ticker_partial(dict_item, N_range, thresh_range, T_range):
                                     "N": N,
                                     "thresh": thresh,
                                     "T": T,
-                                    **price_movement(tail, price_dir),
-                                    "start": group.index[0],
-                                    "end": tail.index[-1],
-                                    "dir": price_dir,
+                                    **{k: v[i] for k, v in movements[T].items()},
+                                    "start": data_5m.index[start[i]],
+                                    "end": data_5m.index[end[i] + T],
+                                    "dir": price_dir[i],
                                 }
                             )
         return results
@@ -6,51 +6,37 @@ The analysis determines how long the signal needs to be present before favourabl
 import numpy as np
 import pandas as pd
 
-from .common import add_signal, agg_ohlcv, get_tail, price_movement
+from .common import (
+    consecutive_events,
+    get_outcomes,
+    get_signal_feeds,
+    partial_events,
+    price_movements,
+)
 
 
 def get_consecutive_groups(sig: pd.Series, n_consecutive: int = 2):
     """Gets a list of groups, where each group is a consecutive firing of the signal for n_consecutive bars. Note: strong (+-2) and weak (+-1) signals are treated as the same.
     If the signal is repeated after the group, only the first instance will be captured.
     """
-    pos_groups = [
-        sig.loc[group.index[1:]]
-        for group in (sig > 0).rolling(n_consecutive + 1)
-        if group.iloc[1:].sum() == n_consecutive and group.iloc[0] == 0
-    ]
-    neg_groups = [
-        sig.loc[group.index[1:]]
-        for group in (sig < 0).rolling(n_consecutive + 1)
-        if group.iloc[1:].sum() == n_consecutive and group.iloc[0] == 0
-    ]
-    return pos_groups + neg_groups
+    start, end, _ = consecutive_events(sig.values > 0, sig.values < 0, [n_consecutive])[n_consecutive]
+    return [sig.iloc[s : e + 1] for s, e in zip(start, end)]
 
 
 def get_partial_groups(sig: pd.Series, q: int = 5, n: int = 2):
     """Returns a list of groups of length q where at least n bars have a signal in the same direction.
     If the signal is repeated after the group, only the first instance will be captured.
     """
-    pos_groups = [
-        sig.loc[group.index[1:]]
-        for group in (sig > 0).rolling(q + 1)
-        if group.iloc[1:].sum() == n and group.iloc[0] == 0 and group.iloc[-1] == 1
-    ]
-    neg_groups = [
-        sig.loc[group.index[1:]]
-        for group in (sig < 0).rolling(q + 1)
-        if group.iloc[1:].sum() == n and group.iloc[0] == 0 and group.iloc[-1] == 1
-    ]
-    return pos_groups + neg_groups
+    start, end, _ = partial_events(sig.values > 0, sig.values < 0, [(n, q)])[(n, q)]
+    return [sig.iloc[s : e + 1] for s, e in zip(start, end)]
 
 
 def analyze_ticker_consecutive(dict_item, N_range, T_range):
     """For each timeframe, get all groups of N consecutive signals. For each group, get the price movement over the next T bars."""
     try:
-        ticker, data_5m = dict_item
-        data_15m = add_signal(agg_ohlcv(data_5m, "15min"))
-        data_30m = add_signal(agg_ohlcv(data_5m, "30min"))
-        data_60m = add_signal(agg_ohlcv(data_5m, "60min"))
-        data_5m = add_signal(data_5m)
+        ticker, data = dict_item
+        # Feeds may already have been computed by launch_panel_job
+        data_5m, data_15m, data_30m, data_60m = data if isinstance(data, list) else get_signal_feeds(data)
 
         results = []
 
@@ -58,13 +44,16 @@ def analyze_ticker_consecutive(dict_item, N_range, T_range):
             ["5m", "15m", "30m", "60m"],
             [data_5m, data_15m, data_30m, data_60m],
         ):
+            sig = feed.big3.values
+            events = consecutive_events(sig > 0, sig < 0, N_range)
+            outcomes = get_outcomes(feed, T_range)
             for N in N_range:
-                signal_groups = get_consecutive_groups(feed.big3, N)
-                for group in signal_groups:
-                    price_dir = np.sign(group.iloc[0])
+                start, end, _ = events[N]
+                price_dir = np.sign(sig[start])
+                movements = {T: price_movements(outcomes[T], end, price_dir) for T in T_range}
+                for i in range(len(start)):
                     for T in T_range:
-                        tail = get_tail(feed, group, T)
-                        if len(tail) < T:
+                        if end[i] + T >= len(feed):
                             continue
                         results.append(
                             {
@@ -72,10 +61,10 @@ def analyze_ticker_consecutive(dict_item, N_range, T_range):
                                 "tf": tf,
                                 "N": N,
                                 "T": T,
-                                **price_movement(tail, price_dir),
-                                "start": group.index[0],
-                                "end": tail.index[-1],
-                                "dir": price_dir,
+                                **{k: v[i] for k, v in movements[T].items()},
+                                "start": feed.index[start[i]],
+                                "end": feed.index[end[i] + T],
+                                "dir": price_dir[i],
                             }
                         )
         return results
@@ -89,11 +78,9 @@ def analyze_ticker_consecutive(dict_item, N_range, T_range):
 def analyze_ticker_partial(dict_item, NQ_range, T_range):
     """For each timeframe, get all groups of N signals in Q bars. For each group, get the price movement over the next T bars."""
     try:
-        ticker, data_5m = dict_item
-        data_15m = add_signal(agg_ohlcv(data_5m, "15min"))
-        data_30m = add_signal(agg_ohlcv(data_5m, "30min"))
-        data_60m = add_signal(agg_ohlcv(data_5m, "60min"))
-        data_5m = add_signal(data_5m)
+        ticker, data = dict_item
+        # Feeds may already have been computed by launch_panel_job
+        data_5m, data_15m, data_30m, data_60m = data if isinstance(data, list) else get_signal_feeds(data)
 
         results = []
 
@@ -101,13 +88,18 @@ def analyze_ticker_partial(dict_item, NQ_range, T_range):
             ["5m", "15m", "30m", "60m"],
             [data_5m, data_15m, data_30m, data_60m],
         ):
+            sig = feed.big3.values
+            sig_sum = np.r_[0, np.cumsum(sig)]
+            events = partial_events(sig > 0, sig < 0, NQ_range)
+            outcomes = get_outcomes(feed, T_range)
             for N, Q in NQ_range:
-                signal_groups = get_partial_groups(feed.big3, Q, N)
-                for group in signal_groups:
-                    price_dir = np.sign(group.sum())
+                start, end, _ = events[(N, Q)]
+                # Direction of the sum of the signal over the group
+                price_dir = np.sign(sig_sum[end + 1] - sig_sum[start])
+                movements = {T: price_movements(outcomes[T], end, price_dir) for T in T_range}
+                for i in range(len(start)):
                     for T in T_range:
-                        tail = get_tail(feed, group, T)
-                        if len(tail) < T:
+                        if end[i] + T >= len(feed):
                             continue
                         results.append(
                             {
@@ -116,10 +108,10 @@ def analyze_ticker_partial(dict_item, NQ_range, T_range):
                                 "N": N,
                                 "Q": Q,
                                 "T": T,
-                                **price_movement(tail, price_dir),
-                                "start": group.index[0],
-                                "end": tail.index[-1],
-                                "dir": price_dir,
+                                **{k: v[i] for k, v in movements[T].items()},
+                                "start": feed.index[start[i]],
+                                "end": feed.index[end[i] + T],
+                                "dir": price_dir[i],
                             }
                         )
         return results
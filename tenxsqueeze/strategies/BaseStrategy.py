@@ -8,6 +8,7 @@ import sys
 from copy import deepcopy
 
 import backtrader as bt
+import numpy as np
 import pandas as pd
 import pyutil
 import tqdm
@@ -49,7 +50,13 @@ class BaseStrategy(BacktraderResult, bt.Strategy):
             if os.path.exists(self.p.log_file):
                 os.remove(self.p.log_file)
 
-        self.cerebro.p.tradehistory = self.p.logging
+        self.cerebro.p.tradehistory = self.record_trades
+
+    @property
+    def record_trades(self):
+        """Whether closed trades are recorded in `trades`, for the logs or for the archive of the run (see
+        `artifacts`)"""
+        return self.p.logging or getattr(self.cerebro.p, "archive", False)
 
     def log_order(self, order, only_completed=False):
         if only_completed and order.status != order.Completed:
@@ -183,3 +190,31 @@ class BaseStrategy(BacktraderResult, bt.Strategy):
     def stop(self):
         if self.p.progress_bar:
             del self.progress
+
+    def artifacts(self):
+        """Detailed outputs of the finished run, as archived by `ProgressCerebro(archive=True)`
+
+        Holds the `entries`, `exits` and `trades`, the bar times and OHLC of the strategy's clock, the `value` observer
+        and the returns of the pyfolio analyzer, the latter two if they were added. See `plotting.plot_archived_run`.
+        """
+        artifacts = {
+            "entries": pd.DataFrame(self.entries),
+            "exits": pd.DataFrame(self.exits),
+            "trades": pd.DataFrame(self.trades),
+            "datetime": np.asarray(self.datetime.array),
+            "open": np.asarray(self.datafeed.open.array),
+            "high": np.asarray(self.datafeed.high.array),
+            "low": np.asarray(self.datafeed.low.array),
+            "close": np.asarray(self.datafeed.close.array),
+        }
+
+        value = getattr(self.observers, "value", None)
+        if value is not None:
+            artifacts["value"] = np.asarray(value.array)
+
+        pyfolio = self.get_analyzer(bt.analyzers.PyFolio)
+        if pyfolio is not None:
+            returns = pyfolio.get_analysis()["returns"]
+            artifacts["returns"] = pd.Series(list(returns.values()), index=pd.DatetimeIndex(list(returns.keys())))
+
+        return artifacts
@@ -57,7 +57,7 @@ class MTFB3(bt.Strategy):
 
         self.order_info = []
 
-        self.cerebro.p.tradehistory = self.p.logging
+        self.cerebro.p.tradehistory = self.p.logging or getattr(self.cerebro.p, "archive", False)
 
         n_timeframes = 1
         while hasattr(self, f"data{n_timeframes}") and getattr(getattr(self, f"data{n_timeframes}"), "replaying"):
@@ -40,19 +40,40 @@ class TenXSqueeze(BaseStrategy):
     def __init__(self):
         super().__init__()
 
-        self.sp = bi.SqueezePro(
-            bb_length=self.p.squeeze_pro_length,
-            kc_length=self.p.squeeze_pro_length,
-            mom_length=self.p.squeeze_pro_length,
-            atr_length=self.p.atr_length,
-        )
-        self.tenx = bi.TenXBars(
-            dir_length=self.p.adx_length,
-        )
-
-        self.good_momentum = bi.MomentumReversal(period=self.p.squeeze_pro_length)
-
-        self.atr = bt.ind.AverageTrueRange(period=self.p.atr_length, movav=bi.RMA)
+        memo = None
+        precomputed = f"atr_{self.p.atr_length}" in self.datafeed.getlinealiases()
+        if not precomputed and getattr(self.cerebro.p, "memo_indicators", False):
+            # Stateless indicators are computed once per process for each set of lengths (see `feeds.IndicatorMemo`)
+            memo = self.datafeed.memo_lines(
+                squeeze_pro_length=self.p.squeeze_pro_length,
+                atr_length=self.p.atr_length,
+                adx_length=self.p.adx_length,
+            )
+
+        if precomputed or memo is not None:
+            # Stateless indicators were precomputed on the feed (see `Driver.run(precompute_indicators=True)`)
+            self.sp = bi.PrecomputedSqueezePro(
+                length=self.p.squeeze_pro_length, atr_length=self.p.atr_length, memo=memo
+            )
+            self.tenx = bi.PrecomputedTenXBars(dir_length=self.p.adx_length, memo=memo)
+            self.atr = bi.FeedLine(
+                name=f"atr_{self.p.atr_length}",
+                minperiod=self.p.atr_length + 1,
+                values=memo[f"atr_{self.p.atr_length}"] if memo is not None else None,
+            )
+        else:
+            self.sp = bi.SqueezePro(
+                bb_length=self.p.squeeze_pro_length,
+                kc_length=self.p.squeeze_pro_length,
+                mom_length=self.p.squeeze_pro_length,
+                atr_length=self.p.atr_length,
+            )
+            self.tenx = bi.TenXBars(
+                dir_length=self.p.adx_length,
+            )
+            self.atr = bi.shared(bt.ind.AverageTrueRange, period=self.p.atr_length, movav=bi.RMA)
+
+        self.good_momentum = bi.MomentumReversal(period=self.p.squeeze_pro_length, memo=memo)
 
         self.position_line = bi.Position()
 
@@ -63,7 +84,7 @@ class TenXSqueeze(BaseStrategy):
             bt.And(self.datafeed.close <= self.lower_atr, self.position_line.size < 0),
         )
 
-        self.cerebro.p.tradehistory = self.p.logging
+        self.cerebro.p.tradehistory = self.record_trades
 
     def trail_order(self, method, percent, **kwargs):
         return method(
@@ -72,7 +93,23 @@ class TenXSqueeze(BaseStrategy):
             **kwargs,
         )
 
+    def atr_targets(self):
+        """Take profit levels above and below the position price, the current values of `upper_atr` and `lower_atr`
+
+        These are read from the position and ATR directly since in runonce mode the lines built on `bi.Position` are only
+        brought up to date once the run is over.
+        """
+        price, atr = self.position_line.price[0], self.atr[0]
+        return price + self.p.tp_atr_multiplier * atr, price - self.p.tp_atr_multiplier * atr
+
+    def atr_crossed(self):
+        upper_atr, lower_atr = self.atr_targets()
+        return (self.datafeed.close[0] >= upper_atr and self.position_line.size[0] > 0) or (
+            self.datafeed.close[0] <= lower_atr and self.position_line.size[0] < 0
+        )
+
     def log_datas(self):
+        upper_atr, lower_atr = self.atr_targets()
         log_values = {
             "#": len(self.datafeed),
             "O": f"{self.datafeed.open[0]} ({self.datafeed.tick_open})",
@@ -80,10 +117,10 @@ class TenXSqueeze(BaseStrategy):
             "L": f"{self.datafeed.low[0]} ({self.datafeed.tick_low})",
             "C": f"{self.datafeed.close[0]} ({self.datafeed.tick_close})",
             "ATR": self.atr[0],
-            "uATR": self.upper_atr[0],
-            "lATR": self.lower_atr[0],
+            "uATR": upper_atr,
+            "lATR": lower_atr,
             "SZ": self.position_line.price[0],
-            "ATRx": self.atr_cross[0],
+            "ATRx": float(self.atr_crossed()),
             # "bb_basis": self.sp.bb_basis[0],
             # "kc_basis": self.sp.kc_basis[0],
             # "bb_upper": self.sp.bb_upper[0],
@@ -105,6 +142,9 @@ class TenXSqueeze(BaseStrategy):
         self.log(log_values)
 
     def notify_order(self, order):
+        if order.status in [order.Completed]:
+            self.position_line.update()
+
         if order in [self.tp_order, self.sl_order] and order.status in [order.Completed]:
             # Reset the good_momentum indicator when a trade is closed
             self.good_momentum.force_off()
@@ -133,9 +173,7 @@ class TenXSqueeze(BaseStrategy):
 
         else:
             # In the market
-            if (self.datafeed.close[0] >= self.upper_atr[0] and self.position_line.size > 0) or (
-                self.datafeed.close[0] <= self.lower_atr[0] and self.position_line.size < 0
-            ):
+            if self.atr_crossed():
                 self.log("TP exit triggered")
                 self.tp_order = self.trail_order(self.close, self.p.tp_trail_percent, oco=self.sl_order)
 
@@ -145,3 +183,7 @@ class TenXSqueeze(BaseStrategy):
                 self.sl_order = self.close()
 
         super().next()
+
+    def stop(self):
+        self.position_line.replay_operations()
+        super().stop()
@@ -0,0 +1,330 @@
+"""This module contains the 10xsqueeze indicators implemented as incremental state objects
+
+Each class is the streaming counterpart of a function in `pandas_indicators`. Calling `update` with the next bar costs
+O(1) and returns the value the batch function would produce for that bar, so a live scan can be kept current without
+recomputing the full history. Leading NaN inputs are skipped the same way talib skips them.
+"""
+
+import math
+from collections import deque
+
+
+class RMA:
+    """Running Moving Average - incremental `rma` (pandas ewm with adjust=False)"""
+
+    def __init__(self, length=20):
+        self.alpha = 1 / length
+        self.value = math.nan
+        self._old_wt = 1.0
+
+    def update(self, x: float):
+        # Mirrors the pandas ewm recursion so the output is bit for bit identical
+        if math.isnan(self.value):
+            self.value = x
+            return self.value
+
+        self._old_wt *= 1 - self.alpha
+        if not math.isnan(x):
+            if self.value != x:
+                self.value = (self._old_wt * self.value + self.alpha * x) / (self._old_wt + self.alpha)
+            self._old_wt = 1.0
+        return self.value
+
+
+class TrueRange:
+    """True Range - incremental `true_range`. The first bar is the high-low range"""
+
+    def __init__(self):
+        self.prev_close = None
+        self.value = math.nan
+
+    def update(self, high: float, low: float, close: float):
+        if self.prev_close is None:
+            self.value = high - low
+        else:
+            self.value = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        return self.value
+
+
+class SMA:
+    """Simple Moving Average over a ring buffer of the last `length` values - incremental talib.SMA"""
+
+    def __init__(self, length=20):
+        self.length = length
+        self.window = deque(maxlen=length)
+        self.total = 0.0
+        self.value = math.nan
+
+    def update(self, x: float):
+        if math.isnan(x) and not self.window:
+            return self.value
+
+        if len(self.window) == self.length:
+            self.total -= self.window[0]
+        self.window.append(x)
+        self.total += x
+        if len(self.window) == self.length:
+            self.value = self.total / self.length
+        return self.value
+
+
+class BollingerBands:
+    """Bollinger Bands - incremental talib.BBANDS with a simple moving average basis
+
+    The variance is computed from running sums of the deviations from a recent value, which are summed afresh once per
+    window. Running sums of the squared prices would lose it to cancellation and to rounding drift on long streams.
+    """
+
+    def __init__(self, length=20, mult=2):
+        self.length = length
+        self.mult = mult
+        self.sma = SMA(length)
+        self.window = deque(maxlen=length)
+        self.count = 0
+        self.shift = math.nan
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.upper = self.basis = self.lower = math.nan
+
+    def update(self, x: float):
+        if math.isnan(x) and not self.window:
+            return self.upper, self.basis, self.lower
+
+        if len(self.window) == self.length:
+            oldest = self.window[0] - self.shift
+            self.total -= oldest
+            self.total_squares -= oldest * oldest
+        self.window.append(x)
+        self.count += 1
+
+        if self.count % self.length == 1 or self.length == 1:
+            self.shift = x
+            self.total = math.fsum(v - x for v in self.window)
+            self.total_squares = math.fsum((v - x) * (v - x) for v in self.window)
+        else:
+            self.total += x - self.shift
+            self.total_squares += (x - self.shift) * (x - self.shift)
+
+        self.basis = self.sma.update(x)
+        if len(self.window) == self.length:
+            mean = self.total / self.length
+            variance = self.total_squares / self.length - mean * mean
+            # talib treats variances below 1e-8 as zero
+            dev = self.mult * (math.sqrt(variance) if variance >= 1e-8 else 0.0)
+            self.upper = self.basis + dev
+            self.lower = self.basis - dev
+        return self.upper, self.basis, self.lower
+
+
+class Extremum:
+    """Highest or lowest value of the last `length` values using a monotonic deque"""
+
+    def __init__(self, length=20, highest=True):
+        self.length = length
+        self.highest = highest
+        self.candidates = deque()
+        self.count = 0
+        self.value = math.nan
+
+    def update(self, x: float):
+        # Drop values which can never be the extremum again, then values which have left the window
+        while self.candidates and (self.candidates[-1][1] <= x if self.highest else self.candidates[-1][1] >= x):
+            self.candidates.pop()
+        self.candidates.append((self.count, x))
+        if self.candidates[0][0] <= self.count - self.length:
+            self.candidates.popleft()
+
+        self.count += 1
+        if self.count >= self.length:
+            self.value = self.candidates[0][1]
+        return self.value
+
+
+class LinearReg:
+    """Linear Regression end point - incremental talib.LINEARREG
+
+    The sums of the regression are updated as the ring buffer slides, instead of being recomputed over the window.
+    """
+
+    def __init__(self, length=20):
+        self.length = length
+        self.window = deque(maxlen=length)
+        self.sum_y = 0.0
+        self.sum_xy = 0.0
+        self.sum_x = length * (length - 1) * 0.5
+        self.divisor = self.sum_x * self.sum_x - length * length * (length - 1) * (2 * length - 1) / 6
+        self.value = math.nan
+
+    def update(self, y: float):
+        if math.isnan(y) and not self.window:
+            return self.value
+
+        # x is the number of bars back from the newest value, as in talib
+        if len(self.window) == self.length:
+            oldest = self.window[0]
+            self.sum_xy += self.sum_y - self.length * oldest
+            self.sum_y -= oldest
+        else:
+            self.sum_xy += self.sum_y
+        self.window.append(y)
+        self.sum_y += y
+
+        if len(self.window) == self.length:
+            m = (self.length * self.sum_xy - self.sum_x * self.sum_y) / self.divisor
+            b = (self.sum_y - m * self.sum_x) / self.length
+            self.value = b + m * (self.length - 1)
+        return self.value
+
+
+class EMA:
+    """Exponential Moving Average seeded with the SMA of the first `length` values - incremental talib.EMA"""
+
+    def __init__(self, length=20):
+        self.k = 2 / (length + 1)
+        self.seed = SMA(length)
+        self.value = math.nan
+
+    def update(self, x: float):
+        if math.isnan(self.value):
+            self.value = self.seed.update(x)
+        else:
+            self.value = (x - self.value) * self.k + self.value
+        return self.value
+
+
+class SqueezePro:
+    """SqueezePro by SimplerTrading - incremental `squeeze_pro_indicator`
+
+    `update` returns the same tuple as `squeeze_pro_indicator` for the newest bar.
+    """
+
+    def __init__(
+        self,
+        bb_length=20,
+        kc_length=20,
+        mom_length=20,
+        atr_length=10,
+        bb_mult=2,
+        kc_mult={"high": 1, "mid": 1.5, "low": 2},
+    ):
+        self.kc_mult = kc_mult
+        self.bb = BollingerBands(bb_length, bb_mult)
+        self.tr = TrueRange()
+        self.devkc = RMA(atr_length)
+        self.kc_basis = SMA(kc_length)
+        self.highest_high = Extremum(mom_length, highest=True)
+        self.lowest_low = Extremum(mom_length, highest=False)
+        self.sma_close = SMA(mom_length)
+        self.mom = LinearReg(mom_length)
+
+    def update(self, high: float, low: float, close: float):
+        bb_upper, bb_basis, bb_lower = self.bb.update(close)
+
+        # talib.TRANGE is undefined on the first bar after the leading NaNs
+        first_bar = self.tr.prev_close is None or math.isnan(self.tr.prev_close)
+        tr = self.tr.update(high, low, close)
+        devkc = self.devkc.update(math.nan if first_bar else tr)
+        kc_basis = self.kc_basis.update(close)
+
+        kc_upper = {k: kc_basis + mult * devkc for k, mult in self.kc_mult.items()}
+        kc_lower = {k: kc_basis - mult * devkc for k, mult in self.kc_mult.items()}
+
+        if (bb_lower >= kc_lower["high"]) or (bb_upper <= kc_upper["high"]):
+            squeeze_status = "high_squeeze"
+        elif (bb_lower >= kc_lower["mid"]) or (bb_upper <= kc_upper["mid"]):
+            squeeze_status = "mid_squeeze"
+        elif (bb_lower >= kc_lower["low"]) or (bb_upper <= kc_upper["low"]):
+            squeeze_status = "low_squeeze"
+        elif (bb_lower < kc_lower["low"]) or (bb_upper > kc_upper["low"]):
+            squeeze_status = "no_squeeze"
+        else:
+            # squeeze_pro_indicator falls back to high_squeeze when no condition holds (during the warmup period)
+            squeeze_status = "high_squeeze"
+
+        highest_high = self.highest_high.update(high)
+        lowest_low = self.lowest_low.update(low)
+        avg_price = ((highest_high + lowest_low) / 2 + self.sma_close.update(close)) / 2
+        mom = self.mom.update(close - avg_price)
+
+        return kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, squeeze_status, mom
+
+
+class DirectionalMovement:
+    """Directional Movement Index (DMI) - incremental `directional_movement`
+
+    `update` returns (adx, plus, minus) for the newest bar. Unlike the batch function, leading bars with an undefined
+    DI (a zero range first bar) are not back-filled since later bars are not known yet.
+    """
+
+    def __init__(self, dir_length=14):
+        self.tr = TrueRange()
+        self.trur = RMA(dir_length)
+        self.plus_rma = RMA(dir_length)
+        self.minus_rma = RMA(dir_length)
+        self.adx_rma = RMA(dir_length)
+        self.prev_high = self.prev_low = math.nan
+
+    def update(self, high: float, low: float, close: float):
+        up = high - self.prev_high
+        down = self.prev_low - low
+        self.prev_high, self.prev_low = high, low
+        plus_dm = up if up > down and up > 0 else 0
+        minus_dm = down if down > up and down > 0 else 0
+
+        trur = self.trur.update(self.tr.update(high, low, close))
+        plus_rma = self.plus_rma.update(plus_dm)
+        minus_rma = self.minus_rma.update(minus_dm)
+        plus = 100 * plus_rma / trur if trur != 0 else math.nan
+        minus = 100 * minus_rma / trur if trur != 0 else math.nan
+        di_sum = plus + minus
+        adx = 100 * self.adx_rma.update(abs(plus - minus) / (1 if di_sum == 0 else di_sum))
+
+        return adx, plus, minus
+
+
+class StackedEMA:
+    """Stacked Exponential Moving Averages - incremental `p_stacked_ema` and `n_stacked_ema`
+
+    `update` returns (p_stacked, n_stacked) for the newest bar.
+    """
+
+    def __init__(self, lengths=[5, 8, 21, 34, 55, 89]):
+        self.emas = [EMA(length) for length in lengths]
+
+    def update(self, close: float):
+        emas = [ema.update(close) for ema in self.emas]
+        p_stacked = all(emas[i] > emas[i + 1] for i in range(len(emas) - 1))
+        n_stacked = all(emas[i] < emas[i + 1] for i in range(len(emas) - 1))
+        return p_stacked, n_stacked
+
+
+class Big3:
+    """Big3 by SimplerTrading - incremental `big3`
+
+    `update` returns the signal of the newest bar.
+    """
+
+    def __init__(self):
+        self.sp = SqueezePro()
+        self.dm = DirectionalMovement()
+        self.stack = StackedEMA()
+        self.value = 0.0
+
+    def update(self, high: float, low: float, close: float):
+        kc_lower, kc_upper, _, _, _, squeeze_status, _ = self.sp.update(high, low, close)
+        adx, plus_di, minus_di = self.dm.update(high, low, close)
+        p_stack, n_stack = self.stack.update(close)
+
+        bullish_trend = (adx > 20) and (plus_di > minus_di) and p_stack
+        bearish_trend = (adx > 20) and (plus_di < minus_di) and n_stack
+        in_kc = (close >= kc_lower["high"]) and (close <= kc_upper["high"])
+        strength = {"high_squeeze": 2.0, "mid_squeeze": 1.0}.get(squeeze_status, 0.0)
+
+        if bullish_trend and in_kc:
+            self.value = strength
+        elif bearish_trend and in_kc:
+            self.value = -strength
+        else:
+            self.value = 0.0
+        return self.value
@@ -0,0 +1,48 @@
+import cryptomart
+import numpy as np
+import pandas as pd
+import pytest
+
+
+def trending_ohlcv(n=2000, seed=0, start=28000.0, end=64000.0, freq="5min"):
+    """Random walk OHLCV bars drifting from `start` to `end`, in the format of `cryptomart.Client.ohlcv`"""
+    rng = np.random.default_rng(seed)
+    close = np.exp(np.linspace(np.log(start), np.log(end), n) + np.cumsum(rng.normal(0, 0.003, n)))
+    open = np.r_[close[0], close[:-1]]
+    spread = np.abs(rng.normal(0, 0.002, n)) * close
+    return pd.DataFrame(
+        {
+            "open_time": pd.date_range("2022-01-20", periods=n, freq=freq),
+            "open": open,
+            "high": np.maximum(open, close) + spread,
+            "low": np.minimum(open, close) - spread,
+            "close": close,
+            "volume": rng.uniform(1, 10, n),
+        }
+    )
+
+
+def sweep(driver, monkeypatch, results, **kwargs):
+    """Metrics of a `Driver.run` sweep over two take profit targets, read back from a fresh results store at
+    `results` so that none of its runs are cache hits"""
+    monkeypatch.setenv("ACTIVE_DEV_PATH", str(results))
+    driver.run(logging=False, tp_atr_multiplier=[2.0, 2.3], **kwargs)
+    return driver.load_results().sort_values("params_hash").reset_index(drop=True)
+
+
+@pytest.fixture
+def ohlcv():
+    return trending_ohlcv()
+
+
+@pytest.fixture
+def driver(monkeypatch, tmp_path, ohlcv):
+    """`Driver` on `ohlcv` instead of exchange data, saving its results under `tmp_path`"""
+    import tenxsqueeze as txs
+
+    monkeypatch.setattr(cryptomart.Client, "__init__", lambda self, *args, **kwargs: None)
+    monkeypatch.setattr(cryptomart.Client, "ohlcv", lambda self, *args, **kwargs: ohlcv.copy(), raising=False)
+    monkeypatch.setenv("ACTIVE_DEV_PATH", str(tmp_path / "results"))
+    driver = txs.Driver()
+    yield driver
+    driver.shutdown_pool()
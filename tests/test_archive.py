@@ -0,0 +1,21 @@
+import plotly.graph_objects as go
+import pytest
+
+from tenxsqueeze import plotting
+
+
+def test_archive_records_trades_without_logging(driver, monkeypatch):
+    driver.run(logging=False, archive=True)
+    row = driver.load_results().iloc[0]
+    artifacts = driver.load_artifacts(row)
+
+    assert len(artifacts["trades"]) > 0
+    assert len(artifacts["trades"]) == len(artifacts["exits"])
+
+    monkeypatch.setattr(go.Figure, "show", lambda self, *args, **kwargs: None)
+    plotting.plot_archived_run(artifacts)
+
+
+def test_archive_requires_use_cache(driver):
+    with pytest.raises(ValueError):
+        driver.run(archive=True, use_cache=False)
@@ -0,0 +1,66 @@
+import backtrader as bt
+import numpy as np
+import pandas as pd
+import pytest
+
+import tenxsqueeze as txs
+from tenxsqueeze import backtrader_indicators as bi
+
+from .conftest import trending_ohlcv
+
+
+def feed_arrays(n=6000):
+    frame = trending_ohlcv(n=n).set_index("open_time")
+    return txs.feeds.FeedArrays.from_frame(frame)
+
+
+def run(strategy, arrays, runonce, feed_cls=txs.feeds.ArrayData, **params):
+    """Run `strategy` on the unreplayed bars of `arrays`, which is the only way `once` is used"""
+    cerebro = bt.Cerebro()
+    cerebro.adddata(feed_cls(dataname=arrays, timeframe=bt.TimeFrame.Minutes, compression=5))
+    cerebro.addstrategy(strategy, **params)
+    cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="ta")
+    cerebro.addanalyzer(bt.analyzers.DrawDown, _name="dd")
+    cerebro.broker.setcash(100000.0)
+    cerebro.broker.setcommission(commission=0.0006)
+    return cerebro.run(runonce=runonce, stdstats=False)[0]
+
+
+def line(strategy, line):
+    return np.asarray(line.array[: len(strategy)])
+
+
+@pytest.mark.parametrize("precompute", [False, True])
+@pytest.mark.parametrize("max_trade_duration", [9, 2])
+def test_tenxsqueeze_runonce_matches_next(precompute, max_trade_duration):
+    arrays = feed_arrays()
+    feed_cls = txs.feeds.ArrayData
+    if precompute:
+        lines = txs.feeds.indicator_lines(arrays.to_frame(), pd.Timedelta("5min"))
+        arrays = arrays.join(lines)
+        feed_cls = txs.feeds.indicator_data_class(lines.columns)
+    params = dict(logging=False, use_cache=False, max_trade_duration=max_trade_duration)
+
+    once, stepped = (run(txs.TenXSqueeze, arrays, runonce, feed_cls, **params) for runonce in [True, False])
+
+    # Every closed trade forces the good momentum off
+    assert len(stepped.exits) > 50
+    assert once.entries == stepped.entries
+    assert once.exits == stepped.exits
+    assert once.compact_analysis() == stepped.compact_analysis()
+    np.testing.assert_array_equal(line(once, once.good_momentum), line(stepped, stepped.good_momentum))
+    np.testing.assert_array_equal(line(once, once.upper_atr), line(stepped, stepped.upper_atr))
+
+
+class Big3Strategy(bt.Strategy):
+    def __init__(self):
+        self.big3 = bi.Big3()
+
+
+def test_big3_runonce_matches_next():
+    arrays = feed_arrays()
+    once, stepped = (run(Big3Strategy, arrays, runonce) for runonce in [True, False])
+
+    signal = line(stepped, stepped.big3.signal)
+    assert (signal != 0).sum() > 0
+    np.testing.assert_array_equal(line(once, once.big3.signal), signal)
@@ -0,0 +1,93 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+from tenxsqueeze.disk_cache import DiskCache
+
+SCALE = 2
+
+
+def _helper(x):
+    return x * SCALE
+
+
+def compute(x, offset=1):
+    return _helper(x) + offset
+
+
+def key(version=None):
+    return DiskCache().key(compute, {"x": 1, "offset": 1}, version)
+
+
+def test_key_covers_helpers_constants_defaults_and_version(monkeypatch):
+    module = sys.modules[__name__]
+    base = key()
+    assert key() == base
+
+    with monkeypatch.context() as m:
+        m.setattr(module, "_helper", lambda x: x * 3)
+        assert key() != base
+    with monkeypatch.context() as m:
+        m.setattr(module, "SCALE", 3)
+        assert key() != base
+    with monkeypatch.context() as m:
+        m.setattr(compute, "__defaults__", (2,))
+        assert key() != base
+    assert key(version=2) != base
+    assert key() == base
+
+
+def test_put_get_round_trip(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    index = pd.date_range("2022-01-20", periods=50, freq="5min", tz="America/New_York", name="open_time")
+    frame = pd.DataFrame(
+        {"close": np.linspace(1, 2, 50), "signal": np.arange(50, dtype=np.int8), "status": ["high_squeeze"] * 50},
+        index=index,
+    )
+    series = pd.Series(np.arange(50.0), index=pd.RangeIndex(50, name="bar"), name="momentum")
+    values = {
+        "series": series,
+        "frame": frame,
+        "tuple": (frame.close, np.arange(3), series),
+        "dict": {"lower": series, "upper": {"high": frame.close}},
+    }
+
+    for key, value in values.items():
+        cache.put(key, value)
+    pd.testing.assert_series_equal(cache.get("series"), series, check_index_type=False)
+    pd.testing.assert_frame_equal(cache.get("frame"), frame, check_freq=False)
+    close, array, momentum = cache.get("tuple")
+    pd.testing.assert_series_equal(close, frame.close, check_freq=False)
+    np.testing.assert_array_equal(array, np.arange(3))
+    pd.testing.assert_series_equal(momentum, series, check_index_type=False)
+    cached = cache.get("dict")
+    pd.testing.assert_series_equal(cached["lower"], series, check_index_type=False)
+    pd.testing.assert_series_equal(cached["upper"]["high"], frame.close, check_freq=False)
+    assert cache.get("missing") is None
+
+
+def test_get_misses_entry_removed_while_reading(tmp_path):
+    cache = DiskCache(str(tmp_path))
+    cache.put("key", (np.arange(10), np.arange(5)))
+    # An eviction by another process got to one of the arrays first
+    os.remove(tmp_path / "key" / "a1.npy")
+    assert cache.get("key") is None
+
+
+def test_evicts_least_recently_used_beyond_max_bytes(tmp_path):
+    entry_bytes = np.zeros(1000).nbytes
+    cache = DiskCache(str(tmp_path), max_bytes=int(2.5 * entry_bytes))
+    cache.put("a", np.zeros(1000))
+    cache.put("b", np.ones(1000))
+    for key, age in [("a", 2000), ("b", 1000)]:
+        os.utime(tmp_path / key, (age, age))
+
+    # Reading "a" makes "b" the least recently used entry
+    assert cache.get("a") is not None
+    cache.put("c", np.full(1000, 2.0))
+    assert cache.get("b") is None
+    np.testing.assert_array_equal(cache.get("a"), np.zeros(1000))
+    np.testing.assert_array_equal(cache.get("c"), np.full(1000, 2.0))
+    assert sum(f.stat().st_size for entry in tmp_path.iterdir() for f in entry.iterdir()) <= cache.max_bytes
@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from tenxsqueeze.ProgressCerebro import ProgressCerebro, WorkerPool
+
+from .conftest import sweep
+
+PARAMS = {"tp_atr_multiplier": 2.0, "max_trade_duration": 6}
+
+
+@pytest.fixture
+def replayed(driver):
+    """The run of `PARAMS` on bars replayed by `cerebro.replaydata`, which the other modes reproduce"""
+    return driver.run(logging=False, use_cache=False, **PARAMS)
+
+
+@pytest.mark.parametrize(
+    "mode",
+    [
+        {"precompute_indicators": True},
+        {"intrabar_replay": True},
+        {"intrabar_replay": True, "precompute_indicators": True},
+        {"memo_indicators": True},
+        {"intrabar_replay": True, "memo_indicators": True},
+    ],
+)
+def test_run_modes_match_replaydata(driver, replayed, mode):
+    strategy = driver.run(logging=False, use_cache=False, **PARAMS, **mode)
+
+    assert len(replayed.entries) > 0
+    assert strategy.entries == replayed.entries
+    assert strategy.exits == replayed.exits
+    assert strategy.compact_analysis() == replayed.compact_analysis()
+
+
+def test_memo_sweep_matches_plain_sweep(driver, monkeypatch, tmp_path):
+    # The runs of a worker share the memoized lines of their lengths
+    kwargs = {"squeeze_pro_length": [20, 16], "adx_length": [14, 10]}
+    plain = sweep(driver, monkeypatch, tmp_path / "plain", **kwargs)
+    memo = sweep(driver, monkeypatch, tmp_path / "memo", memo_indicators=True, **kwargs)
+
+    assert len(plain) == 8
+    pd.testing.assert_frame_equal(plain, memo)
+
+
+def test_repeated_sweep_is_served_from_the_results_store(driver, monkeypatch, tmp_path):
+    first = sweep(driver, monkeypatch, tmp_path / "results")
+
+    calls = []
+    monkeypatch.setattr(ProgressCerebro, "runstrategies", lambda self, *args, **kwargs: calls.append(args))
+    monkeypatch.setattr(WorkerPool, "imap", lambda self, cerebro, chunks: calls.append(chunks) or iter([]))
+    cached = driver.run(logging=False, tp_atr_multiplier=[2.0, 2.3])
+
+    # Every combination was resolved by `split_cached`, nothing was run or sent to the pool
+    assert calls == []
+    cached = cached.sort_values("tp_atr_multiplier").reset_index(drop=True)
+    first = first.sort_values("tp_atr_multiplier").reset_index(drop=True)
+    assert len(cached) == 2
+    pd.testing.assert_frame_equal(cached, first[cached.columns], check_dtype=False)
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tenxsqueeze.feeds import FeedArrays
+
+from .conftest import trending_ohlcv
+
+
+@pytest.mark.parametrize("unit", ["ns", "us", "s"])
+@pytest.mark.parametrize("tz", [None, "America/New_York"])
+def test_save_load_round_trip_keeps_the_index(tmp_path, unit, tz):
+    frame = trending_ohlcv(n=500).set_index("open_time")
+    frame.index = frame.index.as_unit(unit).tz_localize(tz)
+    arrays = FeedArrays.from_frame(frame)
+
+    arrays.save(str(tmp_path / "arrays"))
+    for mmap_mode in ["r", None]:
+        loaded = FeedArrays.load(str(tmp_path / "arrays"), mmap_mode=mmap_mode)
+        pd.testing.assert_index_equal(loaded.index, arrays.index, exact=True)
+        pd.testing.assert_frame_equal(loaded.to_frame(), frame, check_freq=False)
+        np.testing.assert_array_equal(loaded.datetime, arrays.datetime)
+        assert loaded.fingerprint == arrays.fingerprint
+
+    shared = arrays.share()
+    try:
+        pd.testing.assert_index_equal(shared.index, arrays.index, exact=True)
+    finally:
+        shared.unlink()
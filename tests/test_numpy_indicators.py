@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+
+from tenxsqueeze import numpy_indicators as ni
+from tenxsqueeze import pandas_indicators as pi
+
+from .conftest import trending_ohlcv
+
+
+def test_squeeze_pro_grid_matches_pandas_on_trending_data():
+    feed = trending_ohlcv(n=150_000).set_index("open_time")
+    lengths, atr_lengths = [20, 30], [10, 14]
+    grid = ni.squeeze_pro_grid(feed.high.values, feed.low.values, feed.close.values, lengths, atr_lengths)
+
+    for row, (length, atr_length) in enumerate(zip(lengths, atr_lengths)):
+        kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, squeeze_status, mom = pi.squeeze_pro_indicator(
+            feed, bb_length=length, kc_length=length, mom_length=length, atr_length=atr_length
+        )
+        # The bands are compared in absolute terms, the prices being in the tens of thousands
+        np.testing.assert_allclose(grid["bb_upper"][row], bb_upper, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(grid["bb_lower"][row], bb_lower, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(grid["kc_upper_low"][row], kc_upper["low"], rtol=0, atol=1e-6)
+        np.testing.assert_allclose(grid["momentum"][row], mom, rtol=0, atol=1e-6)
+        np.testing.assert_array_equal(grid["squeeze_status"][row], squeeze_status.map(pi.squeeze_status_codes))
+
+
+def test_big3_matches_pandas_on_trending_data():
+    feed = trending_ohlcv(n=20_000).set_index("open_time")
+    fused = ni.big3(feed.high.values, feed.low.values, feed.close.values)
+
+    kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, squeeze_status, mom = pi.squeeze_pro_indicator(feed)
+    adx, plus, minus = pi.directional_movement(feed)
+    np.testing.assert_allclose(fused["bb_upper"], bb_upper, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(fused["kc_lower_high"], kc_lower["high"], rtol=0, atol=1e-6)
+    np.testing.assert_allclose(fused["momentum"], mom, rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(fused["squeeze_status"], squeeze_status.map(pi.squeeze_status_codes))
+    np.testing.assert_allclose(fused["adx"], adx, rtol=1e-9)
+    np.testing.assert_allclose(fused["plus"], plus, rtol=1e-9)
+    np.testing.assert_array_equal(fused["p_stack"], pi.p_stacked_ema(feed))
+    np.testing.assert_array_equal(fused["signal"], pi.big3(feed))
+
+
+def test_big3_panel_matches_big3_per_ticker():
+    feeds = [trending_ohlcv(n=3000, seed=seed).set_index("open_time") for seed in range(3)]
+    # The tickers start and stop trading at different times
+    feeds[1] = feeds[1].iloc[200:]
+    feeds[2] = feeds[2].iloc[:2500]
+    high, low, close = (pd.concat([feed[col] for feed in feeds], axis=1).values for col in ["high", "low", "close"])
+    panel = ni.big3_panel(high, low, close)
+
+    for i, feed in enumerate(feeds):
+        single = ni.big3(feed.high.values, feed.low.values, feed.close.values)
+        present = ~np.isnan(close[:, i])
+        for name in ["signal", "squeeze_status", "bullish_trend", "in_kc"]:
+            np.testing.assert_array_equal(panel[name][present, i], single[name])
+        # Reductions over a 2d panel may sum in a different order
+        for name in ["momentum", "adx", "bb_upper"]:
+            np.testing.assert_allclose(panel[name][present, i], single[name], rtol=1e-9)
+
+
+def test_directional_movement_grid_matches_pandas_on_trending_data():
+    feed = trending_ohlcv(n=20_000).set_index("open_time")
+    lengths = [14, 10, 14, 21]
+    grid = ni.directional_movement_grid(feed.high.values, feed.low.values, feed.close.values, lengths)
+
+    for row, length in enumerate(lengths):
+        adx, plus, minus = pi.directional_movement(feed, dir_length=length)
+        np.testing.assert_allclose(grid["adx"][row], adx, rtol=1e-9)
+        np.testing.assert_allclose(grid["plus"][row], plus, rtol=1e-9)
+        np.testing.assert_allclose(grid["minus"][row], minus, rtol=1e-9)
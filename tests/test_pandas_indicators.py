@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from tenxsqueeze import pandas_indicators as pi
+
+from .conftest import trending_ohlcv
+
+
+def test_compact_outputs_match_full_precision():
+    feed = trending_ohlcv(n=5000).set_index("open_time")
+
+    full = pi.squeeze_pro_indicator(feed)
+    compact = pi.squeeze_pro_indicator(feed, compact=True)
+    codes = compact[5]
+    assert codes.dtype == np.int8
+    pd.testing.assert_series_equal(codes.map({v: k for k, v in pi.squeeze_status_codes.items()}), full[5])
+    np.testing.assert_allclose(compact[3], full[3], rtol=1e-6)
+    np.testing.assert_allclose(compact[0]["high"], full[0]["high"], rtol=1e-6)
+
+    signal = pi.big3(feed, compact=True)
+    assert signal.dtype == np.int8
+    pd.testing.assert_series_equal(signal.astype(np.float64), pi.big3(feed))
+
+    # big3 uses the default squeeze pro, a bullish signal needs a bullish trend inside the keltner channel
+    flags = pi.big3_flags(feed)
+    bullish = (flags & pi.Big3Flags.BULLISH_TREND).astype(bool) & (flags & pi.Big3Flags.IN_KC).astype(bool)
+    squeezed = codes.isin([pi.squeeze_status_codes["high_squeeze"], pi.squeeze_status_codes["mid_squeeze"]])
+    pd.testing.assert_series_equal(signal > 0, bullish & squeezed, check_names=False)
@@ -0,0 +1,65 @@
+import csv
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from tenxsqueeze.results_store import ResultStore
+
+KEYS = {"squeeze_pro_length": 20, "tp_trail_percent": 0.4, "percent_is_atr": True, "frequency": "0 days 00:05:00"}
+METRICS = {"Total Trades": 12, "Net PnL": -153.25}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ResultStore(str(tmp_path / "results.sqlite"))
+
+
+def test_get_returns_stored_row_with_its_types(store):
+    store.put_many([("TenXSqueeze_V1.0", "2022-01-20", "2022-06-20", KEYS, METRICS)])
+
+    row = store.get("TenXSqueeze_V1.0", "2022-01-20", "2022-06-20", dict(KEYS))
+    assert list(row.index) == list(KEYS) + list(METRICS)
+    assert row["percent_is_atr"] is np.True_
+    assert row["squeeze_pro_length"] == 20 and row["Net PnL"] == -153.25
+    assert store.get("TenXSqueeze_V1.0", "2022-01-20", "2022-06-20", {**KEYS, "squeeze_pro_length": 21}) is None
+
+
+def test_failed_put_many_forgets_the_types_it_recorded(store):
+    # sqlite can't bind the int, which rolls the transaction back after the column type was recorded
+    with pytest.raises(OverflowError):
+        store.put_many([("TenXSqueeze_V1.0", "2022-01-20", "2022-06-20", KEYS, {"Exit Flags": 2**70})])
+    assert "Exit Flags" not in store.types
+
+    store.put_many([("TenXSqueeze_V1.0", "2022-01-20", "2022-06-20", KEYS, {"Exit Flags": True})])
+    assert store.get("TenXSqueeze_V1.0", "2022-01-20", "2022-06-20", dict(KEYS))["Exit Flags"] is np.True_
+
+
+def test_load_selects_columns_and_filters(store):
+    rows = [
+        ("TenXSqueeze_V1.0", "2022-01-20", "2022-06-20", {**KEYS, "squeeze_pro_length": length}, METRICS)
+        for length in range(10, 30)
+    ]
+    store.put_many(rows)
+
+    frame = store.load(["squeeze_pro_length", "percent_is_atr"], squeeze_pro_length=(15, 17))
+    assert frame.squeeze_pro_length.tolist() == [15, 16, 17]
+    assert frame.percent_is_atr.dtype == bool
+    assert "Net PnL" not in frame.columns
+    assert len(store.load(squeeze_pro_length=[10, 29], strategy="TenXSqueeze_V1.0")) == 2
+
+
+def test_import_csv_matches_pandas_reading_of_the_csv(store, tmp_path):
+    """Rows imported from the csv layout come back as `pd.read_csv` gave them"""
+    directory = tmp_path / "csv" / "strategy_TenXSqueeze_V1.0" / "start_2022-01-20" / "end_2022-06-20"
+    directory.mkdir(parents=True)
+    with open(directory / "results.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(list(KEYS) + list(METRICS))
+        writer.writerow(list(KEYS.values()) + list(METRICS.values()))
+
+    assert store.import_csv(str(tmp_path / "csv")) == 1
+    expected = pd.read_csv(directory / "results.csv").iloc[0]
+    row = store.get("TenXSqueeze_V1.0", "2022-01-20", "2022-06-20", KEYS)
+    pd.testing.assert_series_equal(row, expected, check_names=False, check_dtype=False)
+    assert row["percent_is_atr"] is np.True_
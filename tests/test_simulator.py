@@ -0,0 +1,19 @@
+import pytest
+
+
+@pytest.mark.parametrize(
+    "params",
+    [
+        {},
+        {"use_good_momentum": False, "max_trade_duration": 4},
+        {"percent_is_atr": False, "tp_trail_percent": 0.002, "sl_trail_percent": 0.004},
+    ],
+)
+def test_simulate_matches_run(driver, params):
+    strategy = driver.run(logging=False, use_cache=False, intrabar_replay=True, **params)
+    simulated = driver.simulate(**params)
+
+    assert len(simulated.entries) > 0
+    assert simulated.entries == strategy.entries
+    assert simulated.exits == strategy.exits
+    assert simulated.compact_analysis() == strategy.compact_analysis()
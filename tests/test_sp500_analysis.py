@@ -0,0 +1,153 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from tenxsqueeze.sp500_analysis import common, mtf
+
+from .conftest import trending_ohlcv
+
+
+def session_ohlcv(tz=None, seed=0):
+    """5m bars of the regular sessions from January to April, starting mid-session and with a tenth of the bars missing"""
+    feed = trending_ohlcv(n=30_000).set_index("open_time")
+    minutes = feed.index.hour * 60 + feed.index.minute
+    feed = feed[(minutes >= 9 * 60 + 30) & (minutes < 16 * 60) & (feed.index.dayofweek < 5)].iloc[7:]
+    feed = feed[np.random.default_rng(seed).random(len(feed)) > 0.1]
+    return feed.tz_localize(tz) if tz else feed
+
+
+def baseline_consecutive_groups(sig: pd.Series, n_consecutive: int = 2):
+    """`stf.get_consecutive_groups` before it was vectorized with `consecutive_events`"""
+    pos_groups = [
+        sig.loc[group.index[1:]]
+        for group in (sig > 0).rolling(n_consecutive + 1)
+        if group.iloc[1:].sum() == n_consecutive and group.iloc[0] == 0
+    ]
+    neg_groups = [
+        sig.loc[group.index[1:]]
+        for group in (sig < 0).rolling(n_consecutive + 1)
+        if group.iloc[1:].sum() == n_consecutive and group.iloc[0] == 0
+    ]
+    return pos_groups + neg_groups
+
+
+def baseline_partial_groups(sig: pd.Series, q: int = 5, n: int = 2):
+    """`stf.get_partial_groups` before it was vectorized with `partial_events`"""
+    pos_groups = [
+        sig.loc[group.index[1:]]
+        for group in (sig > 0).rolling(q + 1)
+        if group.iloc[1:].sum() == n and group.iloc[0] == 0 and group.iloc[-1] == 1
+    ]
+    neg_groups = [
+        sig.loc[group.index[1:]]
+        for group in (sig < 0).rolling(q + 1)
+        if group.iloc[1:].sum() == n and group.iloc[0] == 0 and group.iloc[-1] == 1
+    ]
+    return pos_groups + neg_groups
+
+
+def random_signal(n=1500, seed=0):
+    """Big3 like signal made of runs of random length and sign, set on both edges of the series"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.integers(1, 9, n)
+    values = rng.choice([-2, -1, 0, 0, 0, 1, 2], n)
+    sig = np.repeat(values, lengths)[:n].astype(np.float64)
+    sig[:4] = 1
+    sig[-7:] = [0, -2, -2, -1, -2, -1, -2]
+    return pd.Series(sig)
+
+
+def as_events(groups):
+    return [(group.index[0], group.index[-1], 1 if group.iloc[0] > 0 else -1) for group in groups]
+
+
+def test_consecutive_events_match_rolling_groups():
+    sig = random_signal()
+    n_range = [1, 2, 3, 5, 8]
+    events = common.consecutive_events(sig.values > 0, sig.values < 0, n_range)
+
+    for n in n_range:
+        expected = as_events(baseline_consecutive_groups(sig, n))
+        assert list(zip(*(a.tolist() for a in events[n]))) == expected
+        # The run on the first bar is never preceded by an unset bar, the one on the last bar is
+        assert all(start > 0 for start, *_ in expected)
+        if n <= 6:
+            assert (len(sig) - 6, len(sig) - 7 + n, -1) in expected
+
+
+def test_partial_events_match_rolling_groups():
+    sig = random_signal(seed=1)
+    nq_range = [(1, 3), (2, 3), (2, 5), (3, 5), (4, 6), (5, 5)]
+    events = common.partial_events(sig.values > 0, sig.values < 0, nq_range)
+
+    for n, q in nq_range:
+        groups = baseline_partial_groups(sig, q, n)
+        # The direction of a partial group is the sign of its last bar, the window may hold bars of either sign
+        expected = [(group.index[0], group.index[-1], 1 if group.iloc[-1] > 0 else -1) for group in groups]
+        assert list(zip(*(a.tolist() for a in events[(n, q)]))) == expected
+        if n < q:
+            assert any((group > 0).any() and (group < 0).any() for group in groups)
+
+
+def test_price_movements_match_price_movement_of_tail():
+    feed = trending_ohlcv(n=400).set_index("open_time")
+    sig = random_signal(n=len(feed), seed=2)
+    start, end, direction = common.consecutive_events(sig.values > 0, sig.values < 0, [2])[2]
+    T_range = [1, 3, 8, 20]
+    outcomes = common.get_outcomes(feed, T_range)
+
+    for T in T_range:
+        movements = common.price_movements(outcomes[T], end, direction)
+        for i in range(len(end)):
+            tail = common.get_tail(feed, feed.iloc[start[i] : end[i] + 1], T)
+            if len(tail) < T:
+                # The horizon runs past the end of the feed, which the analysis skips
+                assert end[i] + T >= len(feed)
+                assert all(np.isnan(v[i]) for v in movements.values())
+                continue
+            expected = common.price_movement(tail, direction[i])
+            for key, value in expected.items():
+                np.testing.assert_allclose(movements[key][i], value, rtol=1e-12)
+    # Some of the horizons are truncated
+    assert end[-1] + T_range[-1] >= len(feed)
+
+
+@pytest.mark.parametrize("tz", [None, "America/New_York"])
+def test_resample_ohlcv_matches_pandas_resample(tz):
+    feed = session_ohlcv(tz)
+    aggregated = common.resample_ohlcv(feed, ["15min", "30min", "60min"])
+
+    agg = {"open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum"}
+    for freq, resampled in aggregated.items():
+        expected = feed.resample(freq, offset="9h30min").agg(agg).dropna(subset=["open"])
+        pd.testing.assert_frame_equal(resampled, expected, check_freq=False)
+
+
+def test_merged_signal_matches_concat_ffill():
+    rng = np.random.default_rng(3)
+    base = session_ohlcv()
+    feeds = [base.assign(big3=rng.choice([-2.0, -1.0, 0.0, 1.0, 2.0], len(base)))]
+    # Higher timeframe bars which are not on the 5m grid, the last one starting after the base feed
+    for freq, offset, start in [("15min", "9h32min", 0), ("30min", "9h41min", 0), ("60min", "9h37min", 40)]:
+        htf = common.resample_ohlcv(base, [freq], session_anchor=offset)[freq].iloc[start:]
+        feeds.append(htf.assign(big3=rng.choice([-2.0, -1.0, 1.0, 2.0], len(htf))))
+
+    expected = pd.concat(feeds, axis=1, sort=True).ffill().big3.loc[base.index]
+    merged = mtf.get_merged_signal(feeds)
+    np.testing.assert_array_equal(merged.values, expected.values)
+    assert merged.iloc[:, 3].isna().any()
+
+    for thresh in [None, 0.5, 0.7]:
+        pos, neg = mtf.get_agreement(merged, thresh)
+        if thresh is None:
+            expected_pos, expected_neg = (expected > 0).all(axis=1), (expected < 0).all(axis=1)
+        else:
+            expected_pos = (expected > 0).sum(axis=1) / len(feeds) > thresh
+            expected_neg = (expected < 0).sum(axis=1) / len(feeds) > thresh
+        np.testing.assert_array_equal(pos, expected_pos.values)
+        np.testing.assert_array_equal(neg, expected_neg.values)
+        assert pos.any() and neg.any()
+
+    # A map of the first two feeds gives the same signal as the first two columns of the full one
+    timeframe_map = mtf.get_timeframe_map(feeds)
+    np.testing.assert_array_equal(mtf.get_merged_signal(feeds[:2], timeframe_map[:, :2]).values, expected.values[:, :2])
@@ -0,0 +1,47 @@
+import numpy as np
+import talib
+
+from tenxsqueeze import pandas_indicators as pi
+from tenxsqueeze import streaming_indicators as si
+
+from .conftest import trending_ohlcv
+
+
+def stream(indicator, feed):
+    return [indicator.update(*bar) for bar in zip(feed.high.values, feed.low.values, feed.close.values)]
+
+
+def test_streaming_matches_batch_on_trending_data():
+    feed = trending_ohlcv(n=150_000).set_index("open_time")
+
+    kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, squeeze_status, mom = pi.squeeze_pro_indicator(feed)
+    streamed = list(zip(*stream(si.SqueezePro(), feed)))
+    # The bands are compared in absolute terms, the prices being in the tens of thousands
+    np.testing.assert_allclose(streamed[3], bb_upper, rtol=0, atol=1e-6)
+    np.testing.assert_allclose(streamed[4], bb_basis, rtol=0, atol=1e-6)
+    np.testing.assert_allclose([kc["high"] for kc in streamed[0]], kc_lower["high"], rtol=0, atol=1e-6)
+    np.testing.assert_allclose(streamed[6], mom, rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(streamed[5], squeeze_status)
+
+    adx, plus, minus = pi.directional_movement(feed)
+    streamed = np.array(stream(si.DirectionalMovement(), feed)).T
+    np.testing.assert_allclose(streamed, [adx, plus, minus], rtol=1e-9)
+
+    np.testing.assert_array_equal(stream(si.Big3(), feed), pi.big3(feed))
+
+
+def test_streaming_skips_leading_nans_like_talib():
+    feed = trending_ohlcv(n=300).set_index("open_time")
+    feed.iloc[:3] = np.nan
+
+    bands = si.BollingerBands(20, 2)
+    streamed = np.array([bands.update(x) for x in feed.close.values]).T
+    np.testing.assert_allclose(streamed, talib.BBANDS(feed.close.values, 20, 2, 2, 0), rtol=0, atol=1e-6)
+
+    kc_lower, kc_upper, bb_lower, bb_upper, bb_basis, squeeze_status, mom = pi.squeeze_pro_indicator(feed)
+    streamed = list(zip(*stream(si.SqueezePro(), feed)))
+    np.testing.assert_allclose(streamed[2], bb_lower, rtol=0, atol=1e-6)
+    np.testing.assert_allclose([kc["low"] for kc in streamed[1]], kc_upper["low"], rtol=0, atol=1e-6)
+    np.testing.assert_allclose(streamed[6], mom, rtol=0, atol=1e-6)
+    np.testing.assert_array_equal(streamed[5], squeeze_status)
+    np.testing.assert_array_equal(stream(si.Big3(), feed), pi.big3(feed))
@@ -0,0 +1,17 @@
+import pandas as pd
+
+from .conftest import sweep
+
+
+def test_precompute_sweep_after_plain_sweep_on_same_pool(driver, monkeypatch, tmp_path):
+    pool = driver.start_pool(processes=2)
+    plain = sweep(driver, monkeypatch, tmp_path / "plain", intrabar_replay=True)
+    precomputed = sweep(
+        driver, monkeypatch, tmp_path / "precomputed", intrabar_replay=True, precompute_indicators=True
+    )
+
+    assert len(plain) == 2
+    metrics = [col for col in plain.columns if col[0].isupper()]
+    pd.testing.assert_frame_equal(plain[metrics], precomputed[metrics])
+    # Only the arrays of the last run stay in shared memory
+    assert len(pool._shared) == 1